@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+
+
+def load_results(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return report, {(r['kind'], r['name'], r['corpus']): r for r in report['results']}
+
+
+def ratio(new, old):
+    if new is None or old is None or old == 0:
+        return None
+    return new / old
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark suite results")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative throughput drop reported as a regression")
+    args = parser.parse_args()
+
+    baseline_report, baseline = load_results(args.baseline)
+    current_report, current = load_results(args.current)
+
+    print(f"baseline {baseline_report.get('kmmarc_version')} ({baseline_report['timestamp']}), current {current_report.get('kmmarc_version')} ({current_report['timestamp']})")
+    print(f"{'kind':<7} {'name':<20} {'corpus':<15} {'records/s':>12} {'change':>8} {'p99 us':>9} {'change':>8} {'peak KiB':>10} {'change':>8}")
+
+    regressions = 0
+    for key in sorted(current.keys() & baseline.keys()):
+        old, new = baseline[key], current[key]
+        throughput = ratio(new['records_per_second'], old['records_per_second'])
+        latency = ratio(new['latency_us']['p99'], old['latency_us']['p99'])
+        rss = ratio(new['peak_rss_kib'], old['peak_rss_kib'])
+
+        mark = ''
+        if throughput is not None and throughput < 1 - args.threshold:
+            mark = '  REGRESSION'
+            regressions += 1
+
+        def change(value):
+            return f"{(value - 1) * 100:+7.1f}%" if value is not None else f"{'n/a':>8}"
+
+        print(f"{key[0]:<7} {key[1]:<20} {key[2]:<15} {new['records_per_second'] or 0:>12,.0f} {change(throughput)} {new['latency_us']['p99'] or 0:>9,.1f} {change(latency)} {new['peak_rss_kib'] or 0:>10,} {change(rss)}{mark}")
+
+    for key in sorted(current.keys() - baseline.keys()):
+        print(f"{key[0]:<7} {key[1]:<20} {key[2]:<15} only in current")
+    for key in sorted(baseline.keys() - current.keys()):
+        print(f"{key[0]:<7} {key[1]:<20} {key[2]:<15} only in baseline")
+
+    if regressions > 0:
+        print(f"{regressions} benchmarks regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
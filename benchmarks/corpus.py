@@ -0,0 +1,114 @@
+import random
+from kmmarc.marc import Record, ControlField, DataField, SubField
+from kmmarc.writer import MarcStreamWriter
+
+WORDS = [
+    "história", "portugal", "lisboa", "século", "arquitectura", "poesia", "romance", "ciência",
+    "economia", "política", "música", "teatro", "viagens", "memórias", "colecção", "obras",
+]
+
+# Only representable in UTF-8 corpora, ISO-8859-1 ones stick to WORDS.
+UTF8_WORDS = [
+    "dvořák", "łódź", "čapek", "ελληνικά", "кириллица", "日本語", "naïveté", "şiir",
+]
+
+STYLES = ('unimarc', 'marc21', 'mixed')
+
+
+def make_record(rng: random.Random, n: int, words = WORDS) -> Record:
+    record = Record("00000nam0 2200000   450 ")
+    record.control_fields.append(ControlField('001', f"BENCH{n:09d}"))
+    record.control_fields.append(ControlField('005', "20240101120000.0"))
+
+    field = DataField('010', ' ', ' ')
+    field.subfields.append(SubField('a', f"978-972-{rng.randint(0, 99999):05d}-{rng.randint(0, 9)}"))
+    record.data_fields.append(field)
+
+    field = DataField('200', '1', ' ')
+    field.subfields.append(SubField('a', ' '.join(rng.choices(words, k=rng.randint(2, 6))).capitalize()))
+    field.subfields.append(SubField('f', ' '.join(rng.choices(words, k=2)).title()))
+    record.data_fields.append(field)
+
+    field = DataField('210', ' ', ' ')
+    field.subfields.append(SubField('a', "Lisboa"))
+    field.subfields.append(SubField('c', ' '.join(rng.choices(words, k=2)).title()))
+    field.subfields.append(SubField('d', str(rng.randint(1800, 2024))))
+    record.data_fields.append(field)
+
+    for _ in range(rng.randint(1, 4)):
+        field = DataField('606', ' ', ' ')
+        field.subfields.append(SubField('a', rng.choice(words).capitalize()))
+        field.subfields.append(SubField('x', rng.choice(words).capitalize()))
+        record.data_fields.append(field)
+
+    field = DataField('700', ' ', '1')
+    field.subfields.append(SubField('a', rng.choice(words).title()))
+    field.subfields.append(SubField('b', rng.choice(words)[0].upper() + "."))
+    record.data_fields.append(field)
+
+    return record
+
+
+def make_marc21_record(rng: random.Random, n: int, words = WORDS) -> Record:
+    record = Record("00000nam  2200000 i 4500")
+    record.control_fields.append(ControlField('001', f"BENCH{n:09d}"))
+    record.control_fields.append(ControlField('003', "PtLiBN"))
+    record.control_fields.append(ControlField('005', "20240101120000.0"))
+    record.control_fields.append(ControlField('008', f"240101s{rng.randint(1800, 2024)}    po            000 0 por d"))
+
+    field = DataField('020', ' ', ' ')
+    field.subfields.append(SubField('a', f"978972{rng.randint(0, 9999999):07d}"))
+    record.data_fields.append(field)
+
+    field = DataField('100', '1', ' ')
+    field.subfields.append(SubField('a', f"{rng.choice(words).title()}, {rng.choice(words).title()}"))
+    field.subfields.append(SubField('d', f"{rng.randint(1800, 1950)}-"))
+    record.data_fields.append(field)
+
+    field = DataField('245', '1', '0')
+    field.subfields.append(SubField('a', ' '.join(rng.choices(words, k=rng.randint(2, 6))).capitalize() + " :"))
+    field.subfields.append(SubField('b', ' '.join(rng.choices(words, k=3)) + " /"))
+    field.subfields.append(SubField('c', ' '.join(rng.choices(words, k=2)).title() + "."))
+    record.data_fields.append(field)
+
+    field = DataField('264', ' ', '1')
+    field.subfields.append(SubField('a', "Lisboa :"))
+    field.subfields.append(SubField('b', ' '.join(rng.choices(words, k=2)).title() + ","))
+    field.subfields.append(SubField('c', str(rng.randint(1800, 2024)) + "."))
+    record.data_fields.append(field)
+
+    field = DataField('300', ' ', ' ')
+    field.subfields.append(SubField('a', f"{rng.randint(50, 900)} p. ;"))
+    field.subfields.append(SubField('c', "24 cm"))
+    record.data_fields.append(field)
+
+    for _ in range(rng.randint(1, 4)):
+        field = DataField('650', ' ', '0')
+        field.subfields.append(SubField('a', rng.choice(words).capitalize()))
+        field.subfields.append(SubField('x', rng.choice(words).capitalize() + "."))
+        record.data_fields.append(field)
+
+    field = DataField('700', '1', ' ')
+    field.subfields.append(SubField('a', f"{rng.choice(words).title()}, {rng.choice(words)[0].upper()}."))
+    record.data_fields.append(field)
+
+    return record
+
+
+def generate_records(count: int, seed = 0, style = 'unimarc', utf8 = False):
+    if style not in STYLES:
+        raise Exception(f"Unknown corpus style {style}")
+
+    rng = random.Random(seed)
+    words = WORDS + UTF8_WORDS if utf8 else WORDS
+    for n in range(count):
+        if style == 'marc21' or (style == 'mixed' and rng.random() < 0.5):
+            yield make_marc21_record(rng, n, words)
+        else:
+            yield make_record(rng, n, words)
+
+
+def write_iso_corpus(path: str, count: int, seed = 0, style = 'unimarc', utf8 = False):
+    with open(path, "wb") as f:
+        with MarcStreamWriter(f, force_utf8_encoding=utf8) as writer:
+            writer.write_all(generate_records(count, seed, style, utf8))
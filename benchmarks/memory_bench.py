@@ -0,0 +1,92 @@
+import argparse
+import gc
+import io
+import tracemalloc
+from unittest import mock
+
+from kmmarc.reader import MarcStreamReader
+from kmmarc.writer import MarcStreamWriter
+from benchmarks.corpus import generate_records
+
+
+# Plain __dict__ backed stand-ins for the object model as it was before it
+# used __slots__, patched into the reader to get the baseline numbers.
+class DictLeader:
+    def __init__(self, leader_bytes) -> None:
+        leader_str = bytes(leader_bytes).decode("iso-8859-1")
+        self.record_length = int(leader_str[0:5])
+        self.record_status = leader_str[5:6]
+        self.type_of_record = leader_str[6:7]
+        self.impl_defined1 = leader_str[7:9]
+        self.char_coding_scheme = leader_str[9:10]
+        self.indicator_count = int(leader_str[10:11])
+        self.subfield_length = int(leader_str[11:12])
+        self.base_address_of_data = int(leader_str[12:17])
+        self.impl_defined2 = leader_str[17:20]
+        self.entry_map = leader_str[20:24]
+
+    @property
+    def raw(self) -> bytes:
+        # The reader reads leader bytes through raw. Built on access, so the
+        # instances stay as large as the old per-attribute leader.
+        return f"{self.record_length:05d}{self.record_status}{self.type_of_record}{self.impl_defined1}{self.char_coding_scheme}{self.indicator_count}{self.subfield_length}{self.base_address_of_data:05d}{self.impl_defined2}{self.entry_map}".encode("iso-8859-1")
+
+
+class DictRecord:
+    def __init__(self, leader, control_fields = (), data_fields = ()) -> None:
+        self.leader = leader
+        self.control_fields = list(control_fields)
+        self.data_fields = list(data_fields)
+
+
+class DictControlField:
+    def __init__(self, tag, data) -> None:
+        self.tag = tag
+        self.data = data
+
+
+class DictDataField:
+    def __init__(self, tag, ind1, ind2, subfields = ()) -> None:
+        self.tag = tag
+        self.ind1 = ind1
+        self.ind2 = ind2
+        self.subfields = list(subfields)
+
+
+class DictSubField:
+    def __init__(self, code, data) -> None:
+        self.code = code
+        self.data = data
+
+
+def measure(data: bytes, **reader_args):
+    gc.collect()
+    tracemalloc.start()
+    records = list(MarcStreamReader(io.BytesIO(data), streaming=True, **reader_args))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(records), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory held by parsed records")
+    parser.add_argument("--records", type=int, default=20_000)
+    args = parser.parse_args()
+
+    buf = io.BytesIO()
+    with MarcStreamWriter(buf) as writer:
+        writer.write_all(generate_records(args.records))
+    data = buf.getvalue()
+
+    with mock.patch.multiple("kmmarc.reader", Leader=DictLeader, Record=DictRecord, ControlField=DictControlField, DataField=DictDataField, SubField=DictSubField):
+        results = [("dict", *measure(data))]
+
+    results.append(("slots", *measure(data)))
+    results.append(("packed", *measure(data, pack_subfields=True)))
+
+    for name, count, size in results:
+        print(f"{name:<8} {size / count:8,.0f} bytes/record")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import os
+import tempfile
+import time
+
+from kmmarc.reader import read_marc_stream_from_path, read_marc_stream_parallel
+from benchmarks.corpus import write_iso_corpus
+
+
+def run(records, decode: bool):
+    # With decode, every field of every record is read, as a consumer that
+    # converts or validates them would.
+    start = time.perf_counter()
+    count = 0
+    for record in records:
+        if decode:
+            for _ in record:
+                pass
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare read_marc_stream_parallel with the serial ISO 2709 reader")
+    parser.add_argument("--records", type=int, default=60_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--decode", action="store_true", help="read every field of every record")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.mrc")
+        write_iso_corpus(path, args.records)
+
+        cases = [("serial", lambda: read_marc_stream_from_path(path)), ("serial lazy", lambda: read_marc_stream_from_path(path, lazy=True))]
+        for workers in args.workers:
+            cases.append((f"parallel {workers}", lambda workers=workers: read_marc_stream_parallel(path, workers=workers)))
+
+        for name, records in cases:
+            count, elapsed = run(records(), args.decode)
+            print(f"{name:<12} {count} records in {elapsed:.2f}s ({count / elapsed:,.0f} records/s)")
+
+
+if __name__ == '__main__':
+    main()
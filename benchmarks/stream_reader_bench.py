@@ -0,0 +1,82 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from kmmarc.marc import DataField, SubField
+from kmmarc.reader import MarcStreamReader
+from kmmarc.constants import *
+from benchmarks.corpus import write_iso_corpus
+
+
+class BytewiseMarcStreamReader(MarcStreamReader):
+    # The byte-at-a-time data field parser MarcStreamReader used before it
+    # switched to splitting on delimiters, kept here as the baseline.
+    def __parse_subfield_length(self, buf: io.BytesIO):
+        cur_bak = buf.tell()
+        bytes_read = 0
+
+        while bytes_read < 9999:
+            r = buf.read(1)
+
+            if r == US or r == FT:
+                break
+            elif r == b'':
+                buf.seek(cur_bak)
+                raise Exception('Subfield not terminated')
+
+            bytes_read += 1
+
+        buf.seek(cur_bak)
+        return bytes_read
+
+    def _MarcStreamReader__parse_data_field(self, tag, field_bytes, encoding: str, packed = False):
+        buf = io.BytesIO(field_bytes)
+
+        field = DataField(tag, buf.read(1).decode(encoding), buf.read(1).decode(encoding))
+
+        while True:
+            read_byte = buf.read(1)
+            if read_byte == b'':
+                break
+
+            if read_byte == US:
+                code = buf.read(1)
+                if code == b'':
+                    raise Exception("Unexpected end of data field")
+
+                if code == FT:
+                    continue
+
+                size = self.__parse_subfield_length(buf)
+                data = buf.read(size)
+
+                field.subfields.append(SubField(code.decode(encoding), data.decode(encoding)))
+
+        return field
+
+
+def run(reader_class, path: str):
+    start = time.perf_counter()
+    with open(path, "rb", buffering=1024 * 1024) as f:
+        count = sum(1 for _ in reader_class(f, streaming=True))
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ISO 2709 data field parsers")
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.mrc")
+        write_iso_corpus(path, args.records)
+
+        for name, reader_class in (("bytewise", BytewiseMarcStreamReader), ("split", MarcStreamReader)):
+            count, elapsed = run(reader_class, path)
+            print(f"{name:<10} {count} records in {elapsed:.2f}s ({count / elapsed:,.0f} records/s)")
+
+
+if __name__ == '__main__':
+    main()
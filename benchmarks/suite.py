@@ -0,0 +1,220 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+
+from kmmarc.reader import (
+    MarcStreamReader, MarcMmapReader, MarcXmlReader, MarcJsonReader, MarcJsonLinesReader, MarcYamlReader,
+    read_marc_stream_from_path
+)
+from kmmarc.writer import MarcStreamWriter, MarcXmlWriter, MarcJsonWriter, MarcJsonLinesWriter, MarcYamlWriter
+from benchmarks.corpus import STYLES, write_iso_corpus
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CORPUS_EXTENSIONS = {
+    'iso': '.mrc',
+    'xml': '.xml',
+    'json': '.json',
+    'jsonl': '.jsonl',
+    'yaml': '.yaml',
+}
+
+# name -> (input format, binary input, reader factory)
+READERS = {
+    'MarcStreamReader': ('iso', True, lambda f: MarcStreamReader(f, streaming=True)),
+    'MarcMmapReader': ('iso', True, lambda f: MarcMmapReader(f)),
+    'MarcXmlReader': ('xml', True, lambda f: MarcXmlReader(f)),
+    'MarcJsonReader': ('json', False, lambda f: MarcJsonReader(f)),
+    'MarcJsonLinesReader': ('jsonl', True, lambda f: MarcJsonLinesReader(f)),
+    'MarcYamlReader': ('yaml', False, lambda f: MarcYamlReader(f)),
+}
+
+# name -> (output format, writer factory)
+WRITERS = {
+    'MarcStreamWriter': ('iso', lambda f, utf8: MarcStreamWriter(f, force_utf8_encoding=utf8, buffer_size=1024 * 1024)),
+    'MarcXmlWriter': ('xml', lambda f, utf8: MarcXmlWriter(f)),
+    'MarcJsonWriter': ('json', lambda f, utf8: MarcJsonWriter(f)),
+    'MarcJsonLinesWriter': ('jsonl', lambda f, utf8: MarcJsonLinesWriter(f)),
+    'MarcYamlWriter': ('yaml', lambda f, utf8: MarcYamlWriter(f)),
+}
+
+
+def peak_rss_kib() -> int | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def summarize(kind: str, name: str, corpus: str, latencies: array, elapsed: float, rss_before: int | None):
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def percentile(p):
+        return ordered[min(count - 1, int(count * p))] / 1000 if count > 0 else None
+
+    rss_after = peak_rss_kib()
+    return {
+        'kind': kind,
+        'name': name,
+        'corpus': corpus,
+        'records': count,
+        'seconds': elapsed,
+        'records_per_second': count / elapsed if elapsed > 0 else None,
+        'latency_us': {
+            'mean': sum(ordered) / count / 1000 if count > 0 else None,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': ordered[-1] / 1000 if count > 0 else None,
+        },
+        'rss_before_kib': rss_before,
+        'peak_rss_kib': rss_after,
+    }
+
+
+def run_reader(name: str, corpus: str, path: str, utf8: bool):
+    _, binary, factory = READERS[name]
+    latencies = array('q')
+    clock = time.perf_counter_ns
+    rss_before = peak_rss_kib()
+
+    start = time.perf_counter()
+    with open(path, "rb" if binary else "r", encoding=None if binary else "utf-8") as f:
+        # Building the reader is part of the cost, whole-document readers
+        # parse everything there.
+        records = iter(factory(f))
+        while True:
+            t = clock()
+            record = next(records, None)
+            if record is None:
+                break
+            latencies.append(clock() - t)
+    elapsed = time.perf_counter() - start
+
+    return summarize('reader', name, corpus, latencies, elapsed, rss_before)
+
+
+def run_writer(name: str, corpus: str, path: str, utf8: bool, out_path: str):
+    out_format, factory = WRITERS[name]
+    records = read_marc_stream_from_path(path, parse_all=True, force_utf8_encoding=utf8)
+    latencies = array('q')
+    clock = time.perf_counter_ns
+    rss_before = peak_rss_kib()
+
+    start = time.perf_counter()
+    with open(out_path, "wb") if out_format == 'iso' else open(out_path, "w", encoding="utf-8") as f:
+        writer = factory(f, utf8)
+        for record in records:
+            t = clock()
+            writer._write_serialized(writer._serialize(record))
+            latencies.append(clock() - t)
+        writer._finish()
+    elapsed = time.perf_counter() - start
+
+    os.remove(out_path)
+    return summarize('writer', name, corpus, latencies, elapsed, rss_before)
+
+
+def prepare_corpus(directory: str, style: str, utf8: bool, count: int, seed: int):
+    name = f"{style}-{'utf8' if utf8 else 'latin1'}"
+    paths = {'iso': os.path.join(directory, name + CORPUS_EXTENSIONS['iso'])}
+    write_iso_corpus(paths['iso'], count, seed, style, utf8)
+
+    records = read_marc_stream_from_path(paths['iso'], parse_all=True, force_utf8_encoding=utf8)
+    for out_format, factory in WRITERS.values():
+        if out_format == 'iso':
+            continue
+
+        paths[out_format] = os.path.join(directory, name + CORPUS_EXTENSIONS[out_format])
+        with open(paths[out_format], "w", encoding="utf-8") as f:
+            writer = factory(f, utf8)
+            for record in records:
+                writer._write_serialized(writer._serialize(record))
+            writer._finish()
+
+    return name, paths
+
+
+def kmmarc_version() -> str | None:
+    try:
+        return metadata.version("km-marc")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def run_case(case):
+    kind, name, corpus, path, utf8, out_path = case
+    if kind == 'reader':
+        return run_reader(name, corpus, path, utf8)
+    return run_writer(name, corpus, path, utf8, out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput, latency and peak RSS of every reader and writer")
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--styles", nargs="+", choices=STYLES, default=['unimarc', 'marc21'])
+    parser.add_argument("--encodings", nargs="+", choices=['latin1', 'utf8'], default=['latin1', 'utf8'])
+    parser.add_argument("--readers", nargs="+", choices=list(READERS), default=list(READERS))
+    parser.add_argument("--writers", nargs="+", choices=list(WRITERS), default=list(WRITERS))
+    parser.add_argument("--output", "-o", help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = []
+        for style in args.styles:
+            for encoding in args.encodings:
+                utf8 = encoding == 'utf8'
+                corpus, paths = prepare_corpus(tmp, style, utf8, args.records, args.seed)
+
+                for name in args.readers:
+                    cases.append(('reader', name, corpus, paths[READERS[name][0]], utf8, None))
+                for name in args.writers:
+                    out_path = os.path.join(tmp, f"out-{corpus}{CORPUS_EXTENSIONS[WRITERS[name][0]]}")
+                    cases.append(('writer', name, corpus, paths['iso'], utf8, out_path))
+
+        # Every case runs in a fresh process so peak RSS belongs to it alone.
+        context = multiprocessing.get_context('spawn')
+        for case in cases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, case).result()
+
+            results.append(result)
+            print(f"{result['kind']:<7} {result['name']:<20} {result['corpus']:<15} {result['records_per_second']:>12,.0f} records/s  p99 {result['latency_us']['p99']:>9,.1f}us  peak {result['peak_rss_kib'] or 0:>9,} KiB", file=sys.stderr)
+
+    report = {
+        'kmmarc_version': kmmarc_version(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'records': args.records,
+        'seed': args.seed,
+        'results': results,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,61 @@
-def main():
-  pass
\ No newline at end of file
+import argparse
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="kmmarc", description="Parse and write MARC files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="convert between ISO 2709, MARCXML, JSON, JSON Lines and YAML")
+    convert_parser.add_argument("input")
+    convert_parser.add_argument("output")
+    convert_parser.add_argument("--from", dest="in_format", choices=["iso", "xml", "json", "jsonl", "yaml"], help="input format, detected from the extension by default")
+    convert_parser.add_argument("--to", dest="out_format", choices=["iso", "xml", "json", "jsonl", "yaml"], help="output format, detected from the extension by default")
+    convert_parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to the CPU count")
+    convert_parser.add_argument("--indent", type=int, default=None, help="indentation for XML, JSON and YAML output")
+    convert_parser.add_argument("--sort-tags", action="store_true", help="write fields sorted by tag")
+    convert_parser.add_argument("--multi-document", action="store_true", help="write YAML output as one document per record")
+    convert_parser.add_argument("--force-utf8", action="store_true", help="read and write ISO 2709 as UTF-8")
+
+    diff_parser = commands.add_parser("diff", help="write the changes between two ISO 2709 dumps as a JSON Lines change set")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument("changes")
+    diff_parser.add_argument("--force-utf8", action="store_true", help="read ISO 2709 as UTF-8")
+
+    patch_parser = commands.add_parser("patch", help="apply a change set to an ISO 2709 dump")
+    patch_parser.add_argument("base")
+    patch_parser.add_argument("changes")
+    patch_parser.add_argument("output")
+    patch_parser.add_argument("--to", dest="out_format", choices=["iso", "xml", "json", "jsonl", "yaml"], help="output format, detected from the extension by default")
+    patch_parser.add_argument("--force-utf8", action="store_true", help="read and write ISO 2709 as UTF-8")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        from kmmarc.convert import convert, detect_format
+
+        out_format = args.out_format if args.out_format is not None else detect_format(args.output)
+        writer_options = {'sort_tags': args.sort_tags}
+        if out_format == 'iso':
+            writer_options['force_utf8_encoding'] = args.force_utf8
+        elif out_format != 'jsonl':
+            writer_options['indent'] = args.indent
+
+        if out_format == 'yaml':
+            writer_options['multi_document'] = args.multi_document
+
+        count = convert(args.input, args.output, args.in_format, out_format, workers=args.workers, writer_options=writer_options, force_utf8_encoding=args.force_utf8)
+        print(f"Converted {count} records")
+    elif args.command == "diff":
+        from kmmarc.diff import diff_marc_streams, write_change_set
+
+        counts = write_change_set(args.changes, diff_marc_streams(args.old, args.new, force_utf8_encoding=args.force_utf8))
+        print(f"{counts['added']} added, {counts['removed']} removed, {counts['modified']} modified")
+    elif args.command == "patch":
+        from kmmarc.convert import detect_format
+        from kmmarc.diff import patch_marc_stream
+
+        out_format = args.out_format if args.out_format is not None else detect_format(args.output)
+        writer_options = {'force_utf8_encoding': args.force_utf8} if out_format == 'iso' else {}
+        count = patch_marc_stream(args.base, args.changes, args.output, out_format, writer_options, force_utf8_encoding=args.force_utf8)
+        print(f"Wrote {count} records")
\ No newline at end of file
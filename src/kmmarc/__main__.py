@@ -0,0 +1,3 @@
+from kmmarc import main
+
+main()
\ No newline at end of file
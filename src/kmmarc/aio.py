@@ -0,0 +1,130 @@
+import asyncio
+import io
+import xml.etree.ElementTree as ET
+from kmmarc.marc import Record
+from kmmarc.reader import MarcStreamReader, MarcXmlReader
+from kmmarc.writer import MarcStreamWriter
+
+
+class AsyncMarcStreamReader:
+    def __init__(self, stream: asyncio.StreamReader, force_utf8_encoding = False, lazy = False, pack_subfields = False) -> None:
+        self.stream = stream
+        # Framing happens here, parsing is MarcStreamReader's.
+        self.__reader = MarcStreamReader(io.BytesIO(), force_utf8_encoding, lazy=lazy, pack_subfields=pack_subfields)
+
+    async def _read_next_bytes(self):
+        try:
+            leader_bytes = await self.stream.readexactly(24)
+        except asyncio.IncompleteReadError as e:
+            if len(e.partial) == 0:
+                return None
+            raise Exception("Unexpected end of stream while reading leader")
+
+        try:
+            rec_len = int(leader_bytes[0:5].decode("iso-8859-1"))
+        except ValueError:
+            raise Exception(f"Invalid record length {leader_bytes[0:5]!r}")
+        if rec_len < 24:
+            raise Exception(f"Invalid record length {rec_len}")
+
+        try:
+            return leader_bytes + await self.stream.readexactly(rec_len - 24)
+        except asyncio.IncompleteReadError:
+            raise Exception("Unexpected end of stream while reading record")
+
+    async def read_next(self):
+        rec = await self._read_next_bytes()
+        if rec is None:
+            return None
+
+        return self.__reader._parse_record(rec)
+
+    async def __aiter__(self):
+        while True:
+            record = await self.read_next()
+            if record is None:
+                break
+
+            yield record
+
+
+class AsyncMarcXmlReader:
+    def __init__(self, stream: asyncio.StreamReader, chunk_size = 64 * 1024) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.__reader = MarcXmlReader(None)
+
+    async def __aiter__(self):
+        # Same record handling as MarcXmlReader's iterparse loop, fed from
+        # the stream a chunk at a time.
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        record_name = None
+        field_tags = None
+
+        while True:
+            chunk = await self.stream.read(self.chunk_size)
+            if len(chunk) == 0:
+                parser.close()
+            else:
+                parser.feed(chunk)
+
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    if record_name is None and MarcXmlReader._local_name(elem.tag) == 'record':
+                        record_name = elem.tag
+                    continue
+
+                if elem.tag != record_name:
+                    continue
+
+                if field_tags is None:
+                    field_tags = self.__reader._resolve_field_tags(elem)
+
+                yield self.__reader._parse_record(elem, field_tags)
+                root.clear()
+
+            if len(chunk) == 0:
+                break
+
+
+class AsyncMarcStreamWriter:
+    def __init__(self, stream: asyncio.StreamWriter, force_utf8_encoding = False, ignored_tags: list[str] | None = None, sort_tags = False, buffer_size = 64 * 1024) -> None:
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.__writer = MarcStreamWriter(None, force_utf8_encoding, ignored_tags, sort_tags)
+        self.__buf = bytearray()
+
+    async def write(self, record: Record):
+        self.__buf += self.__writer._serialize(record)
+        if len(self.__buf) >= self.buffer_size:
+            await self.flush()
+
+    async def write_all(self, records):
+        if hasattr(records, '__aiter__'):
+            async for record in records:
+                await self.write(record)
+        else:
+            for record in records:
+                await self.write(record)
+
+        await self.flush()
+
+    async def flush(self):
+        # drain() waits while the transport's buffer is over its high-water
+        # mark, so a slow peer holds the producer back.
+        if len(self.__buf) > 0:
+            self.stream.write(self.__buf)
+            self.__buf = bytearray()
+        await self.stream.drain()
+
+    async def close(self):
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
\ No newline at end of file
@@ -0,0 +1,385 @@
+import xml.etree.ElementTree as ET
+from array import array
+from itertools import accumulate, chain, islice, repeat
+from kmmarc.reader import MarcStreamReader
+from kmmarc.convert import detect_format
+from kmmarc.compression import open_path
+from kmmarc.constants import *
+
+
+class StringColumn:
+    __slots__ = ('offsets', 'data')
+
+    def __init__(self) -> None:
+        # Arrow's large string layout: value i is data[offsets[i]:offsets[i + 1]],
+        # always UTF-8.
+        self.offsets = array('q', [0])
+        self.data = bytearray()
+
+    def append(self, value: bytes):
+        self.data += value
+        self.offsets.append(len(self.data))
+
+    def extend(self, values: list[bytes]):
+        end = self.offsets[-1]
+        self.data += b''.join(values)
+        self.offsets.extend(islice(accumulate(map(len, values), initial=end), 1, None))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("column index out of range")
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+    def __iter__(self):
+        data = self.data
+        offsets = self.offsets
+        for i in range(len(self)):
+            yield data[offsets[i]:offsets[i + 1]].decode('utf-8')
+
+    def to_numpy(self):
+        import numpy
+
+        # Both arrays share memory with the column, which can no longer
+        # grow while they are alive.
+        return numpy.frombuffer(self.offsets, dtype=numpy.int64), numpy.frombuffer(self.data, dtype=numpy.uint8)
+
+    def to_arrow(self):
+        import pyarrow
+
+        return pyarrow.LargeStringArray.from_buffers(len(self), pyarrow.py_buffer(self.offsets), pyarrow.py_buffer(self.data))
+
+
+class SubfieldTable:
+    __slots__ = ('record', 'field', 'record_ids', 'tag', 'ind1', 'ind2', 'code', 'value')
+
+    def __init__(self) -> None:
+        # One row per subfield and one per control field, whose indicators
+        # and code are empty. record and field number the rows' record and
+        # the field within it, record_ids holds each record's 001.
+        self.record = array('q')
+        self.field = array('q')
+        self.record_ids = StringColumn()
+        self.tag = StringColumn()
+        self.ind1 = StringColumn()
+        self.ind2 = StringColumn()
+        self.code = StringColumn()
+        self.value = StringColumn()
+
+    def __len__(self):
+        return len(self.record)
+
+    @property
+    def record_count(self) -> int:
+        return len(self.record_ids)
+
+    def row(self, i: int) -> tuple:
+        return (self.record[i], self.field[i], self.record_ids[self.record[i]], self.tag[i], self.ind1[i], self.ind2[i], self.code[i], self.value[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_numpy(self) -> dict:
+        import numpy
+
+        columns = {
+            'record': numpy.frombuffer(self.record, dtype=numpy.int64),
+            'field': numpy.frombuffer(self.field, dtype=numpy.int64),
+            'record_ids': self.record_ids.to_numpy(),
+        }
+        for name in ('tag', 'ind1', 'ind2', 'code', 'value'):
+            columns[name] = getattr(self, name).to_numpy()
+        return columns
+
+    def to_arrow(self):
+        import pyarrow
+
+        record = pyarrow.Array.from_buffers(pyarrow.int64(), len(self.record), [None, pyarrow.py_buffer(self.record)])
+        columns = {
+            'record': record,
+            'field': pyarrow.Array.from_buffers(pyarrow.int64(), len(self.field), [None, pyarrow.py_buffer(self.field)]),
+            'record_id': pyarrow.DictionaryArray.from_arrays(record, self.record_ids.to_arrow()),
+        }
+        for name in ('tag', 'ind1', 'ind2', 'code', 'value'):
+            columns[name] = getattr(self, name).to_arrow()
+        return pyarrow.table(columns)
+
+
+class _RowBuffer:
+    __slots__ = ('table', 'size', 'record', 'field', 'record_ids', 'tag', 'ind1', 'ind2', 'code', 'value')
+
+    def __init__(self, table: SubfieldTable, size = 1024) -> None:
+        # Rows are gathered in plain lists and moved into the table's arrays
+        # a batch of records at a time, one extend per column.
+        self.table = table
+        self.size = size
+        self.record = []
+        self.field = []
+        self.record_ids = []
+        self.tag = []
+        self.ind1 = []
+        self.ind2 = []
+        self.code = []
+        self.value = []
+
+    def end_record(self, record_id: bytes):
+        self.record_ids.append(record_id)
+        if len(self.record_ids) >= self.size:
+            self.flush()
+
+    def flush(self):
+        for name in _RowBuffer.__slots__[2:]:
+            rows = getattr(self, name)
+            getattr(self.table, name).extend(rows)
+            rows.clear()
+
+
+def _split_subfields(field_bytes, codes: list, values: list) -> int:
+    # Same delimiter handling as MarcStreamReader's data field parser, for
+    # the fields the fast path in _append_iso_record leaves alone.
+    parts = field_bytes[2:].split(US)
+    parts_len = len(parts)
+    count = 0
+
+    i = 1
+    while i < parts_len:
+        part = parts[i]
+        i += 1
+
+        if len(part) == 0:
+            if i >= parts_len:
+                raise Exception("Unexpected end of data field")
+
+            code = US
+            part = parts[i]
+            i += 1
+            start = 0
+        else:
+            code = part[0:1]
+            if code == FT:
+                continue
+
+            start = 1
+
+        end = part.find(FT, start)
+        if end < 0:
+            if i >= parts_len:
+                raise Exception('Subfield not terminated')
+            end = len(part)
+
+        codes.append(code)
+        values.append(part[start:end])
+        count += 1
+
+    return count
+
+
+def _field_contents(rec, encoding: str):
+    # Returns the record's tags and its fields without their terminators,
+    # transcoded to UTF-8, in the order MarcStreamReader reads them.
+    base = int(rec[12:17])
+    size = (base - 25) // 12
+    directory = rec[24:24 + size * 12].decode('iso8859-1')
+    pos = 24 + size * 12
+    if rec[pos:pos + 1] != FT:
+        raise Exception("Expected field terminator at end of directory")
+    pos += 1
+
+    entries = range(0, size * 12, 12)
+    tags = [directory[i:i + 3] for i in entries]
+    lengths = [int(directory[i + 3:i + 7]) for i in entries]
+    starts = [int(directory[i + 7:i + 12]) for i in entries]
+
+    if starts != sorted(starts):
+        order = sorted(range(size), key=lambda i : starts[i])
+        tags = [tags[i] for i in order]
+        lengths = [lengths[i] for i in order]
+
+    end = pos + sum(lengths)
+    if rec[end:end + 1] != RT:
+        raise Exception("Expected record terminator at the end of record")
+
+    data = bytes(rec[pos:end])
+    if encoding == 'utf-8':
+        # Values are copied without being decoded, so check they are valid
+        # UTF-8 once per record.
+        str(data, 'utf-8')
+
+    contents = data.split(FT)
+    if len(contents) == size + 1 and [len(field) + 1 for field in contents[:-1]] == lengths:
+        if encoding != 'utf-8' and not data.isascii():
+            # The delimiters are ASCII, so the transcoded fields split the same.
+            contents = data.decode(encoding).encode('utf-8').split(FT)
+        contents.pop()
+        return tags, contents
+
+    # A field terminator inside a field, cut the fields out one by one.
+    contents = []
+    pos = 0
+    for length in lengths:
+        field_bytes = data[pos:pos + length]
+        pos += length
+        if field_bytes[-1:] != FT:
+            raise Exception("Expected field terminator at the end of field")
+
+        if encoding != 'utf-8':
+            field_bytes = field_bytes.decode(encoding).encode('utf-8')
+        contents.append(field_bytes[:-1])
+
+    return tags, contents
+
+
+def _append_iso_record(rows: _RowBuffer, record_n: int, rec, encoding: str):
+    tags, contents = _field_contents(rec, encoding)
+    counts = []
+    ind1s = []
+    ind2s = []
+    codes = rows.code
+    values = rows.value
+    record_id = b''
+    row_count = len(values)
+
+    for tag, field_bytes in zip(tags, contents):
+        if tag < '010':
+            if tag == '001' and len(record_id) == 0:
+                record_id = field_bytes
+
+            counts.append(1)
+            ind1s.append(b'')
+            ind2s.append(b'')
+            codes.append(b'')
+            values.append(field_bytes)
+            continue
+
+        parts = field_bytes.split(US)
+        indicators = parts[0]
+        del parts[0]
+
+        if FT not in field_bytes and b'' not in parts:
+            codes.extend([part[0:1] for part in parts])
+            values.extend([part[1:] for part in parts])
+            counts.append(len(parts))
+        else:
+            counts.append(_split_subfields(field_bytes + FT, codes, values))
+
+        if indicators[0:2].isascii():
+            ind1s.append(indicators[0:1])
+            ind2s.append(indicators[1:2])
+        else:
+            indicators = field_bytes.decode('utf-8')
+            ind1s.append(indicators[0:1].encode('utf-8'))
+            ind2s.append(indicators[1:2].encode('utf-8'))
+
+    rows.record.extend(repeat(record_n, len(values) - row_count))
+    rows.field.extend(chain.from_iterable(map(repeat, range(len(counts)), counts)))
+    rows.tag.extend(chain.from_iterable(map(repeat, [tag.encode('iso8859-1') for tag in tags], counts)))
+    rows.ind1.extend(chain.from_iterable(map(repeat, ind1s, counts)))
+    rows.ind2.extend(chain.from_iterable(map(repeat, ind2s, counts)))
+    rows.end_record(record_id)
+
+
+def columnar_from_marc_stream(f, force_utf8_encoding = False) -> SubfieldTable:
+    table = SubfieldTable()
+    rows = _RowBuffer(table)
+    record_n = 0
+
+    # Only the record framing is shared with MarcStreamReader, fields are
+    # cut straight out of the raw bytes without building a Record.
+    reader = MarcStreamReader(f, force_utf8_encoding, streaming=True)
+    while True:
+        rec = reader._read_next_bytes()
+        if rec is None:
+            break
+
+        encoding = 'utf-8' if rec[9:10] == b'a' or force_utf8_encoding else 'iso8859-1'
+        _append_iso_record(rows, record_n, rec, encoding)
+        record_n += 1
+
+    rows.flush()
+    return table
+
+
+def _local_name(tag: str) -> str:
+    return tag[tag.index('}') + 1:] if tag.startswith('{') else tag
+
+
+def _text(elem: ET.Element) -> bytes:
+    return b'' if elem.text is None else elem.text.encode('utf-8')
+
+
+def columnar_from_marc_xml(f) -> SubfieldTable:
+    table = SubfieldTable()
+    rows = _RowBuffer(table)
+    record_n = 0
+    root = None
+
+    for event, elem in ET.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        if _local_name(elem.tag) != 'record':
+            continue
+
+        record_id = b''
+        field_n = 0
+        for field_tag in elem:
+            name = _local_name(field_tag.tag)
+
+            if name == 'controlfield':
+                value = _text(field_tag)
+                if field_tag.attrib['tag'] == '001' and len(record_id) == 0:
+                    record_id = value
+
+                rows.record.append(record_n)
+                rows.field.append(field_n)
+                rows.tag.append(field_tag.attrib['tag'].encode('utf-8'))
+                rows.ind1.append(b'')
+                rows.ind2.append(b'')
+                rows.code.append(b'')
+                rows.value.append(value)
+            elif name == 'datafield':
+                tag = field_tag.attrib['tag'].encode('utf-8')
+                ind1 = field_tag.attrib['ind1'].encode('utf-8')
+                ind2 = field_tag.attrib['ind2'].encode('utf-8')
+
+                for subfield_tag in field_tag:
+                    if _local_name(subfield_tag.tag) != 'subfield':
+                        continue
+
+                    rows.record.append(record_n)
+                    rows.field.append(field_n)
+                    rows.tag.append(tag)
+                    rows.ind1.append(ind1)
+                    rows.ind2.append(ind2)
+                    rows.code.append(subfield_tag.attrib['code'].encode('utf-8'))
+                    rows.value.append(_text(subfield_tag))
+            else:
+                continue
+
+            field_n += 1
+
+        rows.end_record(record_id)
+        record_n += 1
+        root.clear()
+
+    rows.flush()
+    return table
+
+
+def columnar_from_path(path: str, in_format: str | None = None, force_utf8_encoding = False) -> SubfieldTable:
+    in_format = in_format if in_format is not None else detect_format(path)
+    if in_format == 'iso':
+        with open_path(path, "rb", buffering=1024 * 1024) as f:
+            return columnar_from_marc_stream(f, force_utf8_encoding)
+    elif in_format == 'xml':
+        with open_path(path, "rb") as f:
+            return columnar_from_marc_xml(f)
+
+    raise Exception(f"Columnar export does not support {in_format} input")
\ No newline at end of file
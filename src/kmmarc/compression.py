@@ -0,0 +1,130 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+
+_OPENERS = {
+    'gzip': lambda path, mode : gzip.open(path, mode, compresslevel=6),
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+
+def compression_from_extension(path: str) -> str | None:
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def strip_compression_extension(path: str) -> str:
+    # "records.mrc.gz" -> "records.mrc", for format detection.
+    root, extension = os.path.splitext(path)
+    return root if extension.lower() in COMPRESSION_EXTENSIONS else path
+
+
+def detect_compression(path: str) -> str | None:
+    # Existing files are recognized by their magic bytes, whatever their name.
+    if not os.path.isfile(path):
+        return compression_from_extension(path)
+
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+class _ThreadedDecompressor(io.RawIOBase):
+    def __init__(self, f, chunk_size = 1024 * 1024, depth = 8) -> None:
+        # A thread keeps up to depth decompressed chunks ready, zlib, bz2 and
+        # lzma all release the GIL, so decompressing overlaps with parsing.
+        super().__init__()
+        self.__queue = queue.Queue(depth)
+        self.__stop = threading.Event()
+        self.__chunk = memoryview(b'')
+        self.__eof = False
+        self.__thread = threading.Thread(target=self.__run, args=(f, chunk_size), daemon=True)
+        self.__thread.start()
+
+    def __put(self, item) -> bool:
+        while not self.__stop.is_set():
+            try:
+                self.__queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __run(self, f, chunk_size: int):
+        try:
+            with f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not self.__put(chunk) or len(chunk) == 0:
+                        return
+        except BaseException as e:
+            self.__put(e)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if len(self.__chunk) == 0:
+            if self.__eof:
+                return 0
+
+            item = self.__queue.get()
+            if isinstance(item, BaseException):
+                self.__eof = True
+                raise item
+            if len(item) == 0:
+                self.__eof = True
+                return 0
+            self.__chunk = memoryview(item)
+
+        size = min(len(b), len(self.__chunk))
+        b[:size] = self.__chunk[:size]
+        self.__chunk = self.__chunk[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.__stop.set()
+            self.__thread.join()
+        super().close()
+
+
+def open_path(path: str, mode = "rb", encoding: str | None = None, buffering = -1, threaded = True):
+    # open() that reads and writes gzip, bz2 and xz transparently. Reads
+    # detect compression from the file's content, writes from the extension.
+    writing = 'w' in mode or 'a' in mode or 'x' in mode
+    compression = compression_from_extension(path) if writing else detect_compression(path)
+    if compression is None:
+        return open(path, mode, buffering=buffering, encoding=encoding)
+
+    binary_mode = mode.replace('t', '').replace('b', '') + 'b'
+    f = _OPENERS[compression](path, binary_mode)
+    if not writing and threaded:
+        f = io.BufferedReader(_ThreadedDecompressor(f), buffering if buffering > 1 else io.DEFAULT_BUFFER_SIZE)
+
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f, encoding=encoding)
+
+
+def is_compressed(path: str) -> bool:
+    return detect_compression(path) is not None
\ No newline at end of file
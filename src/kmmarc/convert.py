@@ -0,0 +1,143 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from kmmarc.reader import (
+    MarcJsonLinesReader, read_marc_json_from_path, read_marc_json_lines_from_path, read_marc_yaml_from_path, read_marc_xml_from_path,
+    split_marc_json_lines, _read_marc_stream_chunk, _iter_marc_stream_byte_chunks, _parse_marc_stream_bytes, _split_marc_stream_chunks
+)
+from kmmarc.compression import open_path, is_compressed, strip_compression_extension
+from kmmarc.writer import MarcJsonWriter, MarcJsonLinesWriter, MarcYamlWriter, MarcXmlWriter, MarcStreamWriter
+
+FORMAT_EXTENSIONS = {
+    '.mrc': 'iso',
+    '.iso': 'iso',
+    '.xml': 'xml',
+    '.json': 'json',
+    '.jsonl': 'jsonl',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+}
+
+WRITERS = {
+    'iso': MarcStreamWriter,
+    'xml': MarcXmlWriter,
+    'json': MarcJsonWriter,
+    'jsonl': MarcJsonLinesWriter,
+    'yaml': MarcYamlWriter,
+}
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(strip_compression_extension(path))[1].lower()
+    if extension not in FORMAT_EXTENSIONS:
+        raise Exception(f"Cannot detect MARC format of {path}")
+    return FORMAT_EXTENSIONS[extension]
+
+
+def _read_chunk(in_format: str, path: str, chunk, force_utf8_encoding = False):
+    if isinstance(chunk, bytes):
+        return _parse_marc_stream_bytes(chunk, force_utf8_encoding)
+
+    start, end = chunk
+    if in_format == 'iso':
+        return _read_marc_stream_chunk(path, start, end, force_utf8_encoding)
+
+    with open(path, "rb") as f:
+        return list(MarcJsonLinesReader(f, start, end))
+
+
+def _convert_chunk(in_format: str, path: str | None, chunk, writer_format: str, writer_options: dict, force_utf8_encoding = False):
+    # Splittable inputs are read by the worker itself and compressed ISO 2709
+    # arrives as raw records. Anything else arrives as a batch of records
+    # that were parsed in the parent.
+    records = _read_chunk(in_format, path, chunk, force_utf8_encoding) if path is not None else chunk
+    writer = WRITERS[writer_format](None, **writer_options)
+    return [writer._serialize(record) for record in records]
+
+
+def _iter_batches(records, batch_size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if len(batch) > 0:
+        yield batch
+
+
+def _iter_chunks(in_format: str, path: str, chunk_size: int, batch_size: int):
+    compressed = is_compressed(path)
+    if in_format == 'iso' and compressed:
+        # Records are cut out of the decompressed stream here and parsed in
+        # the workers.
+        for chunk in _iter_marc_stream_byte_chunks(path, chunk_size):
+            yield path, chunk
+    elif in_format == 'iso':
+        for chunk in _split_marc_stream_chunks(path, chunk_size):
+            yield path, chunk
+    elif in_format == 'jsonl' and compressed:
+        for batch in _iter_batches(read_marc_json_lines_from_path(path), batch_size):
+            yield None, batch
+    elif in_format == 'jsonl':
+        count = max(1, -(-os.path.getsize(path) // chunk_size))
+        for chunk in split_marc_json_lines(path, count):
+            yield path, chunk
+    else:
+        readers = {
+            'xml': read_marc_xml_from_path,
+            'json': read_marc_json_from_path,
+            'yaml': read_marc_yaml_from_path,
+        }
+        for batch in _iter_batches(readers[in_format](path), batch_size):
+            yield None, batch
+
+
+def convert(in_path: str, out_path: str, in_format: str | None = None, out_format: str | None = None, workers: int | None = None, chunk_size = 4 * 1024 * 1024, batch_size = 1000, writer_options: dict | None = None, force_utf8_encoding = False):
+    in_format = in_format if in_format is not None else detect_format(in_path)
+    out_format = out_format if out_format is not None else detect_format(out_path)
+    writer_options = {} if writer_options is None else writer_options
+    workers = workers if workers is not None else os.cpu_count() or 1
+
+    if in_format not in WRITERS:
+        raise Exception(f"Unknown input format {in_format}")
+    if out_format not in WRITERS:
+        raise Exception(f"Unknown output format {out_format}")
+
+    max_pending = workers * 2
+    count = 0
+
+    if out_format == 'iso':
+        out = open_path(out_path, "wb")
+    else:
+        out = open_path(out_path, "w", encoding="utf-8")
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        out_options = {'buffer_size': 1024 * 1024, **writer_options} if out_format == 'iso' else writer_options
+        writer = WRITERS[out_format](out, **out_options)
+
+        def write_fragments(future):
+            nonlocal count
+            for fragment in future.result():
+                writer._write_serialized(fragment)
+                count += 1
+
+        # Workers parse and serialize chunks while this process writes the
+        # finished ones out in input order.
+        pending = deque()
+        for path, chunk in _iter_chunks(in_format, in_path, chunk_size, batch_size):
+            pending.append(executor.submit(_convert_chunk, in_format, path, chunk, out_format, writer_options, force_utf8_encoding))
+            if len(pending) >= max_pending:
+                write_fragments(pending.popleft())
+
+        while pending:
+            write_fragments(pending.popleft())
+
+        writer._finish()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        out.close()
+
+    return count
\ No newline at end of file
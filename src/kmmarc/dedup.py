@@ -0,0 +1,186 @@
+import hashlib
+import sqlite3
+import unicodedata
+from kmmarc.marc import Record, ControlField, PackedDataField
+
+DEFAULT_IGNORED_TAGS = ('001', '003', '005')
+
+
+def normalize(value: str | None) -> str:
+    # Case, accents, punctuation and spacing differ between catalogs that
+    # hold the same record, so only the letters and digits are kept.
+    if value is None:
+        return ''
+
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join([c for c in decomposed if c.isalnum()]).casefold()
+
+
+def parse_key(spec: str | list[str]) -> list[tuple[str, str | None]]:
+    # "010$a+200$a+700$a" or ["010$a", "200$a", "700$a"]; a bare tag uses
+    # the whole field.
+    parts = spec.split('+') if isinstance(spec, str) else spec
+    key = []
+    for part in parts:
+        tag, _, code = part.strip().partition('$')
+        if len(tag) != 3:
+            raise Exception(f"Invalid key part {part}")
+        key.append((tag, code if len(code) > 0 else None))
+    return key
+
+
+def _subfields(field):
+    if isinstance(field, PackedDataField):
+        return zip(field.codes, field.values)
+    return ((subfield.code, subfield.data) for subfield in field.subfields)
+
+
+def _field_values(field, code: str | None):
+    if isinstance(field, ControlField):
+        return [field.data] if code is None else []
+
+    return [value for subfield_code, value in _subfields(field) if code is None or subfield_code == code]
+
+
+def fingerprint(record: Record, key: str | list[str] | list[tuple[str, str | None]] | None = None, normalizer = normalize, ignored_tags = DEFAULT_IGNORED_TAGS) -> bytes | None:
+    digest = hashlib.blake2b(digest_size=16)
+
+    if key is None:
+        # The whole record, in tag order, without the fields that only
+        # identify a copy in one catalog.
+        for field in record.get_fields(sorted=True):
+            if field.tag in ignored_tags:
+                continue
+
+            digest.update(field.tag.encode('utf-8'))
+            if isinstance(field, ControlField):
+                digest.update(b'\x1e' + normalizer(field.data).encode('utf-8'))
+            else:
+                for code, value in _subfields(field):
+                    digest.update(b'\x1f' + code.encode('utf-8') + normalizer(value).encode('utf-8'))
+            digest.update(b'\x1d')
+
+        return digest.digest()
+
+    if isinstance(key, str) or any(isinstance(part, str) for part in key):
+        key = parse_key(key)
+
+    found = False
+    for tag, code in key:
+        fields = record[tag] or []
+        for field in fields:
+            for value in _field_values(field, code):
+                value = normalizer(value)
+                if len(value) > 0:
+                    found = True
+                    digest.update(b'\x1f' + value.encode('utf-8'))
+        digest.update(b'\x1e')
+
+    # Records with nothing in any key part cannot be told apart, so they
+    # are not fingerprinted at all.
+    return digest.digest() if found else None
+
+
+def _record_id(record: Record, n: int) -> str:
+    control_number = record['001']
+    if control_number is not None and control_number[0].data is not None:
+        return control_number[0].data
+    return str(n)
+
+
+class DuplicateIndex:
+    def __init__(self, path: str = ":memory:", key: str | list[str] | None = None, normalizer = normalize, ignored_tags = DEFAULT_IGNORED_TAGS) -> None:
+        self.key = parse_key(key) if key is not None else None
+        self.normalizer = normalizer
+        self.ignored_tags = ignored_tags
+
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE IF NOT EXISTS fingerprints (hash BLOB NOT NULL, record_id TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS fingerprints_hash ON fingerprints (hash)")
+        self.db.commit()
+        self.__count = self.db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def fingerprint(self, record: Record) -> bytes | None:
+        return fingerprint(record, self.key, self.normalizer, self.ignored_tags)
+
+    def add(self, record: Record, record_id: str | None = None) -> list[str]:
+        # Returns the ids already indexed with the same fingerprint.
+        digest = self.fingerprint(record)
+        record_id = record_id if record_id is not None else _record_id(record, self.__count)
+        self.__count += 1
+        if digest is None:
+            return []
+
+        duplicates = [row[0] for row in self.db.execute("SELECT record_id FROM fingerprints WHERE hash = ?", (digest,))]
+        self.db.execute("INSERT INTO fingerprints (hash, record_id) VALUES (?, ?)", (digest, record_id))
+        return duplicates
+
+    def find_duplicates(self, records, batch_size = 1000):
+        # A single pass: each batch is looked up and inserted with one query
+        # and one executemany, yielding (record_id, earlier duplicate ids).
+        batch = []
+        for record in records:
+            digest = self.fingerprint(record)
+            record_id = _record_id(record, self.__count)
+            self.__count += 1
+            if digest is not None:
+                batch.append((digest, record_id))
+
+            if len(batch) >= batch_size:
+                yield from self.__add_batch(batch)
+                batch = []
+
+        if len(batch) > 0:
+            yield from self.__add_batch(batch)
+
+        self.db.commit()
+
+    def __add_batch(self, batch: list[tuple[bytes, str]]):
+        seen: dict[bytes, list[str]] = {}
+        digests = list({digest for digest, _ in batch})
+        for i in range(0, len(digests), 500):
+            chunk = digests[i:i + 500]
+            query = f"SELECT hash, record_id FROM fingerprints WHERE hash IN ({','.join(['?'] * len(chunk))})"
+            for digest, record_id in self.db.execute(query, chunk):
+                seen.setdefault(digest, []).append(record_id)
+
+        self.db.executemany("INSERT INTO fingerprints (hash, record_id) VALUES (?, ?)", batch)
+
+        for digest, record_id in batch:
+            duplicates = seen.setdefault(digest, [])
+            if len(duplicates) > 0:
+                yield record_id, list(duplicates)
+            duplicates.append(record_id)
+
+    def groups(self):
+        # Every set of record ids sharing a fingerprint.
+        query = "SELECT hash, record_id FROM fingerprints WHERE hash IN (SELECT hash FROM fingerprints GROUP BY hash HAVING COUNT(*) > 1) ORDER BY hash, rowid"
+        group_digest = None
+        group = []
+        for digest, record_id in self.db.execute(query):
+            if digest != group_digest and len(group) > 0:
+                yield group
+                group = []
+            group_digest = digest
+            group.append(record_id)
+
+        if len(group) > 0:
+            yield group
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,210 @@
+import hashlib
+import json
+from kmmarc.marc import Record, ControlField, PackedDataField, Leader
+from kmmarc.reader import MarcStreamReader, MarcMmapReader, MarcJsonLinesReader
+from kmmarc.writer import MarcJsonWriter
+from kmmarc.convert import WRITERS, detect_format
+from kmmarc.compression import open_path, is_compressed
+
+
+def _control_number(record: Record, n: int) -> str:
+    control_number = record['001']
+    if control_number is None or control_number[0].data is None:
+        raise Exception(f"Record {n} has no 001")
+    return control_number[0].data
+
+
+def _field_key(field):
+    if isinstance(field, ControlField):
+        return field.data
+    if isinstance(field, PackedDataField):
+        return (field.ind1, field.ind2, field.codes, tuple(field.values))
+    return (field.ind1, field.ind2, ''.join(subfield.code for subfield in field.subfields), tuple(subfield.data for subfield in field.subfields))
+
+
+def _fields_by_tag(record: Record) -> dict[str, list]:
+    fields = {}
+    for field in record:
+        fields.setdefault(field.tag, []).append(field)
+    return fields
+
+
+def _leader_content(leader: Leader) -> str:
+    # Length and base address follow from the fields.
+    leader_str = leader.marshal()
+    return leader_str[5:12] + leader_str[17:24]
+
+
+_json_writer = MarcJsonWriter(None)
+_json_reader = MarcJsonLinesReader(None)
+
+
+def _field_objs(leader: Leader, fields: list) -> list:
+    record = Record(leader.marshal())
+    for field in fields:
+        record.add_field(field)
+    return _json_writer._write_format1(record)['fields']
+
+
+def diff_records(old: Record, new: Record) -> dict | None:
+    # Every tag whose fields differ, with the old and new fields of that tag
+    # in MarcJsonWriter's layout. None when the records hold the same data.
+    changes = {}
+    if _leader_content(old.leader) != _leader_content(new.leader):
+        changes['leader'] = {'old': old.leader.marshal(), 'new': new.leader.marshal()}
+
+    old_fields = _fields_by_tag(old)
+    new_fields = _fields_by_tag(new)
+    fields = {}
+    for tag in sorted(old_fields.keys() | new_fields.keys()):
+        old_tag_fields = old_fields.get(tag, [])
+        new_tag_fields = new_fields.get(tag, [])
+        if [_field_key(field) for field in old_tag_fields] != [_field_key(field) for field in new_tag_fields]:
+            fields[tag] = {'old': _field_objs(old.leader, old_tag_fields), 'new': _field_objs(new.leader, new_tag_fields)}
+
+    if len(fields) > 0:
+        changes['fields'] = fields
+
+    return changes if len(changes) > 0 else None
+
+
+def diff_marc_streams(old_path: str, new_path: str, force_utf8_encoding = False):
+    # The old dump is memory mapped and indexed as 001 -> (digest, record
+    # number), the new one is streamed. Only records whose bytes differ are
+    # parsed in full and compared field by field.
+    if is_compressed(old_path):
+        raise Exception(f"The old dump is memory mapped and cannot be compressed: {old_path}")
+
+    with open(old_path, "rb") as old_f, MarcMmapReader(old_f, force_utf8_encoding, lazy=True) as old_reader:
+        old_index: dict[str, tuple[bytes, int]] = {}
+        for n in range(len(old_reader)):
+            rec = old_reader.record_bytes(n)
+            digest = hashlib.blake2b(rec, digest_size=16).digest()
+            record_id = _control_number(old_reader._parse_record(rec.tobytes()), n)
+            rec.release()
+            if record_id in old_index:
+                raise Exception(f"Duplicate 001 {record_id} in {old_path}")
+            old_index[record_id] = (digest, n)
+
+        seen = set()
+        with open_path(new_path, "rb", buffering=1024 * 1024) as new_f:
+            new_reader = MarcStreamReader(new_f, force_utf8_encoding, streaming=True, lazy=True)
+            n = 0
+            while True:
+                rec = new_reader._read_next_bytes()
+                if rec is None:
+                    break
+
+                new = new_reader._parse_record(rec)
+                record_id = _control_number(new, n)
+                n += 1
+                if record_id in seen:
+                    raise Exception(f"Duplicate 001 {record_id} in {new_path}")
+                seen.add(record_id)
+
+                if record_id not in old_index:
+                    yield {'op': 'added', 'id': record_id, 'record': _json_writer._write_format1(new)}
+                    continue
+
+                digest, old_n = old_index[record_id]
+                if digest == hashlib.blake2b(rec, digest_size=16).digest():
+                    continue
+
+                changes = diff_records(old_reader[old_n], new)
+                if changes is not None:
+                    yield {'op': 'modified', 'id': record_id, **changes}
+
+        removed = sorted((old_n, record_id) for record_id, (_, old_n) in old_index.items() if record_id not in seen)
+        for _, record_id in removed:
+            yield {'op': 'removed', 'id': record_id}
+
+
+def write_change_set(path: str, changes) -> dict[str, int]:
+    counts = {'added': 0, 'removed': 0, 'modified': 0}
+    with open_path(path, "w", encoding="utf-8") as f:
+        for change in changes:
+            f.write(json.dumps(change, ensure_ascii=False))
+            f.write('\n')
+            counts[change['op']] += 1
+    return counts
+
+
+def read_change_set(path: str):
+    with open_path(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if len(line.strip()) > 0:
+                yield json.loads(line)
+
+
+def apply_changes(record: Record, change: dict) -> Record:
+    if 'leader' in change:
+        record.leader = Leader(change['leader']['new'])
+
+    for tag, tag_change in change.get('fields', {}).items():
+        new_fields = _json_reader._read_record({'leader': record.leader.marshal(), 'fields': tag_change['new']}).get_fields()
+
+        # The new fields take the place of the old ones, or go after the
+        # last field with a lower tag.
+        fields = record.control_fields if tag < '010' else record.data_fields
+        at = next((i for i, field in enumerate(fields) if field.tag == tag), None)
+        if at is None:
+            at = max((i + 1 for i, field in enumerate(fields) if field.tag < tag), default=0)
+
+        fields[:] = [field for field in fields[:at] if field.tag != tag] + new_fields + [field for field in fields[at:] if field.tag != tag]
+
+    return record
+
+
+def apply_change_set(records, changes):
+    # Patches a stream of base records. Changes are held by 001, removed and
+    # modified records are dropped or patched as they pass and added records
+    # come last.
+    added = {}
+    pending = {}
+    for change in changes:
+        if change['op'] == 'added':
+            added[change['id']] = change
+        elif change['op'] in ('removed', 'modified'):
+            pending[change['id']] = change
+        else:
+            raise Exception(f"Unknown change {change['op']}")
+
+    for n, record in enumerate(records):
+        record_id = _control_number(record, n)
+        if record_id in added:
+            # Adding a record the base already has replaces it.
+            continue
+
+        change = pending.pop(record_id, None)
+        if change is None:
+            yield record
+        elif change['op'] == 'modified':
+            yield apply_changes(record, change)
+
+    for change in pending.values():
+        if change['op'] == 'modified':
+            raise Exception(f"Modified record {change['id']} is not in the base records")
+
+    for change in added.values():
+        yield _json_reader._read_record(change['record'])
+
+
+def patch_marc_stream(base_path: str, changes_path: str, out_path: str, out_format: str | None = None, writer_options: dict | None = None, force_utf8_encoding = False) -> int:
+    out_format = out_format if out_format is not None else detect_format(out_path)
+    writer_options = {} if writer_options is None else writer_options
+    if out_format not in WRITERS:
+        raise Exception(f"Unknown output format {out_format}")
+
+    count = 0
+    out_mode, out_encoding = ("wb", None) if out_format == 'iso' else ("w", "utf-8")
+
+    with open_path(base_path, "rb", buffering=1024 * 1024) as base, open_path(out_path, out_mode, encoding=out_encoding) as out:
+        out_options = {'buffer_size': 1024 * 1024, **writer_options} if out_format == 'iso' else writer_options
+        writer = WRITERS[out_format](out, **out_options)
+        records = MarcStreamReader(base, force_utf8_encoding, streaming=True)
+        for record in apply_change_set(records, read_change_set(changes_path)):
+            writer._write_serialized(writer._serialize(record))
+            count += 1
+        writer._finish()
+
+    return count
\ No newline at end of file
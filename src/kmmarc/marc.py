@@ -1,8 +1,116 @@
+from array import array
+from copy import deepcopy
+from operator import attrgetter
+from kmmarc.constants import *
+
+
+class _IndexedList(list):
+    # A list that keeps a key -> items index and a sorted copy of itself.
+    # Both live on the list and every method that changes it drops them, so
+    # they cannot go stale however the list is changed. They are rebuilt on
+    # the next lookup, appends keep a built index up to date. The slots stay
+    # unset until then, so making one costs no more than making a list.
+    __slots__ = ('_index', '_sorted')
+
+    _key = None
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+    def _changed(self):
+        self._index = None
+        self._sorted = None
+
+    def _lookup(self) -> dict:
+        index = getattr(self, '_index', None)
+        if index is None:
+            index = {}
+            key = self._key
+            for item in self:
+                index.setdefault(key(item), []).append(item)
+            self._index = index
+        return index
+
+    def _in_order(self) -> list:
+        res = getattr(self, '_sorted', None)
+        if res is None:
+            res = self._sorted = sorted(self, key=self._key)
+        return res
+
+    def append(self, item):
+        list.append(self, item)
+        index = getattr(self, '_index', None)
+        if index is not None:
+            index.setdefault(self._key(item), []).append(item)
+        self._sorted = None
+
+    def extend(self, items):
+        list.extend(self, items)
+        self._changed()
+
+    def insert(self, i, item):
+        list.insert(self, i, item)
+        self._changed()
+
+    def remove(self, item):
+        list.remove(self, item)
+        self._changed()
+
+    def pop(self, i = -1):
+        item = list.pop(self, i)
+        self._changed()
+        return item
+
+    def clear(self):
+        list.clear(self)
+        self._changed()
+
+    def sort(self, *, key = None, reverse = False):
+        list.sort(self, key=key, reverse=reverse)
+        self._changed()
+
+    def reverse(self):
+        list.reverse(self)
+        self._changed()
+
+    def __setitem__(self, i, value):
+        list.__setitem__(self, i, value)
+        self._changed()
+
+    def __delitem__(self, i):
+        list.__delitem__(self, i)
+        self._changed()
+
+    def __iadd__(self, items):
+        list.extend(self, items)
+        self._changed()
+        return self
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self._changed()
+        return self
+
+
+class _FieldList(_IndexedList):
+    __slots__ = ()
+    _key = attrgetter('tag')
+
+
+class _SubFieldList(_IndexedList):
+    __slots__ = ()
+    _key = attrgetter('code')
+
+
 class VariableField:
+    __slots__ = ('tag',)
+
     def __init__(self, tag: str) -> None:
         self.tag = tag
 
 class ControlField(VariableField):
+    __slots__ = ('data',)
+
     def __init__(self, tag: str, data: str) -> None:
         super().__init__(tag)
         self.data = data
@@ -11,6 +119,8 @@ class ControlField(VariableField):
         return f"{self.tag} {self.data}"
 
 class SubField:
+    __slots__ = ('code', 'data')
+
     def __init__(self, code: str, data: str) -> None:
         self.code = code
         self.data = data
@@ -20,27 +130,34 @@ class SubField:
 
 
 class DataField(VariableField):
-    def __init__(self, tag: str, ind1: str, ind2: str) -> None:
+    __slots__ = ('ind1', 'ind2', '__subfields')
+
+    def __init__(self, tag: str, ind1: str, ind2: str, subfields: list[SubField] = ()) -> None:
         super().__init__(tag)
         self.ind1 = ind1
         self.ind2 = ind2
-        self.subfields: list[SubField] = []
+        self.__subfields = _SubFieldList(subfields)
+
+    @property
+    def subfields(self) -> list[SubField]:
+        return self.__subfields
+
+    @subfields.setter
+    def subfields(self, subfields: list[SubField]):
+        self.__subfields = subfields if isinstance(subfields, _SubFieldList) else _SubFieldList(subfields)
+
+    def add_subfield(self, subfield: SubField):
+        self.__subfields.append(subfield)
+
+    def remove_subfield(self, subfield: SubField):
+        self.__subfields.remove(subfield)
 
     def __getitem__(self, key) -> list[SubField] | None:
-        res = []
-        
-        for subfield in self.subfields:
-            if subfield.code == key:
-                res.append(subfield)
-        
-        return res if len(res) > 0 else None 
+        res = self.__subfields._lookup().get(key)
+        return list(res) if res is not None else None
 
     def __contains__(self, key) -> bool:
-        for subfield in self.subfields:
-            if subfield.code == key:
-                return True
-
-        return False
+        return key in self.__subfields._lookup()
 
     def __str__(self) -> str:
         res = f"{self.tag} {self.ind1}{self.ind2}"
@@ -49,62 +166,188 @@ class DataField(VariableField):
         return res
 
 
+    def pack(self) -> 'PackedDataField':
+        return PackedDataField(self.tag, self.ind1, self.ind2, ''.join(subfield.code for subfield in self.subfields), [subfield.data for subfield in self.subfields])
+
+
+class PackedDataField(DataField):
+    # Keeps subfields as a string of one-character codes plus a parallel list
+    # of values instead of one SubField object each. SubField objects are only
+    # created on access, so subfields is read-only here.
+    __slots__ = ('codes', 'values')
+
+    def __init__(self, tag: str, ind1: str, ind2: str, codes: str = '', values: list[str] | None = None) -> None:
+        VariableField.__init__(self, tag)
+        self.ind1 = ind1
+        self.ind2 = ind2
+        self.codes = codes
+        self.values: list[str] = [] if values is None else values
+
+    @property
+    def subfields(self) -> tuple[SubField, ...]:
+        return tuple(SubField(code, data) for code, data in zip(self.codes, self.values))
+
+    def add_subfield(self, subfield: SubField):
+        if len(subfield.code) != 1:
+            raise Exception("Packed subfield codes must be a single character")
+
+        self.codes += subfield.code
+        self.values.append(subfield.data)
+
+    def remove_subfield(self, subfield: SubField):
+        for i, code in enumerate(self.codes):
+            if code == subfield.code and self.values[i] == subfield.data:
+                self.codes = self.codes[:i] + self.codes[i + 1:]
+                del self.values[i]
+                return
+
+        raise ValueError("subfield not in field")
+
+    def __getitem__(self, key) -> list[SubField] | None:
+        res = [SubField(code, data) for code, data in zip(self.codes, self.values) if code == key]
+        return res if len(res) > 0 else None
+
+    def __contains__(self, key) -> bool:
+        return len(key) == 1 and key in self.codes
+
+    def __reduce__(self):
+        return (PackedDataField, (self.tag, self.ind1, self.ind2, self.codes, self.values))
+
+    def unpack(self) -> DataField:
+        field = DataField(self.tag, self.ind1, self.ind2)
+        field.subfields.extend(self.subfields)
+        return field
+
+    def pack(self) -> 'PackedDataField':
+        return self
+
+class _LeaderPosition:
+    __slots__ = ('start', 'end', 'number')
+
+    def __init__(self, start: int, end: int, number = False) -> None:
+        self.start = start
+        self.end = end
+        self.number = number
+
+    def __get__(self, leader, owner = None):
+        if leader is None:
+            return self
+
+        value = leader.raw[self.start:self.end]
+        return int(value) if self.number else value.decode('iso8859-1')
+
+    def __set__(self, leader, value):
+        width = self.end - self.start
+        encoded = b'%0*d' % (width, value) if self.number else value.encode('iso8859-1')
+        if len(encoded) != width:
+            raise Exception(f"Leader positions {self.start}-{self.end - 1} hold {width} characters, got {value!r}")
+        leader.raw[self.start:self.end] = encoded
+
+
 class Leader:
-    def __init__(self, leader_str: str | None = None) -> None:
-        self.record_length = 0
-        self.record_status: str = ' '
-        self.type_of_record: str = ' '
-        self.impl_defined1 = []
-        self.char_coding_scheme = []
-        self.indicator_count = 0
-        self.subfield_length = 0
-        self.base_address_of_data = 0
-        self.impl_defined2 = []
-        self.entry_map: list[str] = []
+    # The 24 leader bytes themselves, every position is read and written in
+    # place, and marshal and the writer copy them out as they are.
+    __slots__ = ('raw',)
+
+    record_length = _LeaderPosition(0, 5, number=True)
+    record_status = _LeaderPosition(5, 6)
+    type_of_record = _LeaderPosition(6, 7)
+    impl_defined1 = _LeaderPosition(7, 9)
+    char_coding_scheme = _LeaderPosition(9, 10)
+    indicator_count = _LeaderPosition(10, 11, number=True)
+    subfield_length = _LeaderPosition(11, 12, number=True)
+    base_address_of_data = _LeaderPosition(12, 17, number=True)
+    impl_defined2 = _LeaderPosition(17, 20)
+    entry_map = _LeaderPosition(20, 24)
+
+    def __init__(self, leader_str: str | bytes | None = None) -> None:
+        self.raw = bytearray(b'00000     2200000   450 ')
         if leader_str is not None:
             self.unmarshal(leader_str)
 
     def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.raw[key].decode('iso8859-1')
+
         try:
             idx = int(key)
-            marshal_str = self.marshal()
-            return marshal_str[idx] if idx >= 0 and idx < len(marshal_str) else None
-        except:
+        except (TypeError, ValueError):
             return None
+        return chr(self.raw[idx]) if idx >= 0 and idx < 24 else None
 
-    def marshal(self):
-        return f"{self.record_length:05d}{self.record_status}{self.type_of_record}{''.join(self.impl_defined1)}{self.char_coding_scheme}{self.indicator_count}{self.subfield_length}{self.base_address_of_data:05d}{''.join(self.impl_defined2)}{''.join(self.entry_map)}"
-    
-    def unmarshal(self, leader_str):
-        self.record_length = int(leader_str[0:5])
-        self.record_status = leader_str[5:6]
-        self.type_of_record = leader_str[6:7]
-        self.impl_defined1 = leader_str[7:9]
-        self.char_coding_scheme = leader_str[9:10]
-        self.indicator_count = int(leader_str[10:11])
-        self.subfield_length = int(leader_str[11:12])
-        self.base_address_of_data = int(leader_str[12:17])
-        self.impl_defined2 = leader_str[17:20]
-        self.entry_map = leader_str[20:24]
+    def marshal(self) -> str:
+        return self.raw.decode('iso8859-1')
+
+    def unmarshal(self, leader_str: str | bytes):
+        raw = bytearray(leader_str.encode('iso8859-1') if isinstance(leader_str, str) else leader_str)
+        if len(raw) < 24:
+            raw += b' ' * (24 - len(raw))
+
+        # The numeric positions must parse, as they always had to; int()
+        # also takes the odd space padded number.
+        if not (raw[0:5] + raw[10:17]).isdigit():
+            int(raw[0:5])
+            int(raw[10:11])
+            int(raw[11:12])
+            int(raw[12:17])
+        self.raw = raw[0:24] if len(raw) > 24 else raw
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.raw)
+
+    def __reduce__(self):
+        return (Leader, (bytes(self.raw),))
 
     def __str__(self) -> str:
         return f"=LDR {self.marshal()}"
 
 
 class Record:
-    def __init__(self, leader: Leader | str) -> None:
+    __slots__ = ('leader', '__control_fields', '__data_fields')
+
+    def __init__(self, leader: Leader | str, control_fields: list[ControlField] = (), data_fields: list[DataField] = ()) -> None:
         self.leader = leader if isinstance(leader, Leader) else Leader(leader_str=leader)
-        self.control_fields: list[ControlField] = []
-        self.data_fields: list[DataField] = []
+        self.__control_fields = _FieldList(control_fields)
+        self.__data_fields = _FieldList(data_fields)
+
+    # Fields are kept in lists that index themselves by tag, whatever list is
+    # assigned is copied into one.
+    @property
+    def control_fields(self) -> list[ControlField]:
+        return self.__control_fields
+
+    @control_fields.setter
+    def control_fields(self, fields: list[ControlField]):
+        self.__control_fields = fields if isinstance(fields, _FieldList) else _FieldList(fields)
+
+    @property
+    def data_fields(self) -> list[DataField]:
+        return self.__data_fields
+
+    @data_fields.setter
+    def data_fields(self, fields: list[DataField]):
+        self.__data_fields = fields if isinstance(fields, _FieldList) else _FieldList(fields)
+
+    def add_field(self, field: ControlField | DataField):
+        if isinstance(field, ControlField):
+            self.control_fields.append(field)
+        else:
+            self.data_fields.append(field)
+
+    def remove_field(self, field: ControlField | DataField):
+        if isinstance(field, ControlField):
+            self.control_fields.remove(field)
+        else:
+            self.data_fields.remove(field)
 
-    def get_fields(self, sorted = False):
-        return self.get_control_fields(sorted).extend(self.get_data_fields(sorted))
+    def get_fields(self, sorted = False) -> list[ControlField | DataField]:
+        return self.get_control_fields(sorted) + self.get_data_fields(sorted)
 
-    def get_control_fields(self, sorted = False):
-        return sorted(self.control_fields, key=lambda cs : cs.tag) if sorted else self.control_fields
+    def get_control_fields(self, sorted = False) -> list[ControlField]:
+        return self.control_fields._in_order() if sorted else self.control_fields
 
-    def get_data_fields(self, sorted = False):
-        return sorted(self.data_fields, key=lambda cs : cs.tag) if sorted else self.data_fields
+    def get_data_fields(self, sorted = False) -> list[DataField]:
+        return self.data_fields._in_order() if sorted else self.data_fields
 
     def __getitem__(self, key) -> list[ControlField | DataField] | None:
         if key in Record.__custom_getters:
@@ -113,34 +356,53 @@ class Record:
             except:
                 return None
 
-        res = []
-        
-        for field in self.control_fields:
-            if field.tag == key:
-                res.append(field)
-
-        for field in self.data_fields:
-            if field.tag == key:
-                res.append(field)
-        
+        res = self._find_fields(key)
         return res if len(res) > 0 else None 
+
+    def _find_fields(self, key) -> list[ControlField | DataField]:
+        res = list(self.control_fields._lookup().get(key, ()))
+        res.extend(self.data_fields._lookup().get(key, ()))
+        return res
+
+    def __iter__(self):
+        yield from self.control_fields
+        yield from self.data_fields
     
     def __contains__(self, key) -> bool:
-        for field in self.control_fields:
-            if field.tag == key:
-                return True
-            
-        for field in self.data_fields:
-            if field.tag == key:
-                return True
+        return key in self.control_fields._lookup() or key in self.data_fields._lookup()
+
+    def __reduce__(self):
+        # Pickled as a UTF-8 ISO 2709 record that comes back as a LazyRecord,
+        # which is far cheaper to send to and load in another process than
+        # every field and subfield object.
+        packed = _pack_record(self)
+        if packed is None:
+            return (_restore_record, (self.leader, list(self.control_fields), list(self.data_fields)))
+
+        return (_restore_lazy_record, (bytes(self.leader), *packed, 'utf-8'))
+
+    # The packed form is only for sending records to other processes. Copies
+    # are made slot by slot, as they are for any object, and keep the type.
+    def __copy__(self):
+        res = object.__new__(type(self))
+        for name in _slot_names(type(self)):
+            if hasattr(self, name):
+                setattr(res, name, getattr(self, name))
+        return res
 
-        return False
+    def __deepcopy__(self, memo):
+        res = object.__new__(type(self))
+        memo[id(self)] = res
+        for name in _slot_names(type(self)):
+            if hasattr(self, name):
+                setattr(res, name, deepcopy(getattr(self, name), memo))
+        return res
 
     def __str__(self) -> str:
         res = f"{self.leader}"
-        for field in sorted(self.control_fields, key=lambda cs : cs.tag):
+        for field in self.get_control_fields(sorted=True):
             res += f"\n={field}"
-        for field in sorted(self.data_fields, key=lambda sf : sf.tag):
+        for field in self.get_data_fields(sorted=True):
             res += f"\n={field}"
         return res
     
@@ -149,3 +411,208 @@ class Record:
     @staticmethod
     def register_custom_getter(name: str, getter):
         Record.__custom_getters[name] = getter
+
+
+def _slot_names(cls) -> list[str]:
+    names = []
+    for klass in cls.__mro__:
+        for name in klass.__dict__.get('__slots__', ()):
+            if name.startswith('__') and not name.endswith('__'):
+                name = f"_{klass.__name__.lstrip('_')}{name}"
+            names.append(name)
+    return names
+
+
+def _restore_record(leader: Leader, control_fields: list[ControlField], data_fields: list[DataField]) -> Record:
+    return Record(leader, control_fields, data_fields)
+
+
+def _is_tag(tag) -> bool:
+    return type(tag) is str and len(tag) == 3 and tag.isascii() and tag.isdigit()
+
+
+def _pack_record(record: Record) -> tuple[bytes, list[str], array] | None:
+    # The record as a UTF-8 ISO 2709 record, plus its directory as tags and
+    # (start, length) pairs. None when some field would not decode back the
+    # same from it, those records are pickled field by field.
+    tags = []
+    offsets = array('q')
+    directory = []
+    data = []
+    pos = 0
+
+    try:
+        for field in record.control_fields:
+            if type(field) is not ControlField or not _is_tag(field.tag) or field.tag >= '010':
+                return None
+
+            data.append(field.data.encode('utf-8') + FT)
+            tags.append(field.tag)
+            offsets.append(pos)
+            offsets.append(len(data[-1]))
+            pos += len(data[-1])
+
+        for field in record.data_fields:
+            if type(field) is not DataField or not _is_tag(field.tag) or field.tag < '010':
+                return None
+            if len(field.ind1) != 1 or len(field.ind2) != 1 or not (field.ind1 + field.ind2).isascii():
+                return None
+
+            parts = [field.ind1, field.ind2]
+            for subfield in field.subfields:
+                code = subfield.code
+                if len(code) != 1 or not code.isascii() or code == '\x1e' or '\x1f' in subfield.data or '\x1e' in subfield.data:
+                    return None
+                parts.append('\x1f')
+                parts.append(code)
+                parts.append(subfield.data)
+
+            data.append(''.join(parts).encode('utf-8') + FT)
+            tags.append(field.tag)
+            offsets.append(pos)
+            offsets.append(len(data[-1]))
+            pos += len(data[-1])
+    except (AttributeError, TypeError, UnicodeEncodeError):
+        # Fields without data, or data that is not a string.
+        return None
+
+    for i, tag in enumerate(tags):
+        directory.append(f"{tag}{offsets[i * 2 + 1]:04d}{offsets[i * 2]:05d}")
+    directory.append('\x1e')
+    directory = ''.join(directory).encode('ascii')
+
+    base = 24 + len(directory)
+    length = base + pos + 1
+    if length > 99999 or any(offsets[i] > 9999 for i in range(1, len(offsets), 2)):
+        return None
+
+    leader = bytearray(record.leader.raw)
+    leader[0:5] = b'%05d' % length
+    leader[12:17] = b'%05d' % base
+    for i in range(0, len(offsets), 2):
+        offsets[i] += base
+
+    return bytes(leader) + directory + b''.join(data) + RT, tags, offsets
+
+
+def _restore_lazy_record(leader: bytes, raw: bytes, tags: list[str], offsets: array, encoding: str, parse_field = None) -> 'LazyRecord':
+    if parse_field is None:
+        from kmmarc.reader import MarcStreamReader
+        parse_field = MarcStreamReader._parse_field
+
+    return LazyRecord(Leader(leader), raw, list(zip(tags, offsets[0::2], offsets[1::2])), encoding, parse_field)
+
+
+class LazyRecord(Record):
+    __slots__ = ('raw', 'directory', 'encoding', '__parse_field', '__fields', '__materialized', '__tags')
+
+    def __init__(self, leader: Leader | str, raw: bytes, directory: list[tuple[str, int, int]], encoding: str, parse_field) -> None:
+        self.leader = leader if isinstance(leader, Leader) else Leader(leader_str=leader)
+        self.raw = raw
+        self.directory = directory
+        self.encoding = encoding
+        self.__parse_field = parse_field
+        self.__fields: list[ControlField | DataField | None] = [None] * len(directory)
+        self.__materialized = False
+        self.__tags: dict[str, list[int]] | None = None
+
+    def __reduce__(self):
+        # Decoded fields may have been changed, so only untouched records are
+        # sent as the bytes they were read from.
+        if self.decoded:
+            return super().__reduce__()
+
+        offsets = array('q')
+        for _, start, length in self.directory:
+            offsets.append(start)
+            offsets.append(length)
+
+        return (_restore_lazy_record, (bytes(self.leader), bytes(self.raw), [entry[0] for entry in self.directory], offsets, self.encoding, self.__parse_field))
+
+    @property
+    def materialized(self) -> bool:
+        return self.__materialized
+
+    @property
+    def decoded(self) -> bool:
+        # Whether any field was handed out, and so may have been changed.
+        return self.__materialized or any(field is not None for field in self.__fields)
+
+    def __field(self, i: int):
+        field = self.__fields[i]
+        if field is None:
+            tag, start, length = self.directory[i]
+            field = self.__parse_field(tag, self.raw[start:start + length], self.encoding)
+            self.__fields[i] = field
+        return field
+
+    def __tag_index(self) -> dict[str, list[int]]:
+        # Directory positions by tag, the directory itself never changes.
+        if self.__tags is None:
+            tags = {}
+            for i, entry in enumerate(self.directory):
+                tags.setdefault(entry[0], []).append(i)
+            self.__tags = tags
+        return self.__tags
+
+    def __materialize(self):
+        if self.__materialized:
+            return
+
+        control_fields = []
+        data_fields = []
+        for i in range(len(self.directory)):
+            field = self.__field(i)
+            if isinstance(field, ControlField):
+                control_fields.append(field)
+            else:
+                data_fields.append(field)
+
+        Record.control_fields.__set__(self, control_fields)
+        Record.data_fields.__set__(self, data_fields)
+        self.__materialized = True
+
+    @property
+    def control_fields(self) -> list[ControlField]:
+        self.__materialize()
+        return Record.control_fields.__get__(self)
+
+    @control_fields.setter
+    def control_fields(self, fields: list[ControlField]):
+        self.__materialize()
+        Record.control_fields.__set__(self, fields)
+
+    @property
+    def data_fields(self) -> list[DataField]:
+        self.__materialize()
+        return Record.data_fields.__get__(self)
+
+    @data_fields.setter
+    def data_fields(self, fields: list[DataField]):
+        self.__materialize()
+        Record.data_fields.__set__(self, fields)
+
+    def _find_fields(self, key) -> list[ControlField | DataField]:
+        if self.__materialized:
+            return super()._find_fields(key)
+
+        return [self.__field(i) for i in self.__tag_index().get(key, ())]
+
+    def __contains__(self, key) -> bool:
+        if self.__materialized:
+            return super().__contains__(key)
+
+        return key in self.__tag_index()
+
+    def __iter__(self):
+        if self.__materialized:
+            yield from super().__iter__()
+            return
+
+        for i, entry in enumerate(self.directory):
+            if int(entry[0]) < 10:
+                yield self.__field(i)
+
+        for i, entry in enumerate(self.directory):
+            if int(entry[0]) >= 10:
+                yield self.__field(i)
\ No newline at end of file
@@ -0,0 +1,242 @@
+import re
+from kmmarc.marc import Record, ControlField, PackedDataField
+from kmmarc.reader import MarcStreamReader
+from kmmarc.compression import open_path
+
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<regex>/(?:[^/\\]|\\.)*/[ims]*)
+  | (?P<op>==|!=|!~|~|<=|>=|<|>)
+  | (?P<paren>[()])
+  | (?P<path>[0-9A-Za-z]{3}(?:\$.|(?![0-9A-Za-z.])))
+  | (?P<number>-?[0-9]+(?:\.[0-9]+)?)
+  | (?P<word>[A-Za-z]+)
+''', re.VERBOSE)
+
+_KEYWORDS = ('and', 'or', 'not')
+
+
+def _tokenize(text: str):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_PATTERN.match(text, pos)
+        if match is None:
+            raise Exception(f"Unexpected character {text[pos]!r} at position {pos}")
+
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'path' and value.lower() in _KEYWORDS:
+            kind = 'word'
+        if kind == 'word' and value.lower() not in _KEYWORDS:
+            raise Exception(f"Unexpected word {value!r} at position {pos}")
+
+        if kind != 'space':
+            tokens.append((kind, value.lower() if kind == 'word' else value, pos))
+        pos = match.end()
+
+    tokens.append(('end', '', pos))
+    return tokens
+
+
+def _string_literal(token: str) -> str:
+    return re.sub(r'\\(.)', r'\1', token[1:-1])
+
+
+def _regex_literal(token: str) -> re.Pattern:
+    end = token.rindex('/')
+    flags = 0
+    for flag in token[end + 1:]:
+        flags |= {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL}[flag]
+    return re.compile(token[1:end].replace('\\/', '/'), flags)
+
+
+def _values(record: Record, tag: str, code: str | None) -> list[str]:
+    values = []
+    for field in record._find_fields(tag):
+        if isinstance(field, ControlField):
+            if code is None and field.data is not None:
+                values.append(field.data)
+            continue
+
+        if isinstance(field, PackedDataField):
+            values.extend([value for subfield_code, value in zip(field.codes, field.values) if (code is None or subfield_code == code) and value is not None])
+            continue
+
+        subfields = field.subfields if code is None else field[code]
+        if subfields is not None:
+            values.extend([subfield.data for subfield in subfields if subfield.data is not None])
+    return values
+
+
+def _number(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+_COMPARISONS = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.tags = set()
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def take(self, kind: str, value: str | None = None):
+        token = self.tokens[self.pos]
+        if token[0] != kind or (value is not None and token[1] != value):
+            expected = value if value is not None else kind
+            found = token[1] if token[0] != 'end' else 'end of query'
+            raise Exception(f"Expected {expected} but found {found!r} at position {token[2]}")
+        self.pos += 1
+        return token
+
+    # Every rule returns (predicate, tags the record needs for it to hold).
+
+    def parse(self):
+        result = self.parse_or()
+        self.take('end')
+        return result
+
+    def parse_or(self):
+        predicate, required = self.parse_and()
+        while self.peek()[:2] == ('word', 'or'):
+            self.pos += 1
+            right, right_required = self.parse_and()
+            predicate = (lambda a, b: lambda record: a(record) or b(record))(predicate, right)
+            required = required & right_required
+        return predicate, required
+
+    def parse_and(self):
+        predicate, required = self.parse_not()
+        while self.peek()[:2] == ('word', 'and'):
+            self.pos += 1
+            right, right_required = self.parse_not()
+            predicate = (lambda a, b: lambda record: a(record) and b(record))(predicate, right)
+            required = required | right_required
+        return predicate, required
+
+    def parse_not(self):
+        if self.peek()[:2] == ('word', 'not'):
+            self.pos += 1
+            predicate, _ = self.parse_not()
+            return (lambda a: lambda record: not a(record))(predicate), frozenset()
+        return self.parse_atom()
+
+    def parse_atom(self):
+        if self.peek()[:2] == ('paren', '('):
+            self.pos += 1
+            result = self.parse_or()
+            self.take('paren', ')')
+            return result
+
+        path = self.take('path')[1]
+        tag, _, code = path.partition('$')
+        code = code if len(code) > 0 else None
+        self.tags.add(tag)
+
+        if self.peek()[0] != 'op':
+            return (lambda record: len(_values(record, tag, code)) > 0), frozenset([tag])
+
+        op = self.take('op')[1]
+        kind, literal, position = self.peek()
+        if kind == 'path' and literal.isdigit():
+            # Three digits read as a tag when they stand alone.
+            kind = 'number'
+
+        if op in ('~', '!~'):
+            pattern = _regex_literal(self.take('regex')[1]) if kind == 'regex' else re.compile(re.escape(_string_literal(self.take('string')[1])))
+            search = pattern.search
+            predicate = lambda record: any(search(value) for value in _values(record, tag, code))
+        elif kind == 'number' and op not in ('==', '!='):
+            self.pos += 1
+            number = float(literal)
+            compare = _COMPARISONS[op]
+            predicate = lambda record: any(n is not None and compare(n, number) for n in map(_number, _values(record, tag, code)))
+        elif kind in ('string', 'number'):
+            self.pos += 1
+            expected = _string_literal(literal) if kind == 'string' else literal
+            if op in ('==', '!='):
+                predicate = lambda record: expected in _values(record, tag, code)
+            else:
+                compare = _COMPARISONS[op]
+                predicate = lambda record: any(compare(value, expected) for value in _values(record, tag, code))
+        else:
+            raise Exception(f"Expected a value after {op} at position {position}")
+
+        if op in ('!=', '!~'):
+            # True when the field is missing too, so it needs no tag.
+            return (lambda a: lambda record: not a(record))(predicate), frozenset()
+
+        return predicate, frozenset([tag])
+
+
+class Query:
+    def __init__(self, text: str) -> None:
+        parser = _Parser(text)
+        self.text = text
+        self.__predicate, self.required_tags = parser.parse()
+        self.tags = frozenset(parser.tags)
+
+    def __call__(self, record: Record) -> bool:
+        return bool(self.__predicate(record))
+
+    def matches_tags(self, tags) -> bool:
+        # Whether a record with these directory tags could match at all.
+        return self.required_tags.issubset(tags)
+
+    def filter(self, records):
+        predicate = self.__predicate
+        for record in records:
+            if predicate(record):
+                yield record
+
+    def __repr__(self) -> str:
+        return f"Query({self.text!r})"
+
+
+def compile_query(text: str) -> Query:
+    return Query(text)
+
+
+def _directory_tags(rec) -> set[str]:
+    base = int(rec[12:17])
+    directory = bytes(rec[24:24 + (base - 25) // 12 * 12]).decode('iso8859-1')
+    return {directory[i:i + 3] for i in range(0, len(directory), 12)}
+
+
+def select_marc_stream(f, query: Query | str, force_utf8_encoding = False, lazy = True):
+    # Records missing a tag the query needs are skipped from their directory
+    # alone. The rest are parsed lazily, so only the queried fields are
+    # decoded before the predicate runs.
+    query = query if isinstance(query, Query) else Query(query)
+    reader = MarcStreamReader(f, force_utf8_encoding, streaming=True, lazy=lazy)
+
+    while True:
+        rec = reader._read_next_bytes()
+        if rec is None:
+            break
+
+        if len(query.required_tags) > 0 and not query.matches_tags(_directory_tags(rec)):
+            continue
+
+        record = reader._parse_record(rec)
+        if query(record):
+            yield record
+
+
+def select_marc_stream_from_path(path: str, query: Query | str, force_utf8_encoding = False, lazy = True):
+    with open_path(path, "rb", buffering=1024 * 1024) as f:
+        yield from select_marc_stream(f, query, force_utf8_encoding, lazy)
\ No newline at end of file
@@ -1,9 +1,65 @@
 import json
 import yaml
 import io
+import os
+import re
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 import xml.etree.ElementTree as ET
-from kmmarc.marc import Record, ControlField, DataField, SubField, Leader
+from kmmarc.marc import Record, LazyRecord, ControlField, DataField, PackedDataField, SubField, Leader
 from kmmarc.constants import *
+from kmmarc.stats import MarcStats, _CountingReader, _record_counts
+from kmmarc.compression import open_path, is_compressed
+
+# libyaml's loader when PyYAML was built with it, it is several times faster.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class ReadError:
+    __slots__ = ('start', 'end', 'reason')
+
+    def __init__(self, start: int, end: int, reason: str) -> None:
+        # Bytes start:end of the stream were skipped.
+        self.start = start
+        self.end = end
+        self.reason = reason
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ReadError):
+            return NotImplemented
+        return (self.start, self.end, self.reason) == (other.start, other.end, other.reason)
+
+    def __repr__(self) -> str:
+        return f"ReadError(start={self.start!r}, end={self.end!r}, reason={self.reason!r})"
+
+    def __str__(self) -> str:
+        return f"bytes {self.start}-{self.end}: {self.reason}"
+
+
+# The digit positions of a leader, to find candidates when resynchronizing.
+# It spans all 24 bytes, so a match is never cut short by the window's end.
+_LEADER_PATTERN = re.compile(rb'[0-9]{5}.{5}[0-9]{7}.{3}[0-9]{2}.{2}', re.DOTALL)
+
+
+def _leader_problem(leader_bytes) -> str | None:
+    # Why these 24 bytes cannot start a record, None if they plausibly do.
+    if len(leader_bytes) < 24:
+        return "Unexpected end of stream while reading leader"
+    if not leader_bytes[0:5].isdigit() or not leader_bytes[12:17].isdigit():
+        return "Invalid record length or base address in leader"
+    if not leader_bytes[10:12].isdigit() or not leader_bytes[20:22].isdigit():
+        return "Invalid indicator count, subfield code length or entry map in leader"
+
+    rec_len = int(leader_bytes[0:5])
+    base = int(leader_bytes[12:17])
+    if base < 25 or base >= rec_len:
+        return "Base address outside of record"
+    return None
 
 
 class MarcJsonReader:
@@ -12,8 +68,7 @@ class MarcJsonReader:
         if not isinstance(self.json, list):
             self.json = [self.json]
 
-    def __next(self, i):
-        record_obj = self.json[i]
+    def _read_record(self, record_obj):
         record = Record(record_obj['leader'])
 
         if isinstance(record_obj['fields'], list):
@@ -51,238 +106,785 @@ class MarcJsonReader:
         return record
 
     def __iter__(self):
-        for i in range(len(self.json)):
-            yield self.__next(i)
+        for record_obj in self.json:
+            yield self._read_record(record_obj)
+
+
+class MarcJsonLinesReader(MarcJsonReader):
+    def __init__(self, f, start = 0, end: int | None = None) -> None:
+        # start and end are byte offsets, so splitting requires a binary file.
+        # A split owns every line that begins inside it.
+        self.f = f
+        self.start = start
+        self.end = end
+
+    def __iter__(self):
+        if self.start > 0:
+            self.f.seek(self.start - 1)
+            self.f.readline()
+
+        # Only a split needs positions, so whole files may be pipes or
+        # decompressed streams.
+        pos = self.f.tell() if self.end is not None else 0
+        while self.end is None or pos < self.end:
+            line = self.f.readline()
+            if len(line) == 0:
+                break
+
+            pos += len(line)
+            if len(line.strip()) > 0:
+                yield self._read_record(json.loads(line))
 
 
 class MarcYamlReader(MarcJsonReader):
     def __init__(self, f) -> None:
-        self.json = yaml.load(f)
-        if not isinstance(self.json, list):
-            self.json = [self.json]
+        self.f = f
+
+    def __iter__(self):
+        # A document holds either one record or a list of them, so streams
+        # with a document per record are only ever one record in memory.
+        for document in yaml.load_all(self.f, Loader=YAML_LOADER):
+            if document is None:
+                continue
+
+            if isinstance(document, list):
+                for record_obj in document:
+                    yield self._read_record(record_obj)
+            else:
+                yield self._read_record(document)
 
 
 class MarcXmlReader:
-    def __init__(self, data) -> None:
-        self.root = data if isinstance(data, str) else ET.fromstringlist(data.readlines())
-        self.record_tags = list(self.root)
-
-    def __find(self, tag, path) -> ET.Element | None:
-        res = tag.find(f"{'{http://www.loc.gov/MARC21/slim}'}{path}")
-        if res is None:
-            res = tag.find(f"{path}")
-        return res
-    
-    def __findall(self, tag, path) -> list[ET.Element] :
-        res = tag.findall(f"{'{http://www.loc.gov/MARC21/slim}'}{path}")
-        if res is None or len(res) == 0:
-            res = tag.findall(f"{path}")
-        return res
-
-    def __next(self, i):
-        record_tag: ET.Element = self.record_tags[i]
-        record = Record(self.__find(record_tag, "leader").text)
-
-        for ctrl_field_tag in self.__findall(record_tag, "controlfield"):
-            field = ControlField(ctrl_field_tag.attrib['tag'], ctrl_field_tag.text)
-            record.control_fields.append(field)
-
-        for data_field_tag in self.__findall(record_tag, "datafield"):
-            field = DataField(data_field_tag.attrib['tag'], data_field_tag.attrib['ind1'], data_field_tag.attrib['ind2'])
-            
-            for subfield_tag in self.__findall(data_field_tag, "subfield"):
-                subfield = SubField(subfield_tag.attrib['code'], subfield_tag.text)
-                field.subfields.append(subfield)
-            
-            record.data_fields.append(field)
+    def __init__(self, data, stats: MarcStats | None = None) -> None:
+        self.__data = data
+        if stats is not None:
+            self.__instrument(stats)
+
+    def __instrument(self, stats: MarcStats):
+        if hasattr(self.__data, 'read'):
+            self.__data = _CountingReader(self.__data, stats)
+
+        parse_record = stats.timed('record', self._parse_record)
+
+        def counted_parse_record(record_tag, field_tags):
+            record = parse_record(record_tag, field_tags)
+            stats._count_record(True, *_record_counts(record))
+            return record
+
+        self._parse_record = counted_parse_record
+
+    @staticmethod
+    def __namespace(tag: str) -> str:
+        return tag[:tag.index('}') + 1] if tag.startswith('{') else ''
+
+    @staticmethod
+    def _local_name(tag: str) -> str:
+        return tag[tag.index('}') + 1:] if tag.startswith('{') else tag
+
+    def _resolve_field_tags(self, record_tag: ET.Element):
+        # Records written with a prefixed namespace may still have an
+        # unqualified <record>, so the namespace is taken from the fields.
+        namespace = ''
+        for child in record_tag:
+            if self._local_name(child.tag) in ('leader', 'controlfield', 'datafield'):
+                namespace = self.__namespace(child.tag)
+                break
+
+        return (f"{namespace}leader", f"{namespace}controlfield", f"{namespace}datafield", f"{namespace}subfield")
+
+    def _parse_record(self, record_tag: ET.Element, field_tags):
+        leader_name, control_field_name, data_field_name, subfield_name = field_tags
+        record = Record(record_tag.find(leader_name).text)
+
+        for field_tag in record_tag:
+            if field_tag.tag == control_field_name:
+                record.control_fields.append(ControlField(field_tag.attrib['tag'], field_tag.text))
+            elif field_tag.tag == data_field_name:
+                field = DataField(field_tag.attrib['tag'], field_tag.attrib['ind1'], field_tag.attrib['ind2'])
+
+                for subfield_tag in field_tag:
+                    if subfield_tag.tag == subfield_name:
+                        field.subfields.append(SubField(subfield_tag.attrib['code'], subfield_tag.text))
+
+                record.data_fields.append(field)
 
         return record
 
-    def __iter__(self):
-        for i in range(len(self.record_tags)):
-            yield self.__next(i)
+    def __iter_element(self, root: ET.Element):
+        field_tags = None
+        for record_tag in root:
+            if field_tags is None:
+                field_tags = self._resolve_field_tags(record_tag)
+            yield self._parse_record(record_tag, field_tags)
 
+    def __iter__(self):
+        if isinstance(self.__data, ET.Element):
+            yield from self.__iter_element(self.__data)
+            return
+
+        root = None
+        record_name = None
+        field_tags = None
+
+        for event, elem in ET.iterparse(self.__data, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                if record_name is None and self._local_name(elem.tag) == 'record':
+                    record_name = elem.tag
+                continue
 
-class MarcStreamReader:
-    def __init__(self, f, force_utf8_encoding = False) -> None:
-        self.__f = f
-        self.__bytes: bytes = f.read()
-        self.__bytes_len = len(self.__bytes) 
-        self.__buf = io.BytesIO(self.__bytes)
-        self.force_utf8_encoding = force_utf8_encoding
+            if elem.tag != record_name:
+                continue
 
-    def __parse_leader(self, leader_bytes: bytes):
-        leader = Leader()
-        
-        leader_str = leader_bytes.decode("iso-8859-1")
-        leader.record_length = int(leader_str[0:5])
-
-        leader.record_status = leader_str[5:6]
-        leader.type_of_record = leader_str[6:7]
-        leader.impl_defined1 = leader_str[7:9]
-        leader.char_coding_scheme = leader_str[9:10]
-        leader.indicator_count = int(leader_str[10:11])
-        leader.subfield_length = int(leader_str[11:12])
-        leader.base_address_of_data = int(leader_str[12:17])
-        leader.impl_defined2 = leader_str[17:20]
-        leader.entry_map = leader_str[20:24]
-
-        return leader
-    
-    def __parse_subfield_length(self, buf: io.BytesIO):
-        global US
-        global FT
+            if field_tags is None:
+                field_tags = self._resolve_field_tags(elem)
 
-        cur_bak = buf.tell()
-        bytes_read = 0
+            yield self._parse_record(elem, field_tags)
 
-        i = 0
-        while True:
-            if i >= 9999:
-                buf.seek(cur_bak)
-                return bytes_read
-
-            r = buf.read(1)
-
-            match r:
-                case b'\x1f':
-                    buf.seek(cur_bak)
-                    return bytes_read
-                case b'\x1e':
-                    buf.seek(cur_bak)
-                    return bytes_read
-                case b'':
-                    buf.seek(cur_bak)
-                    raise Exception('Subfield not terminated')
-                case _:
-                    bytes_read += 1
+            # Drop every finished record so the tree never grows past the
+            # one being parsed.
+            root.clear()
 
-            i += 1
 
+class _BorrowedBufferedReader(io.BufferedReader):
+    # Read-ahead over a caller's unbuffered file that leaves it open. When
+    # closed or collected it detaches instead, and puts a seekable file back
+    # right after the bytes that were read through it.
+    def close(self):
+        try:
+            pos = self.tell() if self.seekable() else None
+            raw = self.detach()
+        except ValueError:
+            # Already detached, or the caller closed the file.
+            return
 
-    
-    def __parse_data_field(self, tag, field_bytes: bytes, encoding: str):
-        buf = io.BytesIO(field_bytes)
+        if pos is not None:
+            raw.seek(pos)
 
-        field = DataField(tag, buf.read(1).decode(encoding), buf.read(1).decode(encoding))
 
-        while True:
-            read_byte = buf.read(1)
-            if read_byte < b'\x00':
-                break
+class MarcStreamReader:
+    def __init__(self, f, force_utf8_encoding = False, streaming = False, buffer_size = io.DEFAULT_BUFFER_SIZE, lazy = False, pack_subfields = False, stats: MarcStats | None = None, lenient = False, error_sink = None) -> None:
+        self.__f = f
+        self.force_utf8_encoding = force_utf8_encoding
+        self.streaming = streaming
+        self.lazy = lazy
+        self.pack_subfields = pack_subfields
+
+        if streaming:
+            # Records are pulled straight from the file, so only the read-ahead
+            # buffer and the record being parsed are ever held in memory.
+            self.__buf = f if isinstance(f, io.BufferedIOBase) else _BorrowedBufferedReader(f, buffer_size)
+        else:
+            self.__buf = io.BytesIO(f.read())
+
+        if stats is not None:
+            self._instrument(stats)
+
+        if lenient:
+            # Skipped byte ranges go to error_sink, or to self.errors without one.
+            self.errors: list[ReadError] = []
+            self.error_sink = error_sink if error_sink is not None else self.errors.append
+            self.__window = bytearray()
+            self.__window_pos = 0
+            self.read_next = self.__read_next_lenient
+
+    def _instrument(self, stats: MarcStats):
+        # Timed wrappers shadow this reader's own methods, so readers without
+        # stats run exactly the code they ran before. Subfields of lazy
+        # records are only counted once they are decoded.
+        self._parse_lazy_field = _CountedFieldParser(stats)
+        self._read_next_bytes = stats.timed('read', self._read_next_bytes)
+        self.__parse_leader = stats.timed('leader', self.__parse_leader)
+        self.__parse_directory = stats.timed('directory', self.__parse_directory)
+        parse_data_field = stats.timed('data_field', self.__parse_data_field)
+        parse_record = stats.timed('record', self._parse_record)
+
+        def counted_parse_data_field(tag, field_bytes, encoding: str, packed = False):
+            field = parse_data_field(tag, field_bytes, encoding, packed)
+            stats.subfields_in += len(field.values) if packed else len(field.subfields)
+            return field
+
+        def counted_parse_record(rec):
+            record = parse_record(rec)
+            stats.bytes_in += len(rec)
+            fields = len(record.directory) if isinstance(record, LazyRecord) else len(record.control_fields) + len(record.data_fields)
+            stats._count_record(True, fields, 0)
+            return record
+
+        self.__parse_data_field = counted_parse_data_field
+        self._parse_record = counted_parse_record
+
+    @staticmethod
+    def __parse_leader(rec):
+        return Leader(rec[0:24])
+
+    @staticmethod
+    def __parse_data_field(tag, field_bytes, encoding: str, packed = False):
+        if isinstance(field_bytes, memoryview):
+            field_bytes = field_bytes.tobytes()
+
+        ind1 = field_bytes[0:1].decode(encoding)
+        ind2 = field_bytes[1:2].decode(encoding)
+        field = PackedDataField(tag, ind1, ind2) if packed else None
+        codes = []
+        subfields = []
+
+        # Everything before the first subfield delimiter is not part of a subfield.
+        parts = field_bytes[2:].split(US)
+        parts_len = len(parts)
+
+        i = 1
+        while i < parts_len:
+            part = parts[i]
+            i += 1
 
-            if read_byte == US:
-                code = buf.read(1)
-                if code < b'\x00':
+            if len(part) == 0:
+                # Two consecutive delimiters: the second one is the subfield code.
+                if i >= parts_len:
                     raise Exception("Unexpected end of data field")
-                
+
+                code = US
+                part = parts[i]
+                i += 1
+                start = 0
+            else:
+                code = part[0:1]
                 if code == FT:
                     continue
 
-                size = self.__parse_subfield_length(buf)
-                data = buf.read(size)
+                start = 1
 
-                subfield = SubField(code.decode(encoding), data.decode(encoding))
-                field.subfields.append(subfield)
-                
-                continue
-            elif read_byte == FT:
-                continue
+            end = part.find(FT, start)
+            if end < 0:
+                if i >= parts_len:
+                    raise Exception('Subfield not terminated')
+                end = len(part)
 
-        return field
+            if packed:
+                codes.append(code.decode(encoding))
+                field.values.append(part[start:end].decode(encoding))
+            else:
+                subfields.append(SubField(code.decode(encoding), part[start:end].decode(encoding)))
 
-    def __parse_record(self, leader_bytes: bytes, rec_bytes: bytes):
-        leader = self.__parse_leader(leader_bytes)
+        if packed:
+            field.codes = ''.join(codes)
+            return field
 
-        encoding = 'iso8859-1'
-        if leader.char_coding_scheme == 'a' or self.force_utf8_encoding:
-            encoding = 'utf-8'
+        return DataField(tag, ind1, ind2, subfields)
+
+    @staticmethod
+    def _parse_field(tag, field_bytes, encoding: str):
+        if int(tag) < 10:
+            if field_bytes[-1:] != FT:
+                raise Exception("Expected field terminator at the end of field")
+
+            return ControlField(tag, str(field_bytes[:-1], encoding))
 
-        rec_buff = io.BytesIO(rec_bytes)
+        return MarcStreamReader.__parse_data_field(tag, field_bytes, encoding)
 
-        directory_len = leader.base_address_of_data - (24 + 1)
+    # What lazy records decode their fields with.
+    _parse_lazy_field = _parse_field
+
+    def __parse_directory(self, rec, leader: Leader):
+        directory_len = int(leader.raw[12:17]) - (24 + 1)
 
         size = int(directory_len / 12)
+        directory = str(rec[24:24 + size * 12], "iso-8859-1")
 
         tags = [' '] * size
         lengths = [0] * size
         starts = [0] * size
-        unsorted_start_index = {} 
-
-        record = Record(leader)
 
         for i in range(size):
-            tags[i] = rec_buff.read(3).decode("iso-8859-1")
-            lengths[i] = int(rec_buff.read(4).decode("iso-8859-1"))
-            starts[i] = int(rec_buff.read(5).decode("iso-8859-1"))
-            unsorted_start_index[starts[i]] = i
+            entry = directory[i * 12:i * 12 + 12]
+            tags[i] = sys.intern(entry[0:3])
+            lengths[i] = int(entry[3:7])
+            starts[i] = int(entry[7:12])
 
-        if rec_buff.read(1) != FT:
+        pos = 24 + size * 12
+        if rec[pos:pos + 1] != FT:
             raise Exception("Expected field terminator at end of directory")
+        pos += 1
+
+        # Fields are laid out one after the other in start order, each entry
+        # becomes (tag, position in the record, length).
+        entries = []
+        for i in sorted(range(size), key=lambda i : starts[i]):
+            entries.append((tags[i], pos, lengths[i]))
+            pos += lengths[i]
+
+        if rec[pos:pos + 1] != RT:
+            raise Exception("Expected record terminator at the end of record")
+
+        return entries
+
+    def _parse_record(self, rec):
+        leader = self.__parse_leader(rec)
+
+        encoding = 'iso8859-1'
+        if leader.raw[9:10] == b'a' or self.force_utf8_encoding:
+            encoding = 'utf-8'
 
-        starts.sort()
+        entries = self.__parse_directory(rec, leader)
 
-        for s in range(size):
-            i = unsorted_start_index[starts[s]]
+        if self.lazy:
+            return LazyRecord(leader, rec, entries, encoding, self._parse_lazy_field)
 
-            if int(tags[i]) < 10:
-                eba = rec_buff.read(lengths[i] - 1)
+        control_fields = []
+        data_fields = []
 
-                if rec_buff.read(1) != FT:
+        for tag, pos, length in entries:
+            if int(tag) < 10:
+                if rec[pos + length - 1:pos + length] != FT:
                     raise Exception("Expected field terminator at the end of field")
 
-                record.control_fields.append(ControlField(tags[i], eba.decode(encoding)))
+                control_fields.append(ControlField(tag, str(rec[pos:pos + length - 1], encoding)))
             else:
-                eba = rec_buff.read(lengths[i])
-                record.data_fields.append(self.__parse_data_field(tags[i], eba, encoding))
-        
-        if rec_buff.read(1) != RT:
-            raise Exception("Expected record terminator at the end of record")
+                data_fields.append(self.__parse_data_field(tag, rec[pos:pos + length], encoding, self.pack_subfields))
 
-        return record
+        return Record(leader, control_fields, data_fields)
 
-    def read_next(self):
+    def _read_next_bytes(self):
         leader_bytes = self.__buf.read(24)
+        if len(leader_bytes) == 0:
+            return None
+
+        if len(leader_bytes) < 24:
+            raise Exception("Unexpected end of stream while reading leader")
 
         rec_len = int(leader_bytes[0:5].decode("iso-8859-1"))
-        return self.__parse_record(leader_bytes, self.__buf.read(rec_len - 24))
+        rec = bytearray(rec_len)
+        rec[0:24] = leader_bytes
+
+        if self.__buf.readinto(memoryview(rec)[24:]) < rec_len - 24:
+            raise Exception("Unexpected end of stream while reading record")
+
+        return rec
+
+    def read_next(self):
+        rec = self._read_next_bytes()
+        if rec is None:
+            return None
+
+        return self._parse_record(rec)
+
+    def __fill(self, size: int):
+        window = self.__window
+        while len(window) < size:
+            chunk = self.__buf.read(max(size - len(window), 64 * 1024))
+            if len(chunk) == 0:
+                break
+            window += chunk
+
+    def __skip(self, size: int, reason: str):
+        self.error_sink(ReadError(self.__window_pos, self.__window_pos + size, reason))
+        del self.__window[:size]
+        self.__window_pos += size
+
+    def __resync(self) -> int:
+        # Offset of the next plausible leader that follows a record
+        # terminator, or whose record length and base address land on a
+        # record and a field terminator. The end of the stream otherwise.
+        window = self.__window
+        pos = 1
+        while True:
+            match = _LEADER_PATTERN.search(window, pos)
+            if match is None:
+                pos = max(pos, len(window) - 23)
+                size = len(window)
+                self.__fill(size + 64 * 1024)
+                if len(window) == size:
+                    return size
+                continue
+
+            start = match.start()
+            if _leader_problem(window[start:start + 24]) is None:
+                if window[start - 1:start] == RT:
+                    return start
+
+                end = start + int(window[start:start + 5])
+                base = start + int(window[start + 12:start + 17])
+                self.__fill(end)
+                if window[end - 1:end] == RT and window[base - 1:base] == FT:
+                    return start
+
+            pos = start + 1
+
+    def __read_next_lenient(self):
+        window = self.__window
+        while True:
+            self.__fill(24)
+            if len(window) == 0:
+                return None
+
+            reason = _leader_problem(window[0:24])
+            if reason is None:
+                rec_len = int(window[0:5])
+                self.__fill(rec_len)
+                if len(window) < rec_len:
+                    reason = "Unexpected end of stream while reading record"
+                elif window[rec_len - 1:rec_len] != RT:
+                    reason = "Expected record terminator at the end of record"
+                else:
+                    try:
+                        record = self._parse_record(window[0:rec_len])
+                    except Exception as e:
+                        reason = str(e)
+                    else:
+                        del window[:rec_len]
+                        self.__window_pos += rec_len
+                        return record
+
+            # Not even a record that fails to parse is skipped by its length,
+            # which may be what is wrong with it. A good next record starts
+            # right after it anyway.
+            self.__skip(self.__resync(), reason)
 
     def __iter__(self):
-        while self.__buf.tell() < self.__bytes_len:
-            yield self.read_next()
+        while True:
+            record = self.read_next()
+            if record is None:
+                break
+
+            yield record
+
+
+class _CountedFieldParser:
+    # MarcStreamReader._parse_field for the lazy records of a reader with
+    # stats. Pickled records decode with the plain parser.
+    __slots__ = ('stats', 'parse_field')
+
+    def __init__(self, stats: MarcStats) -> None:
+        self.stats = stats
+        self.parse_field = stats.timed('data_field', MarcStreamReader._parse_field)
+
+    def __call__(self, tag, field_bytes, encoding: str):
+        field = self.parse_field(tag, field_bytes, encoding)
+        if isinstance(field, DataField):
+            self.stats.subfields_in += len(field.subfields)
+        return field
+
+    def __reduce__(self):
+        return (getattr, (MarcStreamReader, '_parse_field'))
+
+
+class MarcMmapReader(MarcStreamReader):
+    # Magic, file size, file mtime in ns, CRC-32 of the first and last
+    # leaders and record count, then the offsets, all little-endian.
+    __INDEX_MAGIC = b'KMR2'
+    __INDEX_HEADER = struct.Struct('<4sQqIIQ')
+
+    def __init__(self, f, force_utf8_encoding = False, index_path: str | None = None, lazy = False, pack_subfields = False, stats: MarcStats | None = None) -> None:
+        self.force_utf8_encoding = force_utf8_encoding
+        self.lazy = lazy
+        self.pack_subfields = pack_subfields
+        self.__pos = 0
+
+        stat = os.fstat(f.fileno())
+        size = stat.st_size
+        self.__mtime_ns = stat.st_mtime_ns
+        self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else None
+        self.__view = memoryview(self.__mmap) if self.__mmap is not None else memoryview(b'')
+
+        self.offsets = self.load_index(index_path) if index_path is not None else None
+        if self.offsets is None:
+            self.offsets = self.__build_index()
+            if index_path is not None:
+                self.save_index(index_path)
+
+        if stats is not None:
+            self._instrument(stats)
+
+    def __build_index(self):
+        offsets = array('q')
+        size = len(self.__view)
+        pos = 0
+
+        while pos < size:
+            offsets.append(pos)
+            rec_len = int(bytes(self.__view[pos:pos + 5]))
+            if rec_len < 24:
+                raise Exception(f"Invalid record length at offset {pos}")
+            pos += rec_len
+
+        if pos != size:
+            raise Exception("Unexpected end of file while reading record")
+
+        return offsets
+
+    def __leader_crcs(self, offsets) -> tuple[int, int]:
+        if len(offsets) == 0:
+            return 0, 0
+
+        first = self.__view[offsets[0]:offsets[0] + 24]
+        last = self.__view[offsets[-1]:offsets[-1] + 24]
+        return zlib.crc32(first), zlib.crc32(last)
+
+    def load_index(self, path: str):
+        # The index is only used for the very file it was built from: same
+        # size, modification time and first and last leaders.
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f:
+            header = f.read(MarcMmapReader.__INDEX_HEADER.size)
+            if len(header) < MarcMmapReader.__INDEX_HEADER.size:
+                return None
+
+            magic, file_size, mtime_ns, first_crc, last_crc, count = MarcMmapReader.__INDEX_HEADER.unpack(header)
+            if magic != MarcMmapReader.__INDEX_MAGIC or file_size != len(self.__view) or mtime_ns != self.__mtime_ns:
+                return None
+
+            offsets = array('q')
+            try:
+                offsets.fromfile(f, count)
+            except EOFError:
+                return None
+
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+
+        if any(offset < 0 or offset + 24 > file_size for offset in (offsets[0:1] + offsets[-1:])):
+            return None
+        if self.__leader_crcs(offsets) != (first_crc, last_crc):
+            return None
+
+        return offsets
+
+    def save_index(self, path: str):
+        offsets = self.offsets
+        if sys.byteorder == 'big':
+            offsets = array('q', offsets)
+            offsets.byteswap()
+
+        with open(path, "wb") as f:
+            f.write(MarcMmapReader.__INDEX_HEADER.pack(MarcMmapReader.__INDEX_MAGIC, len(self.__view), self.__mtime_ns, *self.__leader_crcs(self.offsets), len(self.offsets)))
+            offsets.tofile(f)
+
+    def record_bytes(self, n: int) -> memoryview:
+        start = self.offsets[n]
+        rec_len = int(bytes(self.__view[start:start + 5]))
+        return self.__view[start:start + rec_len]
+
+    def seek_record(self, n: int):
+        if n < 0:
+            n += len(self.offsets)
+        if n < 0 or n > len(self.offsets):
+            raise IndexError("record index out of range")
+        self.__pos = n
+
+    def tell_record(self) -> int:
+        return self.__pos
+
+    def read_next(self):
+        if self.__pos >= len(self.offsets):
+            return None
+
+        record = self[self.__pos]
+        self.__pos += 1
+        return record
+
+    def close(self):
+        self.__view.release()
+        if self.__mmap is not None:
+            self.__mmap.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, n: int):
+        rec = self.record_bytes(n)
+        try:
+            # Lazy records keep their bytes around, so they get a copy
+            # instead of a view that would pin the mapping.
+            return self._parse_record(rec.tobytes() if self.lazy else rec)
+        finally:
+            rec.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 def read_marc_json_from_path(path: str, parse_all = False, encoding = "utf-8"):
-    with open(path, "r", encoding=encoding) as f:
-        reader = MarcJsonReader(f)
-        if parse_all:
-            return list(reader)
-        else:
-            for record in reader:
-                yield record
+    if parse_all:
+        with open_path(path, "r", encoding=encoding) as f:
+            return list(MarcJsonReader(f))
+
+    return _iter_marc_json_from_path(path, encoding)
+
+
+def _iter_marc_json_from_path(path: str, encoding = "utf-8"):
+    with open_path(path, "r", encoding=encoding) as f:
+        yield from MarcJsonReader(f)
+
+
+def read_marc_json_lines_from_path(path: str, parse_all = False, start = 0, end: int | None = None):
+    if (start != 0 or end is not None) and is_compressed(path):
+        raise Exception(f"Cannot read a byte range of compressed file {path}")
+
+    if parse_all:
+        with open_path(path, "rb") as f:
+            return list(MarcJsonLinesReader(f, start, end))
+
+    return _iter_marc_json_lines_from_path(path, start, end)
+
+
+def _iter_marc_json_lines_from_path(path: str, start = 0, end: int | None = None):
+    with open_path(path, "rb") as f:
+        yield from MarcJsonLinesReader(f, start, end)
+
+
+def split_marc_json_lines(path: str, count: int) -> list[tuple[int, int]]:
+    size = os.path.getsize(path)
+    return [(size * i // count, size * (i + 1) // count) for i in range(count)]
 
 
 def read_marc_yaml_from_path(path: str, parse_all = False, encoding = "utf-8"):
-    with open(path, "r", encoding=encoding) as f:
-        reader = MarcYamlReader(f)
-        if parse_all:
-            return list(reader)
-        else:
-            for record in reader:
-                yield record
+    if parse_all:
+        with open_path(path, "r", encoding=encoding) as f:
+            return list(MarcYamlReader(f))
+
+    return _iter_marc_yaml_from_path(path, encoding)
+
+
+def _iter_marc_yaml_from_path(path: str, encoding = "utf-8"):
+    with open_path(path, "r", encoding=encoding) as f:
+        yield from MarcYamlReader(f)
+
+
+def read_marc_xml_from_path(path: str, encoding = "utf-8", parse_all = False):
+    if parse_all:
+        with open_path(path, "r", encoding=encoding) as f:
+            return list(MarcXmlReader(f))
+
+    return _iter_marc_xml_from_path(path, encoding)
 
 
-def read_marc_xml_from_path(path: str, encoding = "utf-8"):
-    with open(path, "r", encoding=encoding) as f:
-        reader = MarcXmlReader(f)
-        return list(reader)
+def _iter_marc_xml_from_path(path: str, encoding = "utf-8"):
+    with open_path(path, "r", encoding=encoding) as f:
+        yield from MarcXmlReader(f)
     
 
-def read_marc_stream_from_path(path: str, parse_all = False, force_utf8_encoding = False):
+def read_marc_stream_from_path(path: str, parse_all = False, force_utf8_encoding = False, streaming = True, buffer_size = 1024 * 1024, lazy = False, lenient = False, error_sink = None):
+    if parse_all:
+        with open_path(path, "rb", buffering=buffer_size) as f:
+            return list(MarcStreamReader(f, force_utf8_encoding, streaming=streaming, lazy=lazy, lenient=lenient, error_sink=error_sink))
+
+    return _iter_marc_stream_from_path(path, force_utf8_encoding, streaming, buffer_size, lazy, lenient, error_sink)
+
+
+def _iter_marc_stream_from_path(path: str, force_utf8_encoding = False, streaming = True, buffer_size = 1024 * 1024, lazy = False, lenient = False, error_sink = None):
+    with open_path(path, "rb", buffering=buffer_size) as f:
+        yield from MarcStreamReader(f, force_utf8_encoding, streaming=streaming, lazy=lazy, lenient=lenient, error_sink=error_sink)
+
+
+def read_marc_mmap_from_path(path: str, force_utf8_encoding = False, index_path: str | None = None, lazy = False):
+    if is_compressed(path):
+        raise Exception(f"Cannot memory map compressed file {path}")
+
     with open(path, "rb") as f:
-        reader = MarcStreamReader(f, force_utf8_encoding)
-        if parse_all:
-            return list(reader)
+        return MarcMmapReader(f, force_utf8_encoding, index_path=index_path, lazy=lazy)
+
+
+def _parse_marc_stream_bytes(data: bytes, force_utf8_encoding = False, map_func = None):
+    # Records go back to the parent as lazy records: their bytes and parsed
+    # directory, which unpickle far faster than decoded fields would. They
+    # are still checked for a well formed leader and directory here.
+    reader = MarcStreamReader(io.BytesIO(data), force_utf8_encoding, lazy=True)
+    return list(reader) if map_func is None else [map_func(record) for record in reader]
+
+
+def _read_marc_stream_chunk(path: str, start: int, end: int, force_utf8_encoding = False, map_func = None):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _parse_marc_stream_bytes(data, force_utf8_encoding, map_func)
+
+
+def _iter_marc_stream_byte_chunks(path: str, chunk_size: int):
+    # Compressed files cannot be split by offset, so whole records are cut
+    # from the decompressed stream here and handed out as byte strings.
+    with open_path(path, "rb", buffering=1024 * 1024) as f:
+        reader = MarcStreamReader(f, streaming=True)
+        chunk = bytearray()
+        while True:
+            rec = reader._read_next_bytes()
+            if rec is None:
+                break
+
+            chunk += rec
+            if len(chunk) >= chunk_size:
+                yield bytes(chunk)
+                chunk = bytearray()
+
+        if len(chunk) > 0:
+            yield bytes(chunk)
+
+
+def _marc_stream_tasks(path: str, chunk_size: int, force_utf8_encoding = False, map_func = None):
+    # (function, args) per chunk for the worker pool.
+    if is_compressed(path):
+        for data in _iter_marc_stream_byte_chunks(path, chunk_size):
+            yield _parse_marc_stream_bytes, (data, force_utf8_encoding, map_func)
+    else:
+        for start, end in _split_marc_stream_chunks(path, chunk_size):
+            yield _read_marc_stream_chunk, (path, start, end, force_utf8_encoding, map_func)
+
+
+def _split_marc_stream_chunks(path: str, chunk_size: int):
+    with read_marc_mmap_from_path(path) as reader:
+        offsets = reader.offsets
+
+    size = os.path.getsize(path)
+    chunks = []
+    chunk_start = 0
+
+    for offset in offsets:
+        if offset - chunk_start >= chunk_size:
+            chunks.append((chunk_start, offset))
+            chunk_start = offset
+
+    if chunk_start < size:
+        chunks.append((chunk_start, size))
+
+    return chunks
+
+
+def read_marc_stream_parallel(path: str, workers: int | None = None, ordered = True, chunk_size = 4 * 1024 * 1024, force_utf8_encoding = False, map_func = None):
+    workers = workers if workers is not None else os.cpu_count() or 1
+    tasks = _marc_stream_tasks(path, chunk_size, force_utf8_encoding, map_func)
+
+    # Keep a couple of chunks queued per worker so none of them sit idle,
+    # without parsing the whole file ahead of the consumer.
+    max_pending = workers * 2
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if ordered:
+            pending = deque()
+            for func, args in tasks:
+                pending.append(executor.submit(func, *args))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
         else:
-            for record in reader:
-                yield record
\ No newline at end of file
+            pending = set()
+            for func, args in tasks:
+                pending.add(executor.submit(func, *args))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,155 @@
+from time import perf_counter_ns
+from kmmarc.marc import Record, PackedDataField
+
+
+class MarcStats:
+    __slots__ = (
+        'bytes_in', 'bytes_out', 'records_in', 'records_out', 'fields_in', 'fields_out', 'subfields_in', 'subfields_out',
+        'times', 'callback', 'interval', '__next_callback'
+    )
+
+    def __init__(self, callback = None, interval = 1000) -> None:
+        # callback gets a snapshot every interval records read or written.
+        self.callback = callback
+        self.interval = interval
+        # Nanoseconds per stage. The timed wrappers hold on to this dict.
+        self.times: dict[str, int] = {}
+        self.reset()
+
+    def reset(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.records_in = 0
+        self.records_out = 0
+        self.fields_in = 0
+        self.fields_out = 0
+        self.subfields_in = 0
+        self.subfields_out = 0
+        for stage in self.times:
+            self.times[stage] = 0
+        self.__next_callback = self.interval
+
+    def timed(self, stage: str, func):
+        times = self.times
+        times.setdefault(stage, 0)
+
+        def wrapper(*args):
+            start = perf_counter_ns()
+            result = func(*args)
+            times[stage] += perf_counter_ns() - start
+            return result
+
+        return wrapper
+
+    def _count_record(self, read: bool, fields: int, subfields: int):
+        if read:
+            self.records_in += 1
+            self.fields_in += fields
+            self.subfields_in += subfields
+        else:
+            self.records_out += 1
+            self.fields_out += fields
+            self.subfields_out += subfields
+
+        if self.callback is not None and self.records_in + self.records_out >= self.__next_callback:
+            self.__next_callback += self.interval
+            self.callback(self.snapshot())
+
+    def snapshot(self) -> dict:
+        return {
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'records_in': self.records_in,
+            'records_out': self.records_out,
+            'fields_in': self.fields_in,
+            'fields_out': self.fields_out,
+            'subfields_in': self.subfields_in,
+            'subfields_out': self.subfields_out,
+            'seconds': {stage: ns / 1e9 for stage, ns in self.times.items()},
+        }
+
+    def __str__(self) -> str:
+        res = f"in: {self.records_in} records, {self.fields_in} fields, {self.subfields_in} subfields, {self.bytes_in} bytes"
+        res += f"\nout: {self.records_out} records, {self.fields_out} fields, {self.subfields_out} subfields, {self.bytes_out} bytes"
+        for stage, ns in sorted(self.times.items(), key=lambda item : -item[1]):
+            res += f"\n{stage}: {ns / 1e6:.3f} ms"
+        return res
+
+
+def _record_counts(record: Record) -> tuple[int, int]:
+    subfields = sum([len(field.values) if isinstance(field, PackedDataField) else len(field.subfields) for field in record.data_fields])
+    return len(record.control_fields) + len(record.data_fields), subfields
+
+
+def _stream_encoding(f) -> tuple[str, str]:
+    # The encoding a text stream writes with, utf-8 for the ones without.
+    return getattr(f, 'encoding', None) or 'utf-8', getattr(f, 'errors', None) or 'strict'
+
+
+def _tell(f) -> int | None:
+    try:
+        return f.tell() if f.seekable() else None
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class _CountingReader:
+    def __init__(self, f, stats: MarcStats) -> None:
+        self.f = f
+        self.stats = stats
+        # Text streams are counted where they read their bytes from: the
+        # binary stream under them, when its position can be told. Counts
+        # run ahead by its read-ahead at most, and are exact at the end.
+        self.__buffer = getattr(f, 'buffer', None)
+        self.__pos = _tell(self.__buffer) if self.__buffer is not None else None
+        self.__encoding = _stream_encoding(f)
+        self.__ascii = 'marc\n'.encode(*self.__encoding) == b'marc\n'
+
+    def read(self, size = -1):
+        data = self.f.read(size)
+        if self.__pos is not None:
+            pos = self.__buffer.tell()
+            self.stats.bytes_in += pos - self.__pos
+            self.__pos = pos
+        elif isinstance(data, str):
+            self.stats.bytes_in += len(data) if self.__ascii and data.isascii() else len(data.encode(*self.__encoding))
+        else:
+            self.stats.bytes_in += len(data)
+        return data
+
+
+class _CountingWriter:
+    def __init__(self, f, stats: MarcStats) -> None:
+        self.f = f
+        self.stats = stats
+        self.__write = stats.timed('write', f.write)
+        # ASCII text takes a byte per character in every ASCII compatible
+        # encoding, so only other text is encoded a second time to count it.
+        self.__encoding = _stream_encoding(f)
+        self.__ascii = 'marc\n'.encode(*self.__encoding) == b'marc\n'
+
+    def write(self, data):
+        if isinstance(data, str):
+            self.stats.bytes_out += len(data) if self.__ascii and data.isascii() else len(data.encode(*self.__encoding))
+        else:
+            self.stats.bytes_out += memoryview(data).nbytes
+        return self.__write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def instrument_writer(writer, stats: MarcStats):
+    # Replaces the writer's own _serialize and wraps its file, so writers
+    # without stats run exactly the code they ran before. Every byte that
+    # reaches the file is counted, framing such as the XML declaration
+    # included.
+    serialize = stats.timed('serialize', writer._serialize)
+
+    def counted_serialize(record, *args):
+        stats._count_record(False, *_record_counts(record))
+        return serialize(record, *args)
+
+    writer._serialize = counted_serialize
+    if writer.f is not None:
+        writer.f = _CountingWriter(writer.f, stats)
\ No newline at end of file
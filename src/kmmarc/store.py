@@ -0,0 +1,206 @@
+import io
+import json
+import sqlite3
+from kmmarc.marc import Record, LazyRecord, ControlField, Leader
+from kmmarc.reader import MarcStreamReader, read_marc_json_from_path, read_marc_json_lines_from_path, read_marc_yaml_from_path, read_marc_xml_from_path
+from kmmarc.writer import MarcStreamWriter
+from kmmarc.convert import detect_format
+from kmmarc.dedup import parse_key
+from kmmarc.compression import open_path
+
+
+class MarcStore:
+    def __init__(self, path: str, indexes: list[str] | None = None) -> None:
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, raw BLOB NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS index_values (name TEXT NOT NULL, value TEXT NOT NULL, record INTEGER NOT NULL, PRIMARY KEY (name, value, record)) WITHOUT ROWID")
+        self.db.execute("CREATE INDEX IF NOT EXISTS index_values_record ON index_values (record)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'indexes'").fetchone()
+        self.indexes: dict[str, tuple[str, str | None]] = {}
+        for spec in (json.loads(row[0]) if row is not None else ['001']):
+            self.indexes[spec] = parse_key(spec)[0]
+        self.__save_indexes()
+        self.db.commit()
+
+        # Records are kept as ISO 2709 and come back as lazy records, so only
+        # the fields a caller touches are ever decoded. Stored records always
+        # say whether they are UTF-8 in leader/09, so the reader goes by it.
+        self.__reader = MarcStreamReader(io.BytesIO(), lazy=True)
+        self.__writer = MarcStreamWriter(None, force_utf8_encoding=True)
+
+        for spec in indexes or []:
+            self.add_index(spec)
+
+    def __save_indexes(self):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('indexes', ?)", (json.dumps(list(self.indexes)),))
+
+    def __index_rows(self, record_id: int, record: Record, indexes: dict[str, tuple[str, str | None]]):
+        rows = set()
+        for name, (tag, code) in indexes.items():
+            for field in record[tag] or []:
+                if isinstance(field, ControlField):
+                    if code is None and field.data is not None:
+                        rows.add((name, field.data.strip(), record_id))
+                    continue
+
+                for subfield in field.subfields:
+                    if (code is None or subfield.code == code) and subfield.data is not None:
+                        rows.add((name, subfield.data.strip(), record_id))
+        return rows
+
+    def add_index(self, spec: str):
+        if spec in self.indexes:
+            return
+
+        index = {spec: parse_key(spec)[0]}
+        self.indexes.update(index)
+        self.__save_indexes()
+
+        # Existing records are indexed in the same transaction.
+        for record_id, record in self.items():
+            self.db.executemany("INSERT OR IGNORE INTO index_values (name, value, record) VALUES (?, ?, ?)", self.__index_rows(record_id, record, index))
+        self.db.commit()
+
+    def drop_index(self, spec: str):
+        if spec not in self.indexes:
+            raise Exception(f"No index {spec}")
+
+        del self.indexes[spec]
+        self.__save_indexes()
+        self.db.execute("DELETE FROM index_values WHERE name = ?", (spec,))
+        self.db.commit()
+
+    def __add_raw(self, raw: bytes, record: Record) -> int:
+        cursor = self.db.execute("INSERT INTO records (raw) VALUES (?)", (raw,))
+        record_id = cursor.lastrowid
+        self.db.executemany("INSERT OR IGNORE INTO index_values (name, value, record) VALUES (?, ?, ?)", self.__index_rows(record_id, record, self.indexes))
+        return record_id
+
+    def add(self, record: Record) -> int:
+        if isinstance(record, LazyRecord) and not record.decoded and bytes(record.leader) == record.raw[:24]:
+            # Untouched lazy records still hold the exact bytes they were read
+            # from. Any decoded field or leader edit may not be in them, so
+            # those are written out. Records read as UTF-8 are marked so in
+            # leader/09, the store's reader may not be forced to UTF-8.
+            raw = bytes(record.raw)
+            if record.encoding == 'utf-8' and raw[9:10] != b'a':
+                raw = raw[:9] + b'a' + raw[10:]
+        else:
+            # The writer fills in the leader, so it gets a copy of it.
+            copy = Record(Leader(bytes(record.leader)))
+            copy.control_fields = record.control_fields
+            copy.data_fields = record.data_fields
+            raw = self.__writer._serialize(copy)
+
+        return self.__add_raw(raw, record)
+
+    def add_all(self, records, batch_size = 1000) -> int:
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+            if count % batch_size == 0:
+                self.db.commit()
+
+        self.db.commit()
+        return count
+
+    def ingest(self, path: str, in_format: str | None = None, force_utf8_encoding = False, batch_size = 1000) -> int:
+        in_format = in_format if in_format is not None else detect_format(path)
+
+        if in_format == 'iso':
+            # ISO 2709 input is stored as read, without decoding any field
+            # that is not indexed.
+            with open_path(path, "rb", buffering=1024 * 1024) as f:
+                return self.add_all(MarcStreamReader(f, force_utf8_encoding, streaming=True, lazy=True), batch_size)
+
+        readers = {
+            'xml': read_marc_xml_from_path,
+            'json': read_marc_json_from_path,
+            'jsonl': read_marc_json_lines_from_path,
+            'yaml': read_marc_yaml_from_path,
+        }
+        if in_format not in readers:
+            raise Exception(f"Unknown input format {in_format}")
+
+        return self.add_all(readers[in_format](path), batch_size)
+
+    def remove(self, record_id: int):
+        self.db.execute("DELETE FROM index_values WHERE record = ?", (record_id,))
+        self.db.execute("DELETE FROM records WHERE id = ?", (record_id,))
+        self.db.commit()
+
+    def __record(self, raw: bytes) -> LazyRecord:
+        return self.__reader._parse_record(raw)
+
+    def get(self, record_id: int) -> LazyRecord | None:
+        row = self.db.execute("SELECT raw FROM records WHERE id = ?", (record_id,)).fetchone()
+        return self.__record(row[0]) if row is not None else None
+
+    def __check_index(self, name: str):
+        if name not in self.indexes:
+            raise Exception(f"No index {name}")
+
+    def find_ids(self, name: str, value: str) -> list[int]:
+        self.__check_index(name)
+        return [row[0] for row in self.db.execute("SELECT record FROM index_values WHERE name = ? AND value = ? ORDER BY record", (name, value))]
+
+    def find(self, name: str, value: str) -> list[LazyRecord]:
+        self.__check_index(name)
+        query = "SELECT raw FROM index_values JOIN records ON records.id = index_values.record WHERE name = ? AND value = ? ORDER BY record"
+        return [self.__record(row[0]) for row in self.db.execute(query, (name, value))]
+
+    def find_range(self, name: str, start: str | None = None, stop: str | None = None, limit: int | None = None):
+        # Yields (value, record) for start <= value < stop in value order;
+        # a record is yielded once per matching value.
+        self.__check_index(name)
+        query = "SELECT value, raw FROM index_values JOIN records ON records.id = index_values.record WHERE name = ?"
+        args = [name]
+        if start is not None:
+            query += " AND value >= ?"
+            args.append(start)
+        if stop is not None:
+            query += " AND value < ?"
+            args.append(stop)
+        query += " ORDER BY value, record"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+
+        for value, raw in self.db.execute(query, args):
+            yield value, self.__record(raw)
+
+    def items(self, batch_size = 1000):
+        # Paged by id, so the store can be written to while this runs.
+        last_id = -1
+        while True:
+            rows = self.db.execute("SELECT id, raw FROM records WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)).fetchall()
+            for record_id, raw in rows:
+                yield record_id, self.__record(raw)
+
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][0]
+
+    def __iter__(self):
+        for _, record in self.items():
+            yield record
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
\ No newline at end of file
@@ -1,31 +1,178 @@
 import json
+import os
 import re
+from kmmarc.marc import Record, ControlField, PackedDataField
 
-def parse_validations(builtin_valids = None):
-    with open("validations.json", "r", encoding="utf-8") as f:
+
+class ValidationError:
+    __slots__ = ('rule', 'tag', 'code', 'value', 'message', 'record_index', 'record_id')
+
+    def __init__(self, rule: str, tag: str, code: str | None, value: str, message: str, record_index: int | None = None, record_id: str | None = None) -> None:
+        self.rule = rule
+        self.tag = tag
+        self.code = code
+        self.value = value
+        self.message = message
+        self.record_index = record_index
+        self.record_id = record_id
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ValidationError):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in ValidationError.__slots__)
+
+    def __repr__(self) -> str:
+        return f"ValidationError({', '.join(f'{name}={getattr(self, name)!r}' for name in ValidationError.__slots__)})"
+
+    def __str__(self) -> str:
+        location = self.tag if self.code is None else f"{self.tag}${self.code}"
+        if self.record_id is not None:
+            location = f"{self.record_id} {location}"
+        elif self.record_index is not None:
+            location = f"#{self.record_index} {location}"
+        return f"{location}: {self.message}"
+
+
+class _Rule:
+    __slots__ = ('check', 'message')
+
+    def __init__(self, obj: dict) -> None:
+        if obj.get('type') == 'enum':
+            # A frozenset's __contains__ is the whole check. Values JSON can
+            # hold that do not hash, lists and objects, are looked up in the list.
+            try:
+                self.check = frozenset(obj['values']).__contains__
+            except TypeError:
+                self.check = list(obj['values']).__contains__
+            self.message = f"must be one of {', '.join(sorted(map(str, obj['values'])))}"
+        elif obj.get('type') == 'regex':
+            # re.findall finding anything is the same as re.search matching.
+            self.check = re.compile(obj['value']).search
+            self.message = f"must match {obj['value']}"
+        else:
+            raise Exception(f"Unknown validation rule type {obj.get('type')}")
+
+
+def _resolve_refs(rules: dict) -> dict:
+    resolved = {}
+
+    for key in rules:
+        chain = [key]
+        obj = rules[key]
+
+        while '$ref' in obj:
+            ref = obj['$ref']
+            if ref in chain:
+                raise Exception(f"Validation rules reference each other in a cycle: {' -> '.join(chain + [ref])}")
+            if ref not in rules:
+                raise Exception(f"Validation rule {chain[-1]} references unknown rule {ref}")
+
+            if ref in resolved:
+                obj = resolved[ref]
+                break
+
+            chain.append(ref)
+            obj = rules[ref]
+
+        resolved[key] = obj
+
+    return resolved
+
+
+class Validator:
+    def __init__(self, rules: dict) -> None:
+        resolved = _resolve_refs(rules)
+
+        # Keys resolving to the same rule share one compiled check.
+        compiled = {}
+        self.rules: dict[str, _Rule] = {}
+        for key, obj in resolved.items():
+            if id(obj) not in compiled:
+                compiled[id(obj)] = _Rule(obj)
+            self.rules[key] = compiled[id(obj)]
+
+        # "tag.code" keys check subfields, plain tags check control fields.
+        self.__tag_rules: dict[str, dict[str | None, tuple[str, _Rule]]] = {}
+        for key, rule in self.rules.items():
+            tag, _, code = key.partition('.')
+            self.__tag_rules.setdefault(tag, {})[code if len(code) > 0 else None] = (key, rule)
+
+    def is_valid(self, key: str, value: str) -> bool:
+        if key not in self.rules:
+            raise Exception(f"Unknown validation rule {key}")
+
+        return bool(self.rules[key].check(value if value is not None else ''))
+
+    def __call__(self, key: str, value: str) -> bool:
+        return self.is_valid(key, value)
+
+    def __error(self, key: str, rule: _Rule, tag: str, code: str | None, value: str, record: Record, record_index: int | None):
+        control_number = record['001']
+        record_id = control_number[0].data if control_number is not None else None
+        return ValidationError(key, tag, code, value, f"{value!r} {rule.message}", record_index, record_id)
+
+    def validate_record(self, record: Record, record_index: int | None = None) -> list[ValidationError]:
+        tag_rules = self.__tag_rules
+        errors = []
+
+        for field in record:
+            field_rules = tag_rules.get(field.tag)
+            if field_rules is None:
+                continue
+
+            if isinstance(field, ControlField):
+                if None in field_rules:
+                    key, rule = field_rules[None]
+                    value = field.data if field.data is not None else ''
+                    if not rule.check(value):
+                        errors.append(self.__error(key, rule, field.tag, None, value, record, record_index))
+                continue
+
+            if isinstance(field, PackedDataField):
+                subfields = zip(field.codes, field.values)
+            else:
+                subfields = ((subfield.code, subfield.data) for subfield in field.subfields)
+
+            for code, value in subfields:
+                if code not in field_rules:
+                    continue
+
+                key, rule = field_rules[code]
+                value = value if value is not None else ''
+                if not rule.check(value):
+                    errors.append(self.__error(key, rule, field.tag, code, value, record, record_index))
+
+        return errors
+
+    def validate_records(self, records):
+        for record_index, record in enumerate(records):
+            yield from self.validate_record(record, record_index)
+
+
+_validator_cache: dict[str, tuple[tuple, Validator]] = {}
+
+
+def parse_validations(builtin_valids: dict | None = None, path: str = "validations.json") -> Validator:
+    # Compiled once per file version and set of builtin rules.
+    stat = os.stat(path)
+    full_path = os.path.abspath(path)
+    cache_key = (stat.st_mtime_ns, stat.st_size, json.dumps(builtin_valids, sort_keys=True))
+
+    cached = _validator_cache.get(full_path)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
         jsondata = json.load(f)
 
-    for key in builtin_valids:
-        if key not in jsondata:
-            jsondata[key] = builtin_valids[key]
-
-    def process():
-        for key in jsondata:
-            obj = jsondata[key]
-            if "$ref" in obj:
-                ref = obj['$ref']
-                jsondata[key] = jsondata[ref]
-
-    process()
-    
-    def validate(code, value):
-        obj = jsondata[code]
-        if obj['type'] == 'enum':
-            return obj['values'].count(value) > 0
-        elif obj['type'] == 'regex':
-            return len(re.findall(obj['value'], value)) != 0
-
-    return lambda code, value : validate(code, value)
+    if builtin_valids is not None:
+        for key in builtin_valids:
+            if key not in jsondata:
+                jsondata[key] = builtin_valids[key]
+
+    validator = Validator(jsondata)
+    _validator_cache[full_path] = (cache_key, validator)
+    return validator
 
 if __name__ == '__main__':
     valids = parse_validations({
@@ -3,19 +3,27 @@ import yaml
 import io
 import xml.etree.ElementTree as ET
 from kmmarc.marc import Record
+from kmmarc.stats import MarcStats, instrument_writer
+from kmmarc.compression import open_path
 from kmmarc.constants import *
 
+# libyaml's dumper when PyYAML was built with it, it is several times faster.
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 class MarcJsonWriter:
-    def __init__(self, f, layout_format: int = 1, ignored_tags: list[str] | None = None, indent: int | None = None, sort_tags = False):
+    def __init__(self, f, layout_format: int = 1, ignored_tags: list[str] | None = None, indent: int | None = None, sort_tags = False, stats: MarcStats | None = None):
         self.f = f
         self.format = layout_format
         self.ignored_tags = [] if ignored_tags is None else ignored_tags
         self.indent = indent
         self.sort_tags = sort_tags
+        self.__array_started = False
+        if stats is not None:
+            instrument_writer(self, stats)
 
     def _write_format1(self, record: Record):
         obj = {
-            'leader': str(record.leader),
+            'leader': record.leader.marshal(),
             'fields': []
         }
 
@@ -46,7 +54,7 @@ class MarcJsonWriter:
 
     def _write_format2(self, record: Record):
         obj = {
-            'leader': str(record.leader),
+            'leader': record.leader.marshal(),
             'fields': {}
         }
 
@@ -72,47 +80,104 @@ class MarcJsonWriter:
 
         return obj
 
-    def write(self, record: Record):
+    def _record_obj(self, record: Record):
         if self.format == 1:
-            obj = self._write_format1(record)
+            return self._write_format1(record)
+        else:
+            return self._write_format2(record)
+
+    def write(self, record: Record):
+        self.f.write(self._serialize(record))
+
+    def _serialize(self, record: Record) -> str:
+        return json.dumps(self._record_obj(record), indent=self.indent)
+
+    def _write_serialized(self, record_json: str):
+        # Lays the array out exactly as json.dump would lay out the whole list.
+        newline = None if self.indent is None else '\n' + ''.join([" "] * self.indent)
+        separator = ', ' if newline is None else ','
+
+        if self.__array_started:
+            self.f.write(separator)
+        else:
+            self.f.write('[')
+            self.__array_started = True
+
+        if newline is None:
+            self.f.write(record_json)
         else:
-            obj = self._write_format2(record)
+            self.f.write(newline + record_json.replace('\n', newline))
 
-        json.dump(obj, self.f, indent=self.indent)
+    def _finish(self):
+        if not self.__array_started:
+            self.f.write('[')
+        elif self.indent is not None:
+            self.f.write('\n')
 
-    def write_all(self, records: list[Record]):
-        recs = []
+        self.f.write(']')
+        self.__array_started = False
+
+    def write_all(self, records):
         for record in records:
-            if self.format == 1:
-                recs.append(self._write_format1(record))
-            else:
-                recs.append(self._write_format2(record))
+            self._write_serialized(self._serialize(record))
+
+        self._finish()
+
+
+class MarcJsonLinesWriter(MarcJsonWriter):
+    def write(self, record: Record):
+        self._write_serialized(self._serialize(record))
 
-        json.dump(recs, self.f, indent=self.indent)
+    def _serialize(self, record: Record) -> str:
+        return json.dumps(self._record_obj(record))
+
+    def _write_serialized(self, record_json: str):
+        self.f.write(record_json)
+        self.f.write('\n')
+
+    def _finish(self):
+        pass
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
 
 
 class MarcYamlWriter(MarcJsonWriter):
+    def __init__(self, f, layout_format: int = 1, ignored_tags: list[str] | None = None, indent: int | None = None, sort_tags = False, multi_document = False, stats: MarcStats | None = None):
+        super().__init__(f, layout_format, ignored_tags, indent, sort_tags, stats)
+        self.multi_document = multi_document
+        self.__written = False
+
     def write(self, record: Record):
-        if self.format == 1:
-            obj = self._write_format1(record)
-        else:
-            obj = self._write_format2(record)
+        self.f.write(self._serialize(record, False))
+
+    def _serialize(self, record: Record, in_sequence = True) -> str:
+        if self.multi_document or not in_sequence:
+            return yaml.dump(self._record_obj(record), Dumper=YAML_DUMPER, indent=self.indent, sort_keys=False, explicit_start=self.multi_document)
 
-        yaml.dump(obj, self.f, indent=self.indent, sort_keys=False)
+        # A one item sequence per record; these concatenate into the same
+        # document yaml.dump gives for the whole list.
+        return yaml.dump([self._record_obj(record)], Dumper=YAML_DUMPER, indent=self.indent, sort_keys=False)
 
-    def write_all(self, records: list[Record]):
-        recs = []
+    def _write_serialized(self, record_yaml: str):
+        self.f.write(record_yaml)
+        self.__written = True
+
+    def _finish(self):
+        if not self.__written and not self.multi_document:
+            yaml.dump([], self.f, Dumper=YAML_DUMPER, indent=self.indent, sort_keys=False)
+        self.__written = False
+
+    def write_all(self, records):
         for record in records:
-            if self.format == 1:
-                recs.append(self._write_format1(record))
-            else:
-                recs.append(self._write_format2(record))
+            self._write_serialized(self._serialize(record))
 
-        yaml.dump(recs, self.f, indent=self.indent, sort_keys=False)
+        self._finish()
 
 
 class MarcXmlWriter:
-    def __init__(self, f, indent: int | None = None, ignored_tags: list[str] | None = None, xml_declaration=True, use_marc_namespace=False, sort_tags = False) -> None:
+    def __init__(self, f, indent: int | None = None, ignored_tags: list[str] | None = None, xml_declaration=True, use_marc_namespace=False, sort_tags = False, stats: MarcStats | None = None) -> None:
         self.f = f
         self.xml_declaration = xml_declaration
         self.indent = indent
@@ -122,11 +187,27 @@ class MarcXmlWriter:
         self.sort_tags = sort_tags
         if use_marc_namespace:
             self.collection_tag.attrib['xmlns:marc'] = 'http://www.loc.gov/MARC21/slim'
-
-    def write(self, record: Record):
-        record_tag = ET.SubElement(self.collection_tag, 'record')
+        self.__space = None if indent is None else ''.join([" "] * indent)
+        self.__started = False
+        self.__closed = False
+        if stats is not None:
+            instrument_writer(self, stats)
+
+    def __start(self):
+        # Let ElementTree render the declaration and the collection tags so
+        # they come out exactly as when the whole tree is serialized at once.
+        marker = ET.SubElement(self.collection_tag, 'kmmarc-split')
+        document = ET.tostring(self.collection_tag, xml_declaration=self.xml_declaration, encoding="unicode")
+        self.collection_tag.remove(marker)
+
+        head, self.__tail = document.split('<kmmarc-split />')
+        self.f.write(head)
+        self.__started = True
+
+    def _serialize(self, record: Record) -> str:
+        record_tag = ET.Element('record')
         leader_tag = ET.SubElement(record_tag, f'{self.namespace}leader')
-        leader_tag.text = record.leader
+        leader_tag.text = record.leader.marshal()
 
         for field in record.get_control_fields(sorted=self.sort_tags):
             if self.ignored_tags.count(field.tag) > 0:
@@ -150,90 +231,152 @@ class MarcXmlWriter:
                 subfield_tag.attrib['code'] = subfield.code
                 subfield_tag.text = subfield.data
 
+        if self.__space is not None:
+            ET.indent(record_tag, space=self.__space, level=1)
+
+        return ET.tostring(record_tag, encoding="unicode")
+
+    def _write_serialized(self, record_xml: str):
+        if self.__closed:
+            raise Exception("Cannot write to a flushed MarcXmlWriter")
+
+        if not self.__started:
+            self.__start()
+
+        if self.__space is not None:
+            self.f.write(f"\n{self.__space}")
+
+        self.f.write(record_xml)
+
+    def write(self, record: Record):
+        self._write_serialized(self._serialize(record))
+
     def write_all(self, *records):
+        if len(records) == 1 and not isinstance(records[0], Record):
+            records = records[0]
+
         for record in records:
             self.write(record)
 
     def flush(self):
-        if self.indent is not None:
-            ET.indent(self.collection_tag, space=''.join([" "] * self.indent))
+        if self.__closed:
+            return
 
-        self.f.write(ET.tostring(self.collection_tag, xml_declaration=self.xml_declaration, encoding="unicode"))
+        if self.__started:
+            if self.__space is not None:
+                self.f.write("\n")
+            self.f.write(self.__tail)
+        else:
+            self.f.write(ET.tostring(self.collection_tag, xml_declaration=self.xml_declaration, encoding="unicode"))
+
+        self.__closed = True
+
+    def _finish(self):
+        self.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 class MarcStreamWriter:
-    def __init__(self, f: io.FileIO, force_utf8_encoding=False, ignored_tags: list[str] | None = None, sort_tags = False) -> None:
+    def __init__(self, f: io.FileIO, force_utf8_encoding=False, ignored_tags: list[str] | None = None, sort_tags = False, buffer_size = 0, stats: MarcStats | None = None) -> None:
         self.f = f
+        # Records are written as they come unless buffer_size is set, then
+        # they are collected and written buffer_size bytes at a time.
         self.ignored_tags = [] if ignored_tags is None else ignored_tags
         self.force_utf8_encoding = force_utf8_encoding
         self.sort_tags = sort_tags
+        self.buffer_size = buffer_size
+        self.__buf = bytearray()
+        if stats is not None:
+            instrument_writer(self, stats)
 
-    def write(self, record: Record):
-        dir_buf = io.BytesIO()
-        data_buf = io.BytesIO()
-
-        previous = 0
-
+    def _serialize(self, record: Record) -> bytes:
         ldr = record.leader
         encoding = "iso8859-1"
         if self.force_utf8_encoding:
             ldr.char_coding_scheme = "a"
             encoding = 'utf-8'
 
+        directory = []
+        data = []
+        previous = 0
+
         for field in record.get_control_fields(sorted=self.sort_tags):
             if self.ignored_tags.count(field.tag) > 0:
                 continue
 
-            data_buf.write(field.data.encode(encoding))
-            data_buf.write(FT)
-            dir_buf.write(f"{field.tag}{(data_buf.tell() - previous):04d}{previous:05d}".encode('iso8859-1'))
-            previous = data_buf.tell()
+            field_bytes = (field.data + '\x1e').encode(encoding)
+            directory.append(f"{field.tag}{len(field_bytes):04d}{previous:05d}")
+            data.append(field_bytes)
+            previous += len(field_bytes)
 
         for field in record.get_data_fields(sorted=self.sort_tags):
             if self.ignored_tags.count(field.tag) > 0:
                 continue
 
-            data_buf.write(field.ind1.encode(encoding))
-            data_buf.write(field.ind2.encode(encoding))
-            for subfield in field.subfields:
-                data_buf.write(US)
-                data_buf.write(subfield.code.encode(encoding))
-                data_buf.write(subfield.data.encode(encoding))
-            data_buf.write(FT)
-            dir_buf.write(f"{field.tag}{(data_buf.tell() - previous):04d}{previous:05d}".encode('iso8859-1'))
-            previous = data_buf.tell()
-
-        dir_buf.write(FT)
-
-        base_address = 24 + dir_buf.tell()
-        ldr.base_address_of_data = base_address
-        record_len = ldr.base_address_of_data + data_buf.tell() + 1
-        ldr.record_length = record_len
-
-        self.f.write(f"{ldr.record_length:05d}".encode('iso8859-1'))
-        self.f.write(f"{ldr.record_status}".encode('iso8859-1'))
-        self.f.write(f"{ldr.type_of_record}".encode('iso8859-1'))
-        self.f.write(f"{''.join(ldr.impl_defined1)}".encode('iso8859-1'))
-        self.f.write(f"{ldr.char_coding_scheme}".encode('iso8859-1'))
-        self.f.write(f"{str(ldr.indicator_count)}".encode('iso8859-1'))
-        self.f.write(f"{str(ldr.subfield_length)}".encode('iso8859-1'))
-        self.f.write(f"{ldr.base_address_of_data:05d}".encode('iso8859-1'))
-        self.f.write(f"{''.join(ldr.impl_defined2)}".encode('iso8859-1'))
-        self.f.write(f"{''.join(ldr.entry_map)}".encode('iso8859-1'))
-
-        dir_buf.seek(0)
-        data_buf.seek(0)
-        self.f.write(dir_buf.read())
-        self.f.write(data_buf.read())
-        self.f.write(RT)
+            subfields = ''.join([f"\x1f{subfield.code}{subfield.data}" for subfield in field.subfields])
+            field_bytes = f"{field.ind1}{field.ind2}{subfields}\x1e".encode(encoding)
+            directory.append(f"{field.tag}{len(field_bytes):04d}{previous:05d}")
+            data.append(field_bytes)
+            previous += len(field_bytes)
+
+        directory.append('\x1e')
+        directory_bytes = ''.join(directory).encode('iso8859-1')
+
+        ldr.base_address_of_data = 24 + len(directory_bytes)
+        ldr.record_length = ldr.base_address_of_data + previous + 1
+
+        data.append(RT)
+        return bytes(ldr) + directory_bytes + b''.join(data)
+
+    def _write_serialized(self, record_bytes: bytes):
+        if self.buffer_size <= 0:
+            self.f.write(record_bytes)
+            return
+
+        self.__buf += record_bytes
+        if len(self.__buf) >= self.buffer_size:
+            self.flush()
+
+    def write(self, record: Record):
+        self._write_serialized(self._serialize(record))
 
     def write_all(self, *records):
+        if len(records) == 1 and not isinstance(records[0], Record):
+            records = records[0]
+
         for record in records:
             self.write(record)
 
+        self.flush()
+
+    def flush(self):
+        if len(self.__buf) > 0:
+            self.f.write(self.__buf)
+            self.__buf = bytearray()
+
+    def _finish(self):
+        self.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
 
 def write_marc_json_to_path(path: str, records: list[Record] | Record, encoding = "utf-8", writer_getter = None):
-    with open(path, "w", encoding=encoding) as f:
+    with open_path(path, "w", encoding=encoding) as f:
         writer = writer_getter(f) if writer_getter is not None else MarcJsonWriter(f)
         if isinstance(records, Record):
             writer.write(records)
@@ -241,8 +384,17 @@ def write_marc_json_to_path(path: str, records: list[Record] | Record, encoding
             writer.write_all(records)
 
 
+def write_marc_json_lines_to_path(path: str, records: list[Record] | Record, encoding = "utf-8", writer_getter = None):
+    with open_path(path, "w", encoding=encoding) as f:
+        writer = writer_getter(f) if writer_getter is not None else MarcJsonLinesWriter(f)
+        if isinstance(records, Record):
+            writer.write(records)
+        else:
+            writer.write_all(records)
+
+
 def write_marc_yaml_to_path(path: str, records: list[Record] | Record, encoding = "utf-8", writer_getter = None):
-    with open(path, "w", encoding=encoding) as f:
+    with open_path(path, "w", encoding=encoding) as f:
         writer = writer_getter(f) if writer_getter is not None else MarcYamlWriter(f)
         if isinstance(records, Record):
             writer.write(records)
@@ -251,7 +403,7 @@ def write_marc_yaml_to_path(path: str, records: list[Record] | Record, encoding
 
 
 def write_marc_xml_to_path(path: str, records: list[Record] | Record, encoding = "utf-8", writer_getter = None):
-    with open(path, "w", encoding=encoding) as f:
+    with open_path(path, "w", encoding=encoding) as f:
         writer = writer_getter(f) if writer_getter is not None else MarcXmlWriter(f)
         if isinstance(records, Record):
             writer.write(records)
@@ -262,9 +414,11 @@ def write_marc_xml_to_path(path: str, records: list[Record] | Record, encoding =
 
 
 def write_marc_stream_to_path(path: str, records: list[Record] | Record, writer_getter = None):
-    with open(path, "wb") as f:
-        writer = writer_getter(f) if writer_getter is not None else MarcStreamWriter(f)
+    with open_path(path, "wb") as f:
+        writer = writer_getter(f) if writer_getter is not None else MarcStreamWriter(f, buffer_size=1024 * 1024)
         if isinstance(records, Record):
             writer.write(records)
         else:
-            writer.write_all(records)
\ No newline at end of file
+            writer.write_all(records)
+
+        writer.flush()
\ No newline at end of file
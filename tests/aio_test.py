@@ -0,0 +1,92 @@
+import asyncio
+import io
+import unittest
+
+from kmmarc.aio import AsyncMarcStreamReader, AsyncMarcStreamWriter, AsyncMarcXmlReader
+from kmmarc.reader import MarcStreamReader
+from tests.samples import make_iso_bytes, make_records
+from tests.xml_reader_test import make_collection
+
+
+class TestAsyncStreams(unittest.IsolatedAsyncioTestCase):
+    async def serve(self, payload: bytes, chunk_size = 7):
+        # Sends the payload in small pieces, so records arrive split across reads.
+        async def handle(reader, writer):
+            for i in range(0, len(payload), chunk_size):
+                writer.write(payload[i:i + chunk_size])
+                await writer.drain()
+                await asyncio.sleep(0)
+            writer.close()
+            await writer.wait_closed()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        self.addCleanup(writer.close)
+        return reader
+
+    async def test_stream_reader(self):
+        records = make_records(50)
+        stream = await self.serve(make_iso_bytes(records))
+
+        received = [record async for record in AsyncMarcStreamReader(stream)]
+        self.assertEqual([str(r) for r in received], [str(r) for r in records])
+
+    async def test_stream_reader_lazy(self):
+        records = make_records(5)
+        stream = await self.serve(make_iso_bytes(records, force_utf8_encoding=True), chunk_size=1024)
+
+        reader = AsyncMarcStreamReader(stream, lazy=True)
+        record = await reader.read_next()
+        self.assertEqual(record['200'][0]['a'][0].data, "Título 0")
+        self.assertEqual(len([r async for r in reader]), 4)
+        self.assertIsNone(await reader.read_next())
+
+    async def test_stream_reader_truncated(self):
+        stream = await self.serve(make_iso_bytes(make_records(2))[:-10])
+
+        reader = AsyncMarcStreamReader(stream)
+        self.assertIsNotNone(await reader.read_next())
+        with self.assertRaises(Exception):
+            await reader.read_next()
+
+    async def test_xml_reader(self):
+        stream = await self.serve(make_collection(20, prefix='marc:', xmlns=' xmlns:marc="http://www.loc.gov/MARC21/slim"').encode('utf-8'), chunk_size=64)
+
+        received = [record async for record in AsyncMarcXmlReader(stream, chunk_size=16)]
+        self.assertEqual([r['001'][0].data for r in received], [f"PT{n}" for n in range(20)])
+        self.assertEqual(received[-1]['200'][0]['a'][0].data, "Título 19")
+
+    async def test_stream_writer(self):
+        records = make_records(200)
+        received = asyncio.get_running_loop().create_future()
+
+        async def handle(reader, writer):
+            received.set_result(await reader.read())
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        # A tiny high-water mark makes drain() wait on the peer.
+        writer.transport.set_write_buffer_limits(high=256)
+
+        async def produce():
+            for record in records:
+                yield record
+                await asyncio.sleep(0)
+
+        async with AsyncMarcStreamWriter(writer, buffer_size=512) as marc_writer:
+            await marc_writer.write_all(produce())
+        writer.close()
+        await writer.wait_closed()
+
+        data = await received
+        server.close()
+        await server.wait_closed()
+
+        self.assertEqual(data, make_iso_bytes(records))
+        parsed = list(MarcStreamReader(io.BytesIO(data)))
+        self.assertEqual(len(parsed), 200)
@@ -0,0 +1,28 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from benchmarks import memory_bench, stream_reader_bench
+
+
+class TestBenchmarks(unittest.TestCase):
+    # The benchmarks patch or subclass reader internals, so they are run on
+    # a few records to catch them falling out of step with the reader.
+    def run_main(self, module, *args) -> str:
+        out = io.StringIO()
+        with mock.patch('sys.argv', [module.__name__, *args]), contextlib.redirect_stdout(out):
+            module.main()
+        return out.getvalue()
+
+    def test_memory_bench(self):
+        lines = self.run_main(memory_bench, "--records", "20").splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ["dict", "slots", "packed"])
+
+    def test_stream_reader_bench(self):
+        lines = self.run_main(stream_reader_bench, "--records", "20").splitlines()
+        self.assertEqual([line.split()[:2] for line in lines], [["bytewise", "20"], ["split", "20"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import importlib.util
+import unittest
+
+from kmmarc.columnar import StringColumn, columnar_from_marc_stream, columnar_from_marc_xml
+from kmmarc.marc import DataField, SubField
+from kmmarc.reader import MarcStreamReader
+from kmmarc.writer import MarcXmlWriter
+from tests.samples import make_records, make_iso_bytes
+
+
+def expected_rows(records):
+    rows = []
+    for record_n, record in enumerate(records):
+        record_id = record['001'][0].data
+        for field_n, field in enumerate(record):
+            if isinstance(field, DataField):
+                for subfield in field.subfields:
+                    rows.append((record_n, field_n, record_id, field.tag, field.ind1, field.ind2, subfield.code, subfield.data))
+            else:
+                rows.append((record_n, field_n, record_id, field.tag, '', '', '', field.data))
+    return rows
+
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.records = make_records(5)
+        field = DataField('606', ' ', ' ')
+        field.subfields.append(SubField('a', "Ciência"))
+        field.subfields.append(SubField('x', ""))
+        self.records[2].data_fields.append(field)
+
+    def test_string_column(self):
+        column = StringColumn()
+        for value in ("a", "", "Título"):
+            column.append(value.encode('utf-8'))
+
+        self.assertEqual(len(column), 3)
+        self.assertEqual(list(column), ["a", "", "Título"])
+        self.assertEqual(column[-1], "Título")
+        self.assertEqual(list(column.offsets), [0, 1, 1, 8])
+
+    def test_iso_matches_reader(self):
+        for force_utf8_encoding in (False, True):
+            data = make_iso_bytes(self.records, force_utf8_encoding=force_utf8_encoding)
+
+            table = columnar_from_marc_stream(io.BytesIO(data))
+            records = list(MarcStreamReader(io.BytesIO(data)))
+
+            self.assertEqual(table.record_count, 5)
+            self.assertEqual(list(table), expected_rows(records))
+
+    def test_malformed_fields_match_reader(self):
+        field = DataField('300', ' ', ' ')
+        field.subfields.append(SubField('a', "x\x1ey"))
+        field.subfields.append(SubField('\x1f', "z"))
+        self.records[1].data_fields.append(field)
+
+        data = make_iso_bytes(self.records)
+        table = columnar_from_marc_stream(io.BytesIO(data))
+        self.assertEqual(list(table), expected_rows(MarcStreamReader(io.BytesIO(data))))
+
+    def test_xml_matches_reader(self):
+        f = io.StringIO()
+        with MarcXmlWriter(f, indent=2, use_marc_namespace=True) as writer:
+            writer.write_all(self.records)
+
+        table = columnar_from_marc_xml(io.BytesIO(f.getvalue().encode('utf-8')))
+        self.assertEqual(list(table), expected_rows(self.records))
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_to_numpy(self):
+        table = columnar_from_marc_stream(io.BytesIO(make_iso_bytes(self.records)))
+        columns = table.to_numpy()
+
+        offsets, data = columns['value']
+        self.assertEqual(len(offsets), len(table) + 1)
+        self.assertEqual(bytes(data[offsets[3]:offsets[4]]).decode('utf-8'), table.value[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+
+from kmmarc.compression import open_path, detect_compression, strip_compression_extension
+from kmmarc.convert import convert, detect_format
+from kmmarc.reader import (
+    read_marc_stream_from_path, read_marc_xml_from_path, read_marc_json_from_path, read_marc_json_lines_from_path,
+    read_marc_yaml_from_path, read_marc_mmap_from_path, read_marc_stream_parallel
+)
+from kmmarc.writer import (
+    write_marc_stream_to_path, write_marc_xml_to_path, write_marc_json_to_path, write_marc_json_lines_to_path,
+    write_marc_yaml_to_path
+)
+from tests.samples import make_records, make_iso_bytes
+
+
+def control_numbers(records) -> list[str]:
+    return [record['001'][0].data for record in records]
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.records = make_records(40)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_round_trip_every_format_and_compression(self):
+        formats = (
+            ("mrc", write_marc_stream_to_path, read_marc_stream_from_path),
+            ("xml", write_marc_xml_to_path, read_marc_xml_from_path),
+            ("json", write_marc_json_to_path, read_marc_json_from_path),
+            ("jsonl", write_marc_json_lines_to_path, read_marc_json_lines_from_path),
+            ("yaml", write_marc_yaml_to_path, read_marc_yaml_from_path),
+        )
+        for extension, write, read in formats:
+            for compression in ("gz", "bz2", "xz"):
+                path = self.path(f"records.{extension}.{compression}")
+                write(path, self.records)
+                self.assertEqual(detect_compression(path), {'gz': 'gzip', 'bz2': 'bz2', 'xz': 'xz'}[compression])
+                self.assertEqual(control_numbers(read(path, parse_all=True)), control_numbers(self.records), path)
+
+    def test_compressed_stream_matches_plain_bytes(self):
+        path = self.path("records.mrc.gz")
+        write_marc_stream_to_path(path, self.records)
+        with gzip.open(path, "rb") as f:
+            self.assertEqual(f.read(), make_iso_bytes(self.records))
+
+    def test_multi_member_gzip(self):
+        path = self.path("records.mrc.gz")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(make_iso_bytes(self.records[:15])))
+            f.write(gzip.compress(make_iso_bytes(self.records[15:])))
+
+        self.assertEqual(control_numbers(read_marc_stream_from_path(path)), control_numbers(self.records))
+
+    def test_detects_by_content(self):
+        path = self.path("records.mrc")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(make_iso_bytes(self.records)))
+        self.assertEqual(control_numbers(read_marc_stream_from_path(path)), control_numbers(self.records))
+
+        path = self.path("plain.mrc.gz")
+        with open(path, "wb") as f:
+            f.write(make_iso_bytes(self.records))
+        self.assertIsNone(detect_compression(path))
+        self.assertEqual(control_numbers(read_marc_stream_from_path(path)), control_numbers(self.records))
+
+    def test_format_detection_ignores_compression(self):
+        self.assertEqual(strip_compression_extension("records.mrc.gz"), "records.mrc")
+        self.assertEqual(strip_compression_extension("records.mrc"), "records.mrc")
+        self.assertEqual(detect_format("records.mrc.gz"), 'iso')
+        self.assertEqual(detect_format("records.xml.bz2"), 'xml')
+        self.assertEqual(detect_format("records.jsonl.xz"), 'jsonl')
+
+    def test_convert(self):
+        path = self.path("records.mrc.gz")
+        write_marc_stream_to_path(path, self.records)
+
+        for name in ("records.xml.bz2", "records.jsonl.xz", "records.jsonl", "back.mrc.gz"):
+            self.assertEqual(convert(path, self.path(name), workers=2, chunk_size=1024, batch_size=7), 40)
+            path = self.path(name)
+
+        with gzip.open(path, "rb") as f:
+            self.assertEqual(f.read(), make_iso_bytes(self.records))
+
+    def test_parallel_reader(self):
+        path = self.path("records.mrc.xz")
+        write_marc_stream_to_path(path, self.records)
+        records = list(read_marc_stream_parallel(path, workers=2, chunk_size=1024))
+        self.assertEqual(control_numbers(records), control_numbers(self.records))
+
+    def test_mmap_refuses_compressed(self):
+        path = self.path("records.mrc.gz")
+        write_marc_stream_to_path(path, self.records)
+        with self.assertRaises(Exception):
+            read_marc_mmap_from_path(path)
+
+    def test_early_close_stops_thread(self):
+        path = self.path("records.mrc.gz")
+        write_marc_stream_to_path(path, make_records(2000))
+        threads = threading.active_count()
+
+        with open_path(path, "rb", buffering=64) as f:
+            self.assertEqual(len(f.read(100)), 100)
+
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_text_mode(self):
+        path = self.path("notes.txt.bz2")
+        with open_path(path, "w", encoding="utf-8") as f:
+            f.write("História\n")
+        with open_path(path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "História\n")
@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from kmmarc import main
+from kmmarc.convert import convert
+from kmmarc.reader import read_marc_stream_from_path, read_marc_xml_from_path, read_marc_json_lines_from_path
+from kmmarc.writer import MarcJsonWriter, MarcXmlWriter, MarcYamlWriter, write_marc_stream_to_path
+from tests.samples import make_records
+
+
+class TestConvert(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.records = make_records(30)
+        self.iso_path = self.path("records.mrc")
+        write_marc_stream_to_path(self.iso_path, self.records)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def read(self, path: str, mode = "r"):
+        with open(path, mode) as f:
+            return f.read()
+
+    def test_matches_serial_writers(self):
+        for name, writer_class, options in (
+            ("records.xml", MarcXmlWriter, {'indent': 2}),
+            ("records.json", MarcJsonWriter, {'indent': 2}),
+            ("records.yaml", MarcYamlWriter, {}),
+        ):
+            out_path = self.path(name)
+            self.assertEqual(convert(self.iso_path, out_path, workers=2, chunk_size=1024, writer_options=options), 30)
+
+            expected = io.StringIO()
+            writer = writer_class(expected, **options)
+            writer.write_all(read_marc_stream_from_path(self.iso_path))
+            if isinstance(writer, MarcXmlWriter):
+                writer.flush()
+
+            self.assertEqual(self.read(out_path), expected.getvalue())
+
+    def test_round_trip_through_every_format(self):
+        path = self.iso_path
+        for name in ("records.jsonl", "records.xml", "records.yaml", "records.json", "back.mrc"):
+            convert(path, self.path(name), workers=2, chunk_size=1024, batch_size=7)
+            path = self.path(name)
+
+        self.assertEqual(self.read(path, "rb"), self.read(self.iso_path, "rb"))
+
+    def test_cli(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["convert", self.iso_path, self.path("records.xml"), "--workers", "2"])
+
+        self.assertEqual(out.getvalue().strip(), "Converted 30 records")
+        self.assertEqual(len(list(read_marc_xml_from_path(self.path("records.xml")))), 30)
+
+        main(["convert", self.path("records.xml"), self.path("out.txt"), "--to", "jsonl", "--workers", "1"])
+        self.assertEqual(len(list(read_marc_json_lines_from_path(self.path("out.txt")))), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from kmmarc.dedup import DuplicateIndex, fingerprint, normalize, parse_key
+from kmmarc.marc import ControlField, DataField, SubField
+from tests.samples import make_record, make_records
+
+
+class TestDedup(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize("História  de Portugal!"), normalize("historia de portugal"))
+        self.assertEqual(normalize("978-972-1234-5"), "97897212345")
+        self.assertEqual(normalize(None), "")
+
+    def test_parse_key(self):
+        self.assertEqual(parse_key("010$a+200$a+700"), [('010', 'a'), ('200', 'a'), ('700', None)])
+        self.assertEqual(parse_key(["200$a"]), [('200', 'a')])
+        with self.assertRaises(Exception):
+            parse_key("20$a")
+
+    def test_whole_record_fingerprint(self):
+        a = make_record("A1", title="História de Portugal")
+        b = make_record("B7", title="historia de portugal.")
+        c = make_record("A1", title="História de Espanha")
+
+        self.assertEqual(fingerprint(a), fingerprint(b))
+        self.assertNotEqual(fingerprint(a), fingerprint(c))
+
+        b.control_fields.append(ControlField('005', "20240101"))
+        self.assertEqual(fingerprint(a), fingerprint(b))
+
+        field = DataField('300', ' ', ' ')
+        field.subfields.append(SubField('a', "200 p."))
+        b.data_fields.append(field)
+        self.assertNotEqual(fingerprint(a), fingerprint(b))
+        self.assertEqual(fingerprint(a, "200$a+700$a"), fingerprint(b, "200$a+700$a"))
+
+    def test_key_fingerprint(self):
+        a = make_record("A1", author="Silva")
+        b = make_record("B1", author="Sousa")
+
+        self.assertEqual(fingerprint(a, "200$a"), fingerprint(b, "200$a"))
+        self.assertNotEqual(fingerprint(a, "200$a+700$a"), fingerprint(b, "200$a+700$a"))
+        self.assertIsNone(fingerprint(a, "010$a"))
+
+        a.data_fields[0] = a.data_fields[0].pack()
+        self.assertEqual(fingerprint(a, "200$a"), fingerprint(b, "200$a"))
+
+    def test_find_duplicates(self):
+        records = make_records(5)
+        records.append(make_record("C2", title="Título 2"))
+        records.append(make_record("C4", title="titulo 4"))
+        records.append(make_record("C5", title="título 2"))
+
+        with DuplicateIndex(key="200$a") as index:
+            duplicates = list(index.find_duplicates(iter(records), batch_size=3))
+            self.assertEqual(duplicates, [("C2", ["PT000002"]), ("C4", ["PT000004"]), ("C5", ["PT000002", "C2"])])
+            self.assertEqual(sorted(index.groups()), [["PT000002", "C2", "C5"], ["PT000004", "C4"]])
+
+    def test_index_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dedup.sqlite")
+
+            with DuplicateIndex(path, key="200$a") as index:
+                self.assertEqual(index.add(make_record("A1")), [])
+
+            with DuplicateIndex(path, key="200$a") as index:
+                self.assertEqual(index.add(make_record("B1")), ["A1"])
+                self.assertEqual(len(index), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from kmmarc import main
+from kmmarc.diff import apply_change_set, diff_marc_streams, diff_records, patch_marc_stream, read_change_set, write_change_set
+from kmmarc.marc import ControlField, DataField, SubField
+from kmmarc.reader import read_marc_stream_from_path
+from kmmarc.writer import write_marc_stream_to_path
+from tests.samples import make_record, make_records
+
+
+class TestDiff(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old = make_records(10)
+        self.new = make_records(10)
+
+        self.new[5].data_fields[0].subfields[0].data = "Título novo"
+        field = DataField('606', ' ', ' ')
+        field.subfields.append(SubField('a', "História"))
+        self.new[6].data_fields.append(field)
+        self.new[7].control_fields.append(ControlField('005', "20240101"))
+        self.new[8].leader.record_status = 'c'
+        del self.new[3]
+        self.new.append(make_record("PT999999", title="Registo novo"))
+
+        self.old_path = self.path("old.mrc")
+        self.new_path = self.path("new.mrc")
+        write_marc_stream_to_path(self.old_path, self.old)
+        write_marc_stream_to_path(self.new_path, self.new)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_diff_records(self):
+        self.assertIsNone(diff_records(self.old[0], self.new[0]))
+
+        changes = diff_records(self.old[5], self.new[4])
+        self.assertEqual(list(changes['fields']), ['200'])
+        self.assertEqual(changes['fields']['200']['old'][0]['200']['subfields'][0], {'a': "Título 5"})
+        self.assertEqual(changes['fields']['200']['new'][0]['200']['subfields'][0], {'a': "Título novo"})
+
+    def test_diff_marc_streams(self):
+        changes = list(diff_marc_streams(self.old_path, self.new_path))
+        self.assertEqual([(change['op'], change['id']) for change in changes], [
+            ('modified', "PT000005"),
+            ('modified', "PT000006"),
+            ('modified', "PT000007"),
+            ('modified', "PT000008"),
+            ('added', "PT999999"),
+            ('removed', "PT000003"),
+        ])
+        self.assertEqual(list(changes[1]['fields']), ['606'])
+        self.assertEqual(changes[1]['fields']['606']['old'], [])
+        self.assertEqual(list(changes[2]['fields']), ['005'])
+        self.assertEqual(changes[3]['leader']['new'][5], 'c')
+        self.assertNotIn('fields', changes[3])
+
+        self.assertEqual(list(diff_marc_streams(self.old_path, self.old_path)), [])
+
+    def test_apply_change_set(self):
+        changes_path = self.path("changes.jsonl")
+        counts = write_change_set(changes_path, diff_marc_streams(self.old_path, self.new_path))
+        self.assertEqual(counts, {'added': 1, 'removed': 1, 'modified': 4})
+
+        patched = list(apply_change_set(read_marc_stream_from_path(self.old_path), read_change_set(changes_path)))
+        self.assertEqual(len(patched), len(self.new))
+        for record, expected in zip(patched, self.new):
+            self.assertIsNone(diff_records(record, expected))
+
+    def test_patch_missing_base(self):
+        changes_path = self.path("changes.jsonl")
+        write_change_set(changes_path, [])
+        with self.assertRaises(FileNotFoundError):
+            patch_marc_stream(self.path("missing.mrc"), changes_path, self.path("patched.mrc"))
+        self.assertFalse(os.path.exists(self.path("patched.mrc")))
+
+    def test_cli(self):
+        changes_path = self.path("changes.jsonl")
+        out_path = self.path("patched.mrc")
+        main(["diff", self.old_path, self.new_path, changes_path])
+        main(["patch", self.old_path, changes_path, out_path])
+
+        patched = list(read_marc_stream_from_path(out_path))
+        self.assertEqual([str(record) for record in patched], [str(record) for record in self.new])
+        self.assertEqual(list(diff_marc_streams(out_path, self.new_path)), [])
@@ -0,0 +1,64 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from kmmarc.reader import MarcJsonReader, MarcJsonLinesReader, read_marc_json_lines_from_path, split_marc_json_lines
+from kmmarc.writer import MarcJsonWriter, MarcJsonLinesWriter, write_marc_json_lines_to_path
+from tests.samples import make_records
+
+
+class TestJsonLines(unittest.TestCase):
+    def test_round_trip(self):
+        records = make_records(4)
+
+        for layout_format in (1, 2):
+            f = io.StringIO()
+            MarcJsonLinesWriter(f, layout_format=layout_format).write_all(iter(records))
+
+            self.assertEqual(len(f.getvalue().splitlines()), 4)
+
+            data = io.BytesIO(f.getvalue().encode("utf-8"))
+            self.assertEqual([str(r) for r in MarcJsonLinesReader(data)], [str(r) for r in records])
+
+    def test_splits_cover_every_record_once(self):
+        records = make_records(25)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.jsonl")
+            write_marc_json_lines_to_path(path, records)
+
+            for count in (1, 2, 3, 7, 40):
+                read = []
+                for start, end in split_marc_json_lines(path, count):
+                    read.extend(r['001'][0].data for r in read_marc_json_lines_from_path(path, start=start, end=end))
+
+                self.assertEqual(read, [r['001'][0].data for r in records])
+
+    def test_write_all_matches_json_dump(self):
+        records = make_records(3)
+
+        for indent in (None, 0, 2):
+            for layout_format in (1, 2):
+                writer = MarcJsonWriter(io.StringIO(), layout_format=layout_format, indent=indent)
+                expected = json.dumps([writer._record_obj(r) for r in records], indent=indent)
+
+                writer.write_all(iter(records))
+                self.assertEqual(writer.f.getvalue(), expected)
+
+                writer = MarcJsonWriter(io.StringIO(), indent=indent)
+                writer.write_all([])
+                self.assertEqual(writer.f.getvalue(), "[]")
+
+    def test_json_round_trip(self):
+        records = make_records(2)
+        f = io.StringIO()
+        MarcJsonWriter(f, indent=2).write_all(records)
+        f.seek(0)
+
+        self.assertEqual([str(r) for r in MarcJsonReader(f)], [str(r) for r in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
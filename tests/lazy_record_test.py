@@ -0,0 +1,76 @@
+import io
+import pickle
+import os
+import tempfile
+import unittest
+
+from kmmarc.marc import LazyRecord, ControlField, DataField, SubField
+from kmmarc.reader import MarcStreamReader, read_marc_mmap_from_path
+from tests.samples import make_records, make_iso_bytes
+
+
+class TestLazyRecord(unittest.TestCase):
+    def setUp(self):
+        self.data = make_iso_bytes(make_records(5))
+
+    def test_matches_eager_records(self):
+        eager = [str(r) for r in MarcStreamReader(io.BytesIO(self.data))]
+        lazy = list(MarcStreamReader(io.BytesIO(self.data), lazy=True))
+
+        self.assertTrue(all(isinstance(r, LazyRecord) for r in lazy))
+        self.assertEqual([str(r) for r in lazy], eager)
+
+    def test_decodes_only_requested_fields(self):
+        record = MarcStreamReader(io.BytesIO(self.data), lazy=True).read_next()
+        fields = record._LazyRecord__fields
+
+        self.assertTrue('700' in record)
+        self.assertFalse('300' in record)
+        self.assertTrue(all(field is None for field in fields))
+
+        self.assertEqual(record['200'][0]['a'][0].data, "Título 0")
+        self.assertIsNone(record['300'])
+        self.assertEqual(sum(field is not None for field in fields), 1)
+
+    def test_iteration(self):
+        record = MarcStreamReader(io.BytesIO(self.data), lazy=True).read_next()
+
+        self.assertEqual([field.tag for field in record], ['001', '200', '700'])
+        self.assertFalse(record.materialized)
+
+    def test_mutation_after_materialize(self):
+        record = MarcStreamReader(io.BytesIO(self.data), lazy=True).read_next()
+
+        field = DataField('300', ' ', ' ')
+        field.subfields.append(SubField('a', "Notes"))
+        record.data_fields.append(field)
+        record.control_fields.append(ControlField('005', "20240101"))
+
+        self.assertEqual(record['300'][0]['a'][0].data, "Notes")
+        self.assertEqual([f.tag for f in record], ['001', '005', '200', '700', '300'])
+
+    def test_pickle(self):
+        record = MarcStreamReader(io.BytesIO(self.data), lazy=True).read_next()
+        copy = pickle.loads(pickle.dumps(record))
+
+        self.assertIsInstance(copy, LazyRecord)
+        self.assertEqual(str(copy), str(record))
+
+        record.data_fields.pop()
+        self.assertEqual(str(pickle.loads(pickle.dumps(record))), str(record))
+
+    def test_mmap_lazy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.mrc")
+            with open(path, "wb") as f:
+                f.write(self.data)
+
+            reader = read_marc_mmap_from_path(path, lazy=True)
+            record = reader[2]
+            reader.close()
+
+        self.assertEqual(record['001'][0].data, "PT000002")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import pickle
+import unittest
+
+from kmmarc.marc import Leader
+from kmmarc.reader import MarcStreamReader
+from tests.samples import make_iso_bytes, make_records
+
+LEADER = "01028nam0 2200277   450 "
+
+
+class TestLeader(unittest.TestCase):
+    def test_positions(self):
+        leader = Leader(LEADER)
+        self.assertEqual(leader.record_length, 1028)
+        self.assertEqual(leader.record_status, 'n')
+        self.assertEqual(leader.type_of_record, 'a')
+        self.assertEqual(leader.impl_defined1, 'm0')
+        self.assertEqual(leader.char_coding_scheme, ' ')
+        self.assertEqual(leader.indicator_count, 2)
+        self.assertEqual(leader.subfield_length, 2)
+        self.assertEqual(leader.base_address_of_data, 277)
+        self.assertEqual(leader.impl_defined2, '   ')
+        self.assertEqual(leader.entry_map, '450 ')
+
+        self.assertEqual(leader[6], 'a')
+        self.assertEqual(leader['5'], 'n')
+        self.assertEqual(leader[6:8], 'am')
+        self.assertIsNone(leader[24])
+        self.assertIsNone(leader['x'])
+
+    def test_set_positions(self):
+        leader = Leader(LEADER)
+        leader.record_status = 'c'
+        leader.char_coding_scheme = 'a'
+        leader.record_length = 99
+        leader.base_address_of_data = 61
+        self.assertEqual(leader.marshal(), "00099cam0a2200061   450 ")
+        self.assertEqual(bytes(leader), b"00099cam0a2200061   450 ")
+
+        with self.assertRaises(Exception):
+            leader.record_length = 100000
+        with self.assertRaises(Exception):
+            leader.record_status = 'cc'
+        self.assertEqual(leader.marshal(), "00099cam0a2200061   450 ")
+
+    def test_parse(self):
+        self.assertEqual(Leader(LEADER.encode('ascii')).marshal(), LEADER)
+        self.assertEqual(Leader(bytearray(LEADER.encode('ascii'))).marshal(), LEADER)
+        self.assertEqual(Leader(LEADER[:-1]).marshal(), LEADER)
+        self.assertEqual(Leader(LEADER + "extra").marshal(), LEADER)
+        self.assertEqual(Leader(" 1028nam0 2200277   450 ").record_length, 1028)
+        self.assertEqual(len(Leader().marshal()), 24)
+
+        with self.assertRaises(ValueError):
+            Leader("0102xnam0 2200277   450 ")
+
+    def test_copies_and_pickles(self):
+        raw = bytearray(LEADER.encode('ascii'))
+        leader = Leader(raw)
+        raw[5:6] = b'd'
+        self.assertEqual(leader.record_status, 'n')
+
+        restored = pickle.loads(pickle.dumps(leader))
+        self.assertEqual(restored.marshal(), LEADER)
+
+    def test_reader_and_writer(self):
+        records = make_records(3)
+        data = make_iso_bytes(records)
+        parsed = list(MarcStreamReader(io.BytesIO(data)))
+        self.assertEqual(parsed[0].leader.marshal(), data[0:24].decode('ascii'))
+        self.assertEqual(parsed[0].leader.record_length, data.index(b'\x1d') + 1)
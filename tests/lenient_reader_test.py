@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import unittest
+
+from kmmarc.reader import MarcStreamReader, ReadError, read_marc_stream_from_path
+from tests.samples import make_iso_bytes, make_records
+
+
+class TestLenientReader(unittest.TestCase):
+    def setUp(self):
+        self.records = make_records(6)
+        self.chunks = [make_iso_bytes([record]) for record in self.records]
+
+    def read(self, data, **kwargs):
+        reader = MarcStreamReader(io.BytesIO(data), streaming=True, lenient=True, **kwargs)
+        return [record['001'][0].data for record in reader], reader.errors
+
+    def test_clean_stream(self):
+        ids, errors = self.read(b''.join(self.chunks))
+        self.assertEqual(ids, [f"PT{i:06d}" for i in range(6)])
+        self.assertEqual(errors, [])
+
+    def test_garbage_between_records(self):
+        data = self.chunks[0] + b'garbage\x1d' + b''.join(self.chunks[1:])
+        with self.assertRaises(Exception):
+            list(MarcStreamReader(io.BytesIO(data)))
+
+        ids, errors = self.read(data)
+        self.assertEqual(len(ids), 6)
+        start = len(self.chunks[0])
+        self.assertEqual(errors, [ReadError(start, start + 8, "Invalid record length or base address in leader")])
+
+    def test_leader_across_window_boundary(self):
+        # The first good leader ends just past the first 64 KiB read.
+        for k in (20, 21, 22, 23, 24, 25):
+            garbage = b'X' * (65536 - k) + b'\x1d'
+            ids, errors = self.read(garbage + b''.join(self.chunks[0:3]))
+            self.assertEqual(ids, ["PT000000", "PT000001", "PT000002"], k)
+            self.assertEqual([(e.start, e.end) for e in errors], [(0, len(garbage))], k)
+
+    def test_wrong_record_length(self):
+        bad = bytearray(self.chunks[1])
+        bad[0:5] = b'%05d' % (len(bad) + 7)
+        data = self.chunks[0] + bad + b''.join(self.chunks[2:])
+
+        ids, errors = self.read(data)
+        self.assertEqual(ids, ["PT000000"] + [f"PT{i:06d}" for i in range(2, 6)])
+        start = len(self.chunks[0])
+        self.assertEqual(errors, [ReadError(start, start + len(bad), "Expected record terminator at the end of record")])
+
+    def test_bad_directory_costs_one_record(self):
+        bad = bytearray(self.chunks[2])
+        bad[24 + 3:24 + 7] = b'12x4'
+        data = b''.join(self.chunks[:2]) + bad + b''.join(self.chunks[3:])
+
+        sink = []
+        ids, errors = self.read(data, error_sink=sink.append)
+        self.assertEqual(ids, ["PT000000", "PT000001", "PT000003", "PT000004", "PT000005"])
+        self.assertEqual(errors, [])
+        start = len(self.chunks[0]) + len(self.chunks[1])
+        self.assertEqual([(e.start, e.end) for e in sink], [(start, start + len(bad))])
+        self.assertIn("bytes", str(sink[0]))
+
+    def test_truncated_stream(self):
+        data = b''.join(self.chunks)[:-10]
+        ids, errors = self.read(data)
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].end, len(data))
+        self.assertEqual(errors[0].reason, "Unexpected end of stream while reading record")
+
+        ids, errors = self.read(self.chunks[0] + b'0012')
+        self.assertEqual((len(ids), errors[0].reason), (1, "Unexpected end of stream while reading leader"))
+
+    def test_from_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.mrc")
+            with open(path, "wb") as f:
+                f.write(b'\x00\x00' + b''.join(self.chunks))
+
+            errors = []
+            records = read_marc_stream_from_path(path, parse_all=True, lenient=True, error_sink=errors.append)
+            self.assertEqual(len(records), 6)
+            self.assertEqual([(e.start, e.end) for e in errors], [(0, 2)])
@@ -0,0 +1,85 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from kmmarc.reader import MarcMmapReader, read_marc_mmap_from_path
+from tests.samples import make_records, make_iso_bytes
+
+
+class TestMarcMmapReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "records.mrc")
+        with open(self.path, "wb") as f:
+            f.write(make_iso_bytes(make_records(10)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_random_access(self):
+        with read_marc_mmap_from_path(self.path) as reader:
+            self.assertEqual(len(reader), 10)
+            self.assertEqual(reader[7]['001'][0].data, "PT000007")
+            self.assertEqual(reader[-1]['001'][0].data, "PT000009")
+            self.assertEqual(reader[3]['200'][0]['a'][0].data, "Título 3")
+
+            with self.assertRaises(IndexError):
+                reader[10]
+
+    def test_seek_record(self):
+        with read_marc_mmap_from_path(self.path) as reader:
+            reader.seek_record(8)
+            self.assertEqual([r['001'][0].data for r in reader], ["PT000008", "PT000009"])
+
+    def test_sidecar_index(self):
+        index_path = self.path + ".idx"
+
+        with read_marc_mmap_from_path(self.path, index_path=index_path) as reader:
+            offsets = list(reader.offsets)
+
+        self.assertTrue(os.path.exists(index_path))
+
+        with open(self.path, "rb") as f:
+            with MarcMmapReader(f, index_path=index_path) as reader:
+                self.assertEqual(list(reader.offsets), offsets)
+                self.assertEqual(reader[5]['001'][0].data, "PT000005")
+
+    def test_sidecar_index_is_little_endian(self):
+        index_path = self.path + ".idx"
+        with read_marc_mmap_from_path(self.path, index_path=index_path) as reader:
+            offsets = list(reader.offsets)
+
+        with open(index_path, "rb") as f:
+            data = f.read()
+        self.assertEqual(data[-8 * len(offsets):], struct.pack(f"<{len(offsets)}q", *offsets))
+
+    def test_same_size_sidecar_index_is_rebuilt(self):
+        index_path = self.path + ".idx"
+        read_marc_mmap_from_path(self.path, index_path=index_path).close()
+        mtime_ns = os.stat(self.path).st_mtime_ns
+
+        # A regenerated dump of the same size, with the same mtime even.
+        records = make_records(10)
+        records[0]['200'][0].subfields[0].data += "XX"
+        records[1]['200'][0].subfields[0].data = records[1]['200'][0].subfields[0].data[:-2]
+        with open(self.path, "wb") as f:
+            f.write(make_iso_bytes(records))
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+        with read_marc_mmap_from_path(self.path, index_path=index_path) as reader:
+            self.assertEqual([r['001'][0].data for r in reader], [f"PT{i:06d}" for i in range(10)])
+
+    def test_stale_sidecar_index_is_rebuilt(self):
+        index_path = self.path + ".idx"
+        read_marc_mmap_from_path(self.path, index_path=index_path).close()
+
+        with open(self.path, "ab") as f:
+            f.write(make_iso_bytes(make_records(1)))
+
+        with read_marc_mmap_from_path(self.path, index_path=index_path) as reader:
+            self.assertEqual(len(reader), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
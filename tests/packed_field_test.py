@@ -0,0 +1,45 @@
+import io
+import pickle
+import unittest
+
+from kmmarc.marc import DataField, PackedDataField, SubField
+from kmmarc.reader import MarcStreamReader
+from tests.samples import make_records, make_iso_bytes
+
+
+class TestPackedDataField(unittest.TestCase):
+    def test_reader_packs_subfields(self):
+        data = make_iso_bytes(make_records(3))
+
+        records = list(MarcStreamReader(io.BytesIO(data), pack_subfields=True))
+        field = records[1]['200'][0]
+
+        self.assertIsInstance(field, PackedDataField)
+        self.assertEqual(field.codes, 'af')
+        self.assertEqual(field['a'][0].data, "Título 1")
+        self.assertEqual([str(r) for r in records], [str(r) for r in MarcStreamReader(io.BytesIO(data))])
+
+    def test_pack_and_unpack(self):
+        field = DataField('606', ' ', ' ')
+        field.subfields.append(SubField('a', "História"))
+        field.subfields.append(SubField('x', "Século XIX"))
+
+        packed = field.pack()
+        packed.add_subfield(SubField('y', "Portugal"))
+        packed.remove_subfield(SubField('a', "História"))
+
+        self.assertFalse('a' in packed)
+        self.assertTrue('y' in packed)
+        self.assertEqual(str(packed.unpack()), "606   $xSéculo XIX$yPortugal")
+
+        with self.assertRaises(AttributeError):
+            packed.subfields.append(SubField('z', "1900"))
+
+    def test_records_pickle(self):
+        records = list(MarcStreamReader(io.BytesIO(make_iso_bytes(make_records(2))), pack_subfields=True))
+
+        self.assertEqual([str(r) for r in pickle.loads(pickle.dumps(records))], [str(r) for r in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
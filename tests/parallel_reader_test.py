@@ -0,0 +1,98 @@
+import copy
+import io
+import os
+import pickle
+import tempfile
+import unittest
+
+from kmmarc.marc import LazyRecord, ControlField, DataField, SubField
+from kmmarc.reader import MarcStreamReader, read_marc_stream_parallel, read_marc_stream_from_path
+from tests.samples import make_record, make_records, make_iso_bytes
+
+
+def control_number(record):
+    return record['001'][0].data
+
+
+class TestParallelReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "records.mrc")
+        with open(self.path, "wb") as f:
+            f.write(make_iso_bytes(make_records(50)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ordered(self):
+        expected = [str(r) for r in read_marc_stream_from_path(self.path)]
+        records = [str(r) for r in read_marc_stream_parallel(self.path, workers=2, chunk_size=1024)]
+
+        self.assertEqual(records, expected)
+
+    def test_unordered(self):
+        expected = [r['001'][0].data for r in read_marc_stream_from_path(self.path)]
+        records = [r['001'][0].data for r in read_marc_stream_parallel(self.path, workers=2, ordered=False, chunk_size=1024)]
+
+        self.assertEqual(sorted(records), sorted(expected))
+
+    def test_map_func(self):
+        records = list(read_marc_stream_parallel(self.path, workers=2, chunk_size=1024, map_func=control_number))
+
+        self.assertEqual(records, [f"PT{i:06d}" for i in range(50)])
+
+    def test_records_come_back_lazy(self):
+        records = list(read_marc_stream_parallel(self.path, workers=2, chunk_size=1024))
+
+        self.assertIsInstance(records[0], LazyRecord)
+        self.assertFalse(records[0].decoded)
+        self.assertEqual(records[7]['001'][0].data, "PT000007")
+
+    def test_pickled_records(self):
+        record = make_record("PT1", title="Łódź")
+        record.leader.record_status = 'c'
+        restored = pickle.loads(pickle.dumps(record))
+        self.assertIsInstance(restored, LazyRecord)
+        self.assertEqual(str(restored), str(record))
+
+        # Edits to decoded fields of a lazy record travel with it.
+        restored['200'][0].subfields[0].data = "Lisboa"
+        self.assertEqual(pickle.loads(pickle.dumps(restored))['200'][0]['a'][0].data, "Lisboa")
+
+        # Fields the lazy form cannot hold are pickled as they are.
+        record.control_fields.append(ControlField('005', None))
+        field = DataField('606', ' ', ' ')
+        field.subfields.append(SubField('ab', "História"))
+        record.data_fields.append(field)
+        restored = pickle.loads(pickle.dumps(record))
+        self.assertNotIsInstance(restored, LazyRecord)
+        self.assertIsNone(restored['005'][0].data)
+        self.assertEqual(restored['606'][0]['ab'][0].data, "História")
+
+    def test_copies_keep_type(self):
+        record = make_record("PT1")
+        shallow = copy.copy(record)
+        self.assertIs(type(shallow), type(record))
+        self.assertIs(shallow['200'][0], record['200'][0])
+
+        deep = copy.deepcopy(record)
+        self.assertIs(type(deep), type(record))
+        deep['200'][0].subfields[0].data = "Lisboa"
+        self.assertEqual(record['200'][0]['a'][0].data, "História de Portugal")
+        self.assertEqual(str(deep['700'][0]), str(record['700'][0]))
+
+        lazy = next(iter(MarcStreamReader(io.BytesIO(make_iso_bytes([record])), lazy=True)))
+        for copied in (copy.copy(lazy), copy.deepcopy(lazy)):
+            self.assertIsInstance(copied, LazyRecord)
+            self.assertEqual(copied.encoding, 'iso8859-1')
+            self.assertEqual(str(copied), str(record))
+
+    def test_empty_file(self):
+        path = os.path.join(self.tmp.name, "empty.mrc")
+        open(path, "wb").close()
+
+        self.assertEqual(list(read_marc_stream_parallel(path, workers=1)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import unittest
+
+from kmmarc.marc import ControlField, DataField, LazyRecord, SubField
+from kmmarc.query import Query, compile_query, select_marc_stream
+from tests.samples import make_iso_bytes, make_record
+
+
+def make_sample_records():
+    records = [
+        make_record("PT1", title="História de Portugal"),
+        make_record("PT2", title="Histoire de France", author="Dupont"),
+        make_record("PT3", title="Geografia"),
+    ]
+    for record, country, year in zip(records, ["PT", "FR", "PT"], ["1998", "2004", "2010"]):
+        field = DataField('102', ' ', ' ')
+        field.subfields.append(SubField('a', country))
+        record.data_fields.insert(0, field)
+        field = DataField('210', ' ', ' ')
+        field.subfields.append(SubField('d', year))
+        record.data_fields.append(field)
+
+    field = DataField('300', ' ', ' ')
+    field.subfields.append(SubField('a', "Inclui índice"))
+    records[2].data_fields.append(field)
+    return records
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.records = make_sample_records()
+
+    def ids(self, query, records = None):
+        return [record['001'][0].data for record in compile_query(query).filter(records if records is not None else self.records)]
+
+    def test_comparisons(self):
+        self.assertEqual(self.ids('200$a ~ /^Hist/ and 102$a == "PT"'), ["PT1"])
+        self.assertEqual(self.ids('200$a ~ /^hist/i'), ["PT1", "PT2"])
+        self.assertEqual(self.ids("102$a != 'PT'"), ["PT2"])
+        self.assertEqual(self.ids('200$a !~ "Hist"'), ["PT3"])
+        self.assertEqual(self.ids('001 == "PT2"'), ["PT2"])
+        self.assertEqual(self.ids('210$d >= 2004'), ["PT2", "PT3"])
+        self.assertEqual(self.ids('210$d < "2000"'), ["PT1"])
+        self.assertEqual(self.ids('210$d > 999 and 210$d != 2004'), ["PT1", "PT3"])
+        self.assertEqual(self.ids('700 ~ /Dupont/'), ["PT2"])
+
+    def test_boolean_operators(self):
+        self.assertEqual(self.ids('300'), ["PT3"])
+        self.assertEqual(self.ids('not 300'), ["PT1", "PT2"])
+        self.assertEqual(self.ids('102$a == "FR" or 300$a ~ /índice/'), ["PT2", "PT3"])
+        self.assertEqual(self.ids('(102$a == "FR" or 300) and 210$d > 2005'), ["PT3"])
+        self.assertEqual(self.ids('not (102$a == "PT" and 200$a ~ /Hist/)'), ["PT2", "PT3"])
+        self.assertEqual(self.ids('200$a ~ /Hist/ AND NOT 102$a == "FR"'), ["PT1"])
+
+    def test_missing_fields(self):
+        self.assertEqual(self.ids('999$a == "x"'), [])
+        self.assertEqual(len(self.ids('999$a != "x"')), 3)
+
+        record = make_record("PT4")
+        record.control_fields.append(ControlField('005', None))
+        record.data_fields[0] = record.data_fields[0].pack()
+        self.assertTrue(compile_query('200$a ~ /Portugal/')(record))
+        self.assertFalse(compile_query('005')(record))
+
+    def test_required_tags(self):
+        self.assertEqual(Query('200$a ~ /^Hist/ and 102$a == "PT"').required_tags, {'200', '102'})
+        self.assertEqual(Query('200$a ~ /^Hist/ or 102$a == "PT"').required_tags, set())
+        self.assertEqual(Query('200 and (102 or 200$f)').required_tags, {'200'})
+        self.assertEqual(Query('200 and not 300 and 102$a != "PT"').required_tags, {'200'})
+        self.assertEqual(Query('200 and not 300').tags, {'200', '300'})
+
+    def test_syntax_errors(self):
+        for text in ['200$a ==', '200$a == "PT" and', '(200', '200$a ~ 12', 'title == "x"', '200$a = "x"', '"PT"']:
+            with self.assertRaises(Exception, msg=text):
+                compile_query(text)
+
+    def test_select_marc_stream(self):
+        data = make_iso_bytes(self.records)
+
+        selected = list(select_marc_stream(io.BytesIO(data), '200$a ~ /^Hist/ and 102$a == "PT"'))
+        self.assertEqual(len(selected), 1)
+        self.assertIsInstance(selected[0], LazyRecord)
+        self.assertFalse(selected[0].materialized)
+        self.assertEqual(str(selected[0]), str(self.records[0]))
+
+        selected = list(select_marc_stream(io.BytesIO(data), 'not 300 or 210$d == "2010"', lazy=False))
+        self.assertEqual([str(record) for record in selected], [str(record) for record in self.records])
+
+        self.assertEqual(list(select_marc_stream(io.BytesIO(data), '300 and 102$a == "FR"')), [])
@@ -0,0 +1,120 @@
+import unittest
+
+from kmmarc.marc import ControlField, DataField, SubField
+from tests.samples import make_record
+
+
+class TestRecordFields(unittest.TestCase):
+    def test_add_and_remove_field(self):
+        record = make_record("PT1")
+        self.assertEqual(len(record['700']), 1)
+
+        field = DataField('700', ' ', '1')
+        record.add_field(field)
+        self.assertEqual(record['700'][1], field)
+
+        record.remove_field(field)
+        self.assertEqual(len(record['700']), 1)
+
+        record.remove_field(record['700'][0])
+        self.assertIsNone(record['700'])
+        self.assertFalse('700' in record)
+
+    def test_direct_list_changes_are_seen(self):
+        record = make_record("PT1")
+        self.assertFalse('005' in record)
+
+        record.control_fields.append(ControlField('005', "20240101"))
+        self.assertTrue('005' in record)
+
+        record.data_fields = []
+        self.assertIsNone(record['200'])
+        self.assertEqual([f.tag for f in record.get_fields(sorted=True)], ['001', '005'])
+
+    def test_sorted_fields(self):
+        record = make_record("PT1")
+        record.add_field(DataField('100', ' ', ' '))
+        record.add_field(ControlField('003', "PT"))
+
+        self.assertEqual([f.tag for f in record.get_fields(sorted=True)], ['001', '003', '100', '200', '700'])
+        self.assertEqual([f.tag for f in record.get_fields()], ['001', '003', '200', '700', '100'])
+
+        record.add_field(DataField('010', ' ', ' '))
+        self.assertEqual([f.tag for f in record.get_data_fields(sorted=True)], ['010', '100', '200', '700'])
+
+    def test_sorted_fields_are_cached(self):
+        record = make_record("PT1")
+        fields = record.get_data_fields(sorted=True)
+        self.assertIs(record.get_data_fields(sorted=True), fields)
+
+        record.data_fields[0:1] = [DataField('900', ' ', ' '), DataField('100', ' ', ' ')]
+        self.assertIsNot(record.get_data_fields(sorted=True), fields)
+        self.assertEqual([f.tag for f in record.get_data_fields(sorted=True)], ['100', '700', '900'])
+
+    def test_subfield_index(self):
+        field = DataField('606', ' ', ' ')
+        field.subfields.append(SubField('a', "História"))
+        self.assertEqual(field['a'][0].data, "História")
+
+        # Appends after a lookup go into the index that lookup built.
+        index = field.subfields._lookup()
+        field.subfields.append(SubField('z', "Portugal"))
+        self.assertIs(field.subfields._lookup(), index)
+        self.assertEqual(field['z'][0].data, "Portugal")
+
+        subfield = SubField('x', "Século XIX")
+        field.add_subfield(subfield)
+        field.add_subfield(SubField('x', "Economia"))
+        self.assertEqual([s.data for s in field['x']], ["Século XIX", "Economia"])
+
+        field.remove_subfield(subfield)
+        self.assertEqual([s.data for s in field['x']], ["Economia"])
+        self.assertIsNone(field['y'])
+        self.assertFalse('y' in field)
+
+    def test_replaced_items_are_seen(self):
+        record = make_record("PT1")
+        removed = record['200'][0]
+        record.data_fields[0] = DataField('710', ' ', ' ')
+        self.assertTrue('710' in record)
+        self.assertFalse('200' in record)
+        self.assertIsNone(record['200'])
+        self.assertFalse(removed in record.get_fields(sorted=True))
+
+        field = record['700'][0]
+        field.subfields[1] = SubField('c', "Jr.")
+        self.assertTrue('c' in field)
+        self.assertFalse('b' in field)
+        self.assertIsNone(field['b'])
+        self.assertEqual(field['c'][0].data, "Jr.")
+
+    def test_every_list_change_is_seen(self):
+        record = make_record("PT1")
+        self.assertTrue('700' in record)
+
+        record.data_fields.extend([DataField('606', ' ', ' ')])
+        self.assertTrue('606' in record)
+        del record.data_fields[1]
+        self.assertFalse('700' in record)
+        record.data_fields[:] = [DataField('710', ' ', ' ')]
+        self.assertEqual([f.tag for f in record.get_fields()], ['001', '710'])
+        self.assertIsNone(record['200'])
+        record.data_fields += [DataField('200', ' ', ' ')]
+        self.assertEqual(len(record['200']), 1)
+        record.data_fields.pop()
+        self.assertIsNone(record['200'])
+        record.control_fields.insert(0, ControlField('003', "PT"))
+        self.assertEqual(record['003'][0].data, "PT")
+        record.control_fields.clear()
+        self.assertFalse('001' in record)
+
+        field = DataField('606', ' ', ' ')
+        field.subfields = [SubField('a', "História")]
+        self.assertTrue('a' in field)
+        field.subfields[0:1] = [SubField('x', "Economia")]
+        self.assertIsNone(field['a'])
+        self.assertEqual(field['x'][0].data, "Economia")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import io
+from kmmarc.marc import Record, ControlField, DataField, SubField
+from kmmarc.writer import MarcStreamWriter
+
+
+def make_record(control_number: str, title: str = "História de Portugal", author: str = "Silva") -> Record:
+    record = Record("00000nam0 2200000   450 ")
+    record.control_fields.append(ControlField('001', control_number))
+
+    field = DataField('200', '1', ' ')
+    field.subfields.append(SubField('a', title))
+    field.subfields.append(SubField('f', author))
+    record.data_fields.append(field)
+
+    field = DataField('700', ' ', '1')
+    field.subfields.append(SubField('a', author))
+    field.subfields.append(SubField('b', 'J.'))
+    record.data_fields.append(field)
+
+    return record
+
+
+def make_records(count: int) -> list[Record]:
+    return [make_record(f"PT{i:06d}", title=f"Título {i}") for i in range(count)]
+
+
+def make_iso_bytes(records: list[Record], force_utf8_encoding = False) -> bytes:
+    buf = io.BytesIO()
+    with MarcStreamWriter(buf, force_utf8_encoding=force_utf8_encoding) as writer:
+        writer.write_all(records)
+    return buf.getvalue()
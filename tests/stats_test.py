@@ -0,0 +1,118 @@
+import io
+import json
+import pickle
+import unittest
+
+import yaml
+
+from kmmarc.reader import MarcStreamReader, MarcXmlReader
+from kmmarc.stats import MarcStats
+from kmmarc.writer import MarcJsonWriter, MarcStreamWriter, MarcXmlWriter, MarcYamlWriter
+from tests.samples import make_iso_bytes, make_records
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.records = make_records(25)
+        self.data = make_iso_bytes(self.records)
+
+    def test_stream_reader(self):
+        stats = MarcStats()
+        records = list(MarcStreamReader(io.BytesIO(self.data), stats=stats))
+
+        self.assertEqual(len(records), 25)
+        self.assertEqual(stats.records_in, 25)
+        self.assertEqual(stats.fields_in, 75)
+        self.assertEqual(stats.subfields_in, 100)
+        self.assertEqual(stats.bytes_in, len(self.data))
+        self.assertEqual(set(stats.times), {'read', 'leader', 'directory', 'data_field', 'record'})
+        self.assertGreaterEqual(stats.times['record'], stats.times['data_field'])
+
+        # Same records with and without stats.
+        self.assertEqual([str(r) for r in records], [str(r) for r in MarcStreamReader(io.BytesIO(self.data))])
+
+    def test_lazy_and_packed_readers(self):
+        stats = MarcStats()
+        records = list(MarcStreamReader(io.BytesIO(self.data), lazy=True, stats=stats))
+        self.assertEqual((stats.records_in, stats.fields_in, stats.subfields_in), (25, 75, 0))
+        self.assertFalse(records[0].materialized)
+
+        self.assertEqual(len(records[0]['200'][0].subfields), 2)
+        self.assertEqual(stats.subfields_in, 2)
+        for record in records:
+            list(record)
+        self.assertEqual(stats.subfields_in, 100)
+        self.assertEqual(str(pickle.loads(pickle.dumps(records[1]))), str(self.records[1]))
+
+        stats = MarcStats()
+        list(MarcStreamReader(io.BytesIO(self.data), pack_subfields=True, stats=stats))
+        self.assertEqual(stats.subfields_in, 100)
+
+    def test_xml_reader_and_writers(self):
+        stats = MarcStats()
+        out = io.StringIO()
+        with MarcXmlWriter(out, stats=stats) as writer:
+            writer.write_all(self.records)
+        self.assertEqual((stats.records_out, stats.fields_out, stats.subfields_out), (25, 75, 100))
+        self.assertEqual(stats.bytes_out, len(out.getvalue().encode('utf-8')))
+        self.assertIn('serialize', stats.times)
+
+        xml = out.getvalue().encode('utf-8')
+        stats = MarcStats()
+        records = list(MarcXmlReader(io.BytesIO(xml), stats=stats))
+        self.assertEqual(len(records), 25)
+        self.assertEqual((stats.records_in, stats.fields_in, stats.subfields_in, stats.bytes_in), (25, 75, 100, len(xml)))
+
+        stats = MarcStats()
+        MarcJsonWriter(io.StringIO(), stats=stats).write_all(self.records)
+        self.assertEqual(stats.records_out, 25)
+
+        for writer_class, load in ((MarcJsonWriter, json.loads), (MarcYamlWriter, yaml.safe_load)):
+            stats = MarcStats()
+            out = io.StringIO()
+            writer_class(out, stats=stats).write(self.records[0])
+            self.assertEqual(load(out.getvalue())['leader'], self.records[0].leader.marshal())
+            self.assertEqual((stats.records_out, stats.bytes_out), (1, len(out.getvalue().encode('utf-8'))))
+
+        stats = MarcStats()
+        out = io.BytesIO()
+        with MarcStreamWriter(out, stats=stats) as writer:
+            writer.write_all(self.records)
+        self.assertEqual(out.getvalue(), self.data)
+        self.assertEqual(stats.bytes_out, len(self.data))
+
+    def test_text_streams_count_bytes(self):
+        stats = MarcStats()
+        buf = io.BytesIO()
+        out = io.TextIOWrapper(buf, encoding='iso8859-1')
+        with MarcXmlWriter(out, stats=stats) as writer:
+            writer.write_all(self.records)
+        out.flush()
+        xml = buf.getvalue()
+        self.assertNotEqual(len(xml), len(xml.decode('iso8859-1').encode('utf-8')))
+        self.assertEqual(stats.bytes_out, len(xml))
+
+        stats = MarcStats()
+        records = list(MarcXmlReader(io.TextIOWrapper(io.BytesIO(xml), encoding='iso8859-1'), stats=stats))
+        self.assertEqual(records[3]['200'][0]['a'][0].data, "Título 3")
+        self.assertEqual(stats.bytes_in, len(xml))
+
+    def test_callback(self):
+        snapshots = []
+        stats = MarcStats(callback=snapshots.append, interval=10)
+        with MarcStreamWriter(io.BytesIO(), stats=stats) as writer:
+            writer.write_all(MarcStreamReader(io.BytesIO(self.data), stats=stats))
+
+        self.assertEqual([(s['records_in'], s['records_out']) for s in snapshots], [(5, 5), (10, 10), (15, 15), (20, 20), (25, 25)])
+        self.assertEqual(stats.snapshot()['records_out'], 25)
+        self.assertIn('record', stats.snapshot()['seconds'])
+        self.assertIn("in: 25 records", str(stats))
+
+        stats.reset()
+        self.assertEqual(stats.snapshot()['records_in'], 0)
+        self.assertEqual(set(stats.times.values()), {0})
+
+        writer = MarcStreamWriter(io.BytesIO(), stats=stats)
+        writer.write(self.records[0])
+        self.assertEqual(stats.records_out, 1)
+        self.assertGreater(stats.times['serialize'], 0)
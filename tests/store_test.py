@@ -0,0 +1,130 @@
+import io
+import os
+import tempfile
+import unittest
+
+from kmmarc.marc import LazyRecord, DataField, SubField
+from kmmarc.reader import MarcStreamReader
+from kmmarc.store import MarcStore
+from kmmarc.writer import MarcStreamWriter, write_marc_stream_to_path, write_marc_xml_to_path
+from tests.samples import make_records
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "store.sqlite")
+        self.records = make_records(20)
+        for i, record in enumerate(self.records):
+            field = DataField('010', ' ', ' ')
+            field.subfields.append(SubField('a', f"978-972-{i % 5:04d}"))
+            record.data_fields.insert(0, field)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ingest_iso_and_find(self):
+        iso_path = os.path.join(self.tmp.name, "records.mrc")
+        write_marc_stream_to_path(iso_path, self.records)
+
+        with MarcStore(self.path, indexes=['010$a']) as store:
+            self.assertEqual(store.ingest(iso_path), 20)
+            self.assertEqual(len(store), 20)
+
+            found = store.find('001', "PT000007")
+            self.assertEqual(len(found), 1)
+            self.assertIsInstance(found[0], LazyRecord)
+            self.assertEqual(str(found[0]), str(self.records[7]))
+
+            self.assertEqual([r['001'][0].data for r in store.find('010$a', "978-972-0002")], ["PT000002", "PT000007", "PT000012", "PT000017"])
+            self.assertEqual(store.find('001', "missing"), [])
+
+            with self.assertRaises(Exception):
+                store.find('700$a', "Silva")
+
+    def test_ingest_forced_utf8(self):
+        iso_path = os.path.join(self.tmp.name, "records.mrc")
+        self.records[3]['200'][0].subfields[0].data = "Łódź"
+        with open(iso_path, "wb") as f:
+            writer = MarcStreamWriter(f, force_utf8_encoding=True)
+            writer.write_all(self.records)
+            writer.flush()
+        with open(iso_path, "r+b") as f:
+            # Leader/09 left blank, as some exports do.
+            data = bytearray(f.read())
+            start = 0
+            while start < len(data):
+                data[start + 9] = ord(' ')
+                start += int(data[start:start + 5])
+            f.seek(0)
+            f.write(data)
+
+        with MarcStore(self.path) as store:
+            store.ingest(iso_path, force_utf8_encoding=True)
+            self.assertEqual(store.find('001', "PT000003")[0]['200'][0]['a'][0].data, "Łódź")
+
+    def test_latin1_records_read_back(self):
+        iso_path = os.path.join(self.tmp.name, "records.mrc")
+        write_marc_stream_to_path(iso_path, self.records)
+
+        with MarcStore(self.path) as store:
+            store.ingest(iso_path)
+            self.assertEqual(store.find('001', "PT000004")[0]['200'][0]['a'][0].data, "Título 4")
+
+    def test_add_keeps_leader(self):
+        record = self.records[0]
+        leader = record.leader.marshal()
+        with MarcStore(self.path) as store:
+            store.add(record)
+            self.assertEqual(record.leader.marshal(), leader)
+            self.assertEqual(str(store.find('001', "PT000000")[0]['200'][0]), str(record['200'][0]))
+
+    def test_add_edited_lazy_records(self):
+        buf = io.BytesIO()
+        MarcStreamWriter(buf).write_all(self.records)
+        records = list(MarcStreamReader(io.BytesIO(buf.getvalue()), lazy=True))
+
+        records[0].leader.record_status = 'd'
+        records[1]['200'][0].subfields[0].data = "EDITED"
+        with MarcStore(self.path, indexes=['200$a']) as store:
+            store.add_all(records[0:3])
+
+            self.assertEqual(store.get(1).leader.record_status, 'd')
+            self.assertEqual(store.find_ids('200$a', "EDITED"), [2])
+            self.assertEqual(store.get(2)['200'][0]['a'][0].data, "EDITED")
+            self.assertEqual(str(store.get(3)), str(self.records[2]))
+
+    def test_find_range(self):
+        with MarcStore(self.path) as store:
+            store.add_all(self.records)
+
+            found = [value for value, _ in store.find_range('001', "PT000005", "PT000008")]
+            self.assertEqual(found, ["PT000005", "PT000006", "PT000007"])
+            self.assertEqual(len(list(store.find_range('001', limit=4))), 4)
+
+    def test_ingest_xml_and_reopen(self):
+        xml_path = os.path.join(self.tmp.name, "records.xml")
+        write_marc_xml_to_path(xml_path, self.records)
+
+        with MarcStore(self.path) as store:
+            self.assertEqual(store.ingest(xml_path), 20)
+
+        with MarcStore(self.path) as store:
+            store.add_index('200$a')
+            self.assertEqual(list(store.indexes), ['001', '200$a'])
+            self.assertEqual([r['001'][0].data for r in store.find('200$a', "Título 3")], ["PT000003"])
+
+            record_id = store.find_ids('001', "PT000003")[0]
+            store.remove(record_id)
+            self.assertIsNone(store.get(record_id))
+            self.assertEqual(store.find('200$a', "Título 3"), [])
+            self.assertEqual(len(store), 19)
+
+        with MarcStore(self.path) as store:
+            self.assertEqual(list(store.indexes), ['001', '200$a'])
+            store.drop_index('200$a')
+            self.assertEqual(list(store.indexes), ['001'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import gc
+import io
+import os
+import tempfile
+import unittest
+
+from kmmarc.reader import MarcStreamReader, read_marc_stream_from_path
+from tests.samples import make_records, make_iso_bytes
+
+
+class TestMarcStreamReader(unittest.TestCase):
+    def test_streaming_matches_buffered(self):
+        data = make_iso_bytes(make_records(20))
+
+        buffered = [str(r) for r in MarcStreamReader(io.BytesIO(data))]
+        streamed = [str(r) for r in MarcStreamReader(io.BytesIO(data), streaming=True)]
+
+        self.assertEqual(len(buffered), 20)
+        self.assertEqual(buffered, streamed)
+
+    def test_streaming_reads_incrementally(self):
+        data = make_iso_bytes(make_records(3))
+        f = io.BytesIO(data)
+
+        reader = MarcStreamReader(f, streaming=True)
+        reader.read_next()
+
+        self.assertEqual(f.tell(), len(data) // 3)
+        self.assertIsNotNone(reader.read_next())
+        self.assertIsNotNone(reader.read_next())
+        self.assertIsNone(reader.read_next())
+
+    def test_streaming_leaves_unbuffered_file_open(self):
+        data = make_iso_bytes(make_records(3))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.mrc")
+            with open(path, "wb") as f:
+                f.write(data)
+
+            with open(path, "rb", buffering=0) as f:
+                self.assertEqual(len(list(MarcStreamReader(f, streaming=True))), 3)
+                gc.collect()
+                self.assertFalse(f.closed)
+
+                f.seek(0)
+                reader = MarcStreamReader(f, streaming=True, buffer_size=4096)
+                reader.read_next()
+                del reader
+                gc.collect()
+                self.assertFalse(f.closed)
+                self.assertEqual(f.tell(), len(data) // 3)
+
+    def test_streaming_truncated_record(self):
+        data = make_iso_bytes(make_records(2))
+
+        reader = MarcStreamReader(io.BytesIO(data[:-10]), streaming=True)
+        reader.read_next()
+
+        with self.assertRaises(Exception):
+            reader.read_next()
+
+    def test_data_field_delimiters(self):
+        reader = MarcStreamReader(io.BytesIO(b''))
+        parse = reader._MarcStreamReader__parse_data_field
+
+        field = parse('200', b'1 \x1faTitle\x1f\x1fb\x1fc\x1e', 'iso8859-1')
+        self.assertEqual((field.ind1, field.ind2), ('1', ' '))
+        self.assertEqual([(s.code, s.data) for s in field.subfields], [('a', 'Title'), ('\x1f', 'b'), ('c', '')])
+
+        field = parse('200', b'  junk\x1f\x1e\x1fa\xe7\x1ejunk', 'iso8859-1')
+        self.assertEqual([(s.code, s.data) for s in field.subfields], [('a', '\xe7')])
+
+        with self.assertRaises(Exception):
+            parse('200', b'  \x1faTitle', 'iso8859-1')
+
+        with self.assertRaises(Exception):
+            parse('200', b'  \x1faTitle\x1e\x1f', 'iso8859-1')
+
+    def test_read_from_path(self):
+        data = make_iso_bytes(make_records(5))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.mrc")
+            with open(path, "wb") as f:
+                f.write(data)
+
+            records = list(read_marc_stream_from_path(path, buffer_size=64))
+            all_records = read_marc_stream_from_path(path, parse_all=True)
+
+        self.assertEqual([r['001'][0].data for r in records], [f"PT{i:06d}" for i in range(5)])
+        self.assertIsInstance(all_records, list)
+        self.assertEqual([str(r) for r in all_records], [str(r) for r in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import os
+import tempfile
+import unittest
+
+from kmmarc.reader import MarcStreamReader, read_marc_stream_from_path
+from kmmarc.writer import MarcStreamWriter, write_marc_stream_to_path
+from tests.samples import make_records
+
+
+class TestMarcStreamWriter(unittest.TestCase):
+    def test_writes_through_by_default(self):
+        f = io.BytesIO()
+        writer = MarcStreamWriter(f)
+        writer.write(make_records(1)[0])
+        self.assertEqual(len(f.getvalue()), 105)
+
+    def test_write_all_flushes(self):
+        f = io.BytesIO()
+        writer = MarcStreamWriter(f, buffer_size=1024 * 1024)
+        writer.write(make_records(1)[0])
+        self.assertEqual(f.getvalue(), b'')
+
+        writer.write_all(record for record in make_records(3))
+        self.assertEqual(len(list(MarcStreamReader(io.BytesIO(f.getvalue())))), 4)
+
+    def test_flushes_when_buffer_is_full(self):
+        f = io.BytesIO()
+        writer = MarcStreamWriter(f, buffer_size=200)
+        writer.write(make_records(1)[0])
+        self.assertEqual(f.getvalue(), b'')
+
+        writer.write(make_records(1)[0])
+        self.assertEqual(len(f.getvalue()), 210)
+
+    def test_round_trip(self):
+        records = make_records(5)
+
+        for force_utf8_encoding in (False, True):
+            f = io.BytesIO()
+            with MarcStreamWriter(f, force_utf8_encoding=force_utf8_encoding, buffer_size=0) as writer:
+                writer.write_all(*records)
+
+            self.assertEqual([str(r) for r in MarcStreamReader(io.BytesIO(f.getvalue()))], [str(r) for r in records])
+
+    def test_write_to_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.mrc")
+            write_marc_stream_to_path(path, make_records(4))
+
+            self.assertEqual(len(list(read_marc_stream_from_path(path))), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
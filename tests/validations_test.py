@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+
+from kmmarc.marc import DataField, SubField
+from kmmarc.validations import Validator, ValidationError, parse_validations
+from tests.samples import make_record
+
+RULES = {
+    'lang': {'type': 'enum', 'values': ["por", "eng"]},
+    '101.a': {'$ref': 'lang'},
+    '101.c': {'$ref': '101.a'},
+    '001': {'type': 'regex', 'value': '^PT[0-9]{6}$'},
+    '200.a': {'type': 'regex', 'value': '[A-Z]'},
+}
+
+
+class TestValidations(unittest.TestCase):
+    def test_refs_resolve_transitively(self):
+        validator = Validator(RULES)
+
+        self.assertTrue(validator('101.c', "por"))
+        self.assertFalse(validator('101.c', "fre"))
+        self.assertIs(validator.rules['101.c'], validator.rules['lang'])
+
+    def test_non_string_enum_values(self):
+        validator = Validator({'n': {'type': 'enum', 'values': [2, 1, "x"]}, 'l': {'type': 'enum', 'values': [[1], [2]]}})
+
+        self.assertTrue(validator('n', 1))
+        self.assertFalse(validator('n', 3))
+        self.assertEqual(validator.rules['n'].message, "must be one of 1, 2, x")
+        self.assertTrue(validator('l', [2]))
+        self.assertFalse(validator('l', [3]))
+
+    def test_ref_cycles_and_unknown_refs(self):
+        with self.assertRaises(Exception) as cm:
+            Validator({'a': {'$ref': 'b'}, 'b': {'$ref': 'c'}, 'c': {'$ref': 'a'}})
+        self.assertIn("a -> b -> c -> a", str(cm.exception))
+
+        with self.assertRaises(Exception):
+            Validator({'a': {'$ref': 'missing'}})
+
+    def test_validate_record(self):
+        validator = Validator(RULES)
+        record = make_record("PT000001", title="história")
+
+        field = DataField('101', ' ', ' ')
+        field.subfields.append(SubField('a', "por"))
+        field.subfields.append(SubField('c', "fre"))
+        record.data_fields.append(field)
+
+        errors = validator.validate_record(record, 3)
+        self.assertEqual(errors, [
+            ValidationError('200.a', '200', 'a', "história", "'história' must match [A-Z]", 3, "PT000001"),
+            ValidationError('101.c', '101', 'c', "fre", "'fre' must be one of eng, por", 3, "PT000001"),
+        ])
+        self.assertEqual(str(errors[1]), "PT000001 101$c: 'fre' must be one of eng, por")
+
+        record.data_fields[-1] = field.pack()
+        self.assertEqual(validator.validate_record(record, 3), errors)
+
+    def test_validate_records(self):
+        validator = Validator(RULES)
+        records = [make_record("PT000001"), make_record("X2"), make_record("PT000003")]
+
+        errors = list(validator.validate_records(records))
+        self.assertEqual([(e.record_index, e.tag, e.value) for e in errors], [(1, '001', "X2")])
+
+    def test_parse_validations_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "validations.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(RULES, f)
+
+            builtin = {'200.c': {'type': 'enum', 'values': ["JSON", "ISO"]}}
+            validator = parse_validations(builtin, path=path)
+
+            self.assertTrue(validator('200.c', "ISO"))
+            self.assertIs(parse_validations(builtin, path=path), validator)
+            self.assertIsNot(parse_validations(path=path), validator)
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({'200.c': {'type': 'enum', 'values': ["XML"]}}, f)
+            os.utime(path, ns=(0, 0))
+
+            self.assertTrue(parse_validations(builtin, path=path)('200.c', "XML"))
+
+
+if __name__ == '__main__':
+    unittest.main()
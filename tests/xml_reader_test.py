@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from kmmarc.reader import MarcXmlReader, read_marc_xml_from_path
+
+RECORD = """<{p}record>
+    <{p}leader>00105nam0 2200061   450 </{p}leader>
+    <{p}controlfield tag="001">PT{n}</{p}controlfield>
+    <{p}datafield tag="200" ind1="1" ind2=" ">
+      <{p}subfield code="a">Título {n}</{p}subfield>
+      <{p}subfield code="f">Silva</{p}subfield>
+    </{p}datafield>
+  </{p}record>"""
+
+
+def make_collection(count: int, prefix = '', xmlns = '') -> str:
+    records = ''.join(RECORD.format(p=prefix, n=n) for n in range(count))
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<{prefix}collection{xmlns}>{records}</{prefix}collection>'
+
+
+class TestMarcXmlReader(unittest.TestCase):
+    def assertRecords(self, records, count):
+        self.assertEqual([r['001'][0].data for r in records], [f"PT{n}" for n in range(count)])
+        self.assertEqual(records[-1]['200'][0]['a'][0].data, f"Título {count - 1}")
+        self.assertEqual(records[0].leader.marshal(), "00105nam0 2200061   450 ")
+
+    def test_without_namespace(self):
+        self.assertRecords(list(MarcXmlReader(io.StringIO(make_collection(3)))), 3)
+
+    def test_default_namespace(self):
+        data = make_collection(3, xmlns=' xmlns="http://www.loc.gov/MARC21/slim"')
+        self.assertRecords(list(MarcXmlReader(io.StringIO(data))), 3)
+
+    def test_prefixed_namespace(self):
+        data = make_collection(3, prefix='marc:', xmlns=' xmlns:marc="http://www.loc.gov/MARC21/slim"')
+        self.assertRecords(list(MarcXmlReader(io.StringIO(data))), 3)
+
+    def test_single_record_document(self):
+        self.assertRecords(list(MarcXmlReader(io.StringIO(RECORD.format(p='', n=0)))), 1)
+
+    def test_element(self):
+        self.assertRecords(list(MarcXmlReader(ET.fromstring(make_collection(2)))), 2)
+
+    def test_read_from_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.xml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(make_collection(4))
+
+            self.assertRecords(list(read_marc_xml_from_path(path)), 4)
+            self.assertRecords(read_marc_xml_from_path(path, parse_all=True), 4)
+
+            # Encoding stays the second positional parameter.
+            path = os.path.join(tmp, "latin1.xml")
+            with open(path, "w", encoding="iso-8859-1") as f:
+                f.write(make_collection(4).replace('encoding="UTF-8"', 'encoding="ISO-8859-1"'))
+
+            self.assertRecords(list(read_marc_xml_from_path(path, "iso-8859-1")), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
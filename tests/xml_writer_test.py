@@ -0,0 +1,81 @@
+import io
+import unittest
+import xml.etree.ElementTree as ET
+
+from kmmarc.reader import MarcXmlReader
+from kmmarc.writer import MarcXmlWriter
+from tests.samples import make_records
+
+
+def write_tree(records, indent = None, xml_declaration = True, use_marc_namespace = False):
+    # How MarcXmlWriter serialized before it streamed: one tree, written at the end.
+    namespace = 'marc:' if use_marc_namespace else ''
+    collection_tag = ET.Element(f'{namespace}collection')
+    if use_marc_namespace:
+        collection_tag.attrib['xmlns:marc'] = 'http://www.loc.gov/MARC21/slim'
+
+    for record in records:
+        record_tag = ET.SubElement(collection_tag, 'record')
+        ET.SubElement(record_tag, f'{namespace}leader').text = record.leader.marshal()
+
+        for field in record.control_fields:
+            field_tag = ET.SubElement(record_tag, f'{namespace}controlfield', {'tag': field.tag})
+            field_tag.text = field.data
+
+        for field in record.data_fields:
+            field_tag = ET.SubElement(record_tag, f'{namespace}datafield', {'tag': field.tag, 'ind1': field.ind1, 'ind2': field.ind2})
+            for subfield in field.subfields:
+                ET.SubElement(field_tag, f'{namespace}subfield', {'code': subfield.code}).text = subfield.data
+
+    if indent is not None:
+        ET.indent(collection_tag, space=''.join([" "] * indent))
+
+    return ET.tostring(collection_tag, xml_declaration=xml_declaration, encoding="unicode")
+
+
+class TestMarcXmlWriter(unittest.TestCase):
+    def assertSameOutput(self, records, **kwargs):
+        f = io.StringIO()
+        with MarcXmlWriter(f, **kwargs) as writer:
+            writer.write_all(records)
+
+        self.assertEqual(f.getvalue(), write_tree(records, **kwargs))
+
+    def test_matches_tree_output(self):
+        records = make_records(3)
+        records[0]['200'][0]['a'][0].data = 'Quotes " & <tags>'
+
+        self.assertSameOutput(records)
+        self.assertSameOutput(records, indent=2)
+        self.assertSameOutput(records, indent=4, xml_declaration=False, use_marc_namespace=True)
+
+    def test_empty_collection(self):
+        self.assertSameOutput([])
+        self.assertSameOutput([], indent=2)
+
+    def test_writes_incrementally(self):
+        f = io.StringIO()
+        writer = MarcXmlWriter(f, indent=2)
+        writer.write(make_records(1)[0])
+
+        self.assertIn("PT000000", f.getvalue())
+        self.assertNotIn("</collection>", f.getvalue())
+
+        writer.flush()
+        self.assertTrue(f.getvalue().endswith("</collection>"))
+
+        with self.assertRaises(Exception):
+            writer.write(make_records(1)[0])
+
+    def test_round_trip(self):
+        records = make_records(3)
+        f = io.StringIO()
+        with MarcXmlWriter(f, use_marc_namespace=True) as writer:
+            writer.write_all(*records)
+
+        f.seek(0)
+        self.assertEqual([str(r) for r in MarcXmlReader(f)], [str(r) for r in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
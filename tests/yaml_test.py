@@ -0,0 +1,58 @@
+import io
+import unittest
+
+import yaml
+
+from kmmarc.reader import MarcYamlReader
+from kmmarc.writer import MarcYamlWriter, YAML_DUMPER
+from tests.samples import make_records
+
+
+class TestYaml(unittest.TestCase):
+    def test_list_round_trip(self):
+        records = make_records(4)
+
+        for indent in (None, 4):
+            f = io.StringIO()
+            writer = MarcYamlWriter(f, indent=indent)
+            writer.write_all(iter(records))
+
+            objs = [writer._record_obj(r) for r in records]
+            self.assertEqual(f.getvalue(), yaml.dump(objs, Dumper=YAML_DUMPER, indent=indent, sort_keys=False))
+
+            f.seek(0)
+            self.assertEqual([str(r) for r in MarcYamlReader(f)], [str(r) for r in records])
+
+    def test_multi_document_round_trip(self):
+        records = make_records(4)
+
+        f = io.StringIO()
+        MarcYamlWriter(f, multi_document=True).write_all(iter(records))
+
+        self.assertEqual(f.getvalue().count('---'), 4)
+        self.assertEqual(len(list(yaml.safe_load_all(f.getvalue()))), 4)
+
+        f.seek(0)
+        self.assertEqual([str(r) for r in MarcYamlReader(f)], [str(r) for r in records])
+
+    def test_mixed_documents(self):
+        records = make_records(3)
+        writer = MarcYamlWriter(None)
+        objs = [writer._record_obj(r) for r in records]
+
+        data = yaml.safe_dump(objs[0]) + '---\n' + yaml.safe_dump(objs[1:]) + '---\n'
+        self.assertEqual([str(r) for r in MarcYamlReader(io.StringIO(data))], [str(r) for r in records])
+
+    def test_empty(self):
+        f = io.StringIO()
+        MarcYamlWriter(f).write_all([])
+        self.assertEqual(f.getvalue(), '[]\n')
+        self.assertEqual(list(MarcYamlReader(io.StringIO(f.getvalue()))), [])
+
+        f = io.StringIO()
+        MarcYamlWriter(f, multi_document=True).write_all([])
+        self.assertEqual(list(MarcYamlReader(io.StringIO(f.getvalue()))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()